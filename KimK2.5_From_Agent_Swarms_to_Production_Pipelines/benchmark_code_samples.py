@@ -0,0 +1,115 @@
+import argparse
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from code_samples import CODE_SAMPLE_MODES, consistency_score, generate_chained, generate_parallel
+from config import Config
+from openrouter_client import KimiK25OpenRouterClient
+from response_parsing import extract_code, parse_steps
+
+
+def _run_mode(client: KimiK25OpenRouterClient, mode: str, analysis: str, steps: List[str]) -> Dict:
+    usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+    lock = threading.Lock()
+
+    def complete(result: Dict) -> str:
+        with lock:
+            usage["calls"] += 1
+            usage["prompt_tokens"] += int(result["usage"].get("prompt_tokens", 0) or 0)
+            usage["completion_tokens"] += int(result["usage"].get("completion_tokens", 0) or 0)
+        return result["content"] or ""
+
+    def generate_step(index: int, step: str, context: str) -> str:
+        if mode == "parallel":
+            result = client.generate_code_from_skeleton(step, context)
+        else:
+            result = client.generate_code_from_description(step, previous_code=context)
+        return extract_code(complete(result))
+
+    started = time.perf_counter()
+    if mode == "parallel":
+        code_samples, _ = generate_parallel(
+            steps,
+            lambda: complete(client.generate_project_skeleton(analysis, steps)),
+            generate_step,
+            lambda skeleton, drafts: complete(client.reconcile_code_samples(skeleton, drafts)),
+            max_workers=Config.CODE_SAMPLE_WORKERS,
+            max_skeleton_chars=Config.CODE_SKELETON_MAX_CHARS,
+        )
+    else:
+        code_samples = generate_chained(steps, generate_step)
+    return {
+        "mode": mode,
+        "seconds": time.perf_counter() - started,
+        **usage,
+        "consistency": consistency_score(code_samples),
+        "code_samples": code_samples,
+    }
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Compare chained and parallel code-sample generation on one workflow analysis."
+    )
+    parser.add_argument(
+        "--analysis",
+        required=True,
+        help="Workflow analysis text, e.g. output/workflow_analysis.txt.",
+    )
+    parser.add_argument("--max-steps", type=int, default=5, help="Steps to generate code for.")
+    parser.add_argument(
+        "--modes",
+        default=",".join(CODE_SAMPLE_MODES),
+        help="Comma-separated modes to run. The first entry is the baseline.",
+    )
+    parser.add_argument("--json", default="", help="Optional path to write the report as JSON.")
+    return parser
+
+
+def main() -> None:
+    args = _build_arg_parser().parse_args()
+    analysis_path = Path(args.analysis)
+    if not analysis_path.exists():
+        raise FileNotFoundError(f"Analysis file not found: {analysis_path}")
+    analysis = analysis_path.read_text(encoding="utf-8")
+    steps = parse_steps(analysis)[: args.max_steps]
+    if not steps:
+        raise ValueError("No steps found in the analysis.")
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    for mode in modes:
+        if mode not in CODE_SAMPLE_MODES:
+            raise ValueError(f"Unknown mode '{mode}'. Choose from: {', '.join(CODE_SAMPLE_MODES)}")
+
+    # Bypass the response cache so every mode pays for real calls.
+    client = KimiK25OpenRouterClient(use_cache=False)
+    results = []
+    for mode in modes:
+        print(f"\n⏱️ Running {mode} mode on {len(steps)} steps...")
+        results.append(_run_mode(client, mode, analysis, steps))
+    baseline = results[0]
+
+    print(f"\n📊 Code sample generation ({len(steps)} steps from {analysis_path.name})")
+    print(
+        f"   {'mode':<10}{'wall s':>9}{'calls':>7}{'prompt tok':>12}"
+        f"{'output tok':>12}{'consistency':>13}{'wall vs base':>14}{'prompt vs base':>16}"
+    )
+    for r in results:
+        print(
+            f"   {r['mode']:<10}{r['seconds']:>9.1f}{r['calls']:>7}{r['prompt_tokens']:>12,}"
+            f"{r['completion_tokens']:>12,}{r['consistency']:>13.2f}"
+            f"{r['seconds'] / baseline['seconds']:>13.0%} "
+            f"{r['prompt_tokens'] / max(baseline['prompt_tokens'], 1):>15.0%}"
+        )
+    print("   consistency = mean overlap of ids, classes and function names between consecutive steps")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\n   • {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from video_decoders import DECODE_BACKENDS, available_backends, open_decoder, probe_video, select_backend
+
+# Sample clips: (label, ffmpeg encoder, OpenCV FourCC, extension).
+SAMPLE_CODECS = [
+    ("h264", "libx264", "avc1", "mp4"),
+    ("hevc", "libx265", "hev1", "mp4"),
+    ("vp9", "libvpx-vp9", "VP90", "webm"),
+    ("mpeg4", "mpeg4", "mp4v", "mp4"),
+]
+
+
+def _write_with_ffmpeg(path: Path, encoder: str, seconds: int, fps: int, size: str) -> bool:
+    command = [
+        "ffmpeg", "-y", "-loglevel", "error", "-f", "lavfi",
+        "-i", f"testsrc2=size={size}:rate={fps}", "-t", str(seconds),
+        "-c:v", encoder, "-pix_fmt", "yuv420p", str(path),
+    ]
+    return subprocess.run(command, capture_output=True).returncode == 0
+
+
+def _write_with_opencv(path: Path, fourcc: str, seconds: int, fps: int, size: str) -> bool:
+    width, height = (int(v) for v in size.lower().split("x"))
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*fourcc), fps, (width, height))
+    if not writer.isOpened():
+        return False
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    for i in range(seconds * fps):
+        frame = np.roll(base, i * 4, axis=1)
+        cv2.putText(frame, f"{i / fps:.2f}s", (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+        writer.write(frame)
+    writer.release()
+    return path.exists() and path.stat().st_size > 0
+
+
+def _sample_clips(work_dir: Path, codecs: List[str], seconds: int, fps: int, size: str) -> List[Path]:
+    # ffmpeg encodes every sample codec; without it OpenCV writes whatever
+    # its build has encoders for.
+    clips = []
+    for label, encoder, fourcc, ext in SAMPLE_CODECS:
+        if label not in codecs:
+            continue
+        path = work_dir / f"sample_{label}.{ext}"
+        if shutil.which("ffmpeg"):
+            ok = _write_with_ffmpeg(path, encoder, seconds, fps, size)
+        else:
+            ok = _write_with_opencv(path, fourcc, seconds, fps, size)
+        if ok:
+            clips.append(path)
+        else:
+            print(f"⚠️ No {label} encoder available here; skipping that sample.")
+    return clips
+
+
+def _cpu_seconds() -> float:
+    # Includes waited-for children, i.e. ffmpeg decoder processes.
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _decode(video_path: Path, backend: str, threads: int, hw_acceleration: bool, max_frames: int) -> Dict:
+    wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+    decoder = open_decoder(str(video_path), backend, threads=threads, hw_acceleration=hw_acceleration)
+    frames = 0
+    while not max_frames or frames < max_frames:
+        ret, _ = decoder.read()
+        if not ret:
+            break
+        frames += 1
+    decoder.release()
+    wall = time.perf_counter() - wall_start
+    cpu = _cpu_seconds() - cpu_start
+    return {"frames": frames, "wall": wall, "cpu": cpu}
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Decoded frames per second and CPU use of each decode backend on sample clips."
+    )
+    parser.add_argument(
+        "--videos",
+        default="",
+        help="Comma-separated videos to decode. Sample clips are generated when omitted.",
+    )
+    parser.add_argument(
+        "--codecs",
+        default="h264,hevc,vp9",
+        help=f"Sample clip codecs to generate ({', '.join(c[0] for c in SAMPLE_CODECS)}).",
+    )
+    parser.add_argument("--seconds", type=int, default=20, help="Sample clip length.")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--size", default="1280x720", help="Sample clip WIDTHxHEIGHT.")
+    parser.add_argument(
+        "--backends",
+        default=",".join(DECODE_BACKENDS),
+        help="Comma-separated backends to compare; missing ones are skipped.",
+    )
+    parser.add_argument(
+        "--threads",
+        default="1,0",
+        help="Comma-separated decoder thread counts (0 = decoder default).",
+    )
+    parser.add_argument("--hw", action="store_true", help="Request hardware decoding (opencv/ffmpeg).")
+    parser.add_argument("--max-frames", type=int, default=0, help="Stop after this many frames (0 = all).")
+    parser.add_argument("--repeat", type=int, default=2, help="Runs per setting (best is reported).")
+    parser.add_argument("--json", default="", help="Optional path to write the report as JSON.")
+    return parser
+
+
+def main() -> None:
+    args = _build_arg_parser().parse_args()
+    available = available_backends()
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    for backend in backends:
+        if backend not in DECODE_BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}'. Choose from: {', '.join(DECODE_BACKENDS)}")
+        if backend not in available:
+            print(f"⚠️ {backend} backend is not installed here; skipping it.")
+    backends = [b for b in backends if b in available]
+    thread_counts = [int(t) for t in args.threads.split(",") if t.strip()]
+    cores = os.cpu_count() or 1
+
+    results = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        if args.videos:
+            clips = [Path(v.strip()) for v in args.videos.split(",") if v.strip()]
+            for clip in clips:
+                if not clip.exists():
+                    raise FileNotFoundError(f"Video file not found: {clip}")
+        else:
+            print(f"🎞️ Generating {args.seconds}s sample clips at {args.fps} FPS ({args.size})...")
+            codecs = [c.strip() for c in args.codecs.split(",") if c.strip()]
+            clips = _sample_clips(Path(work_dir), codecs, args.seconds, args.fps, args.size)
+
+        for clip in clips:
+            info = probe_video(str(clip))
+            print(f"\n⏱️ {clip.name} ({info['codec']}); auto picks {select_backend(str(clip), 'auto')}")
+            for backend in backends:
+                for threads in thread_counts:
+                    runs = [
+                        _decode(clip, backend, threads, args.hw, args.max_frames)
+                        for _ in range(args.repeat)
+                    ]
+                    best = min(runs, key=lambda r: r["wall"])
+                    results.append(
+                        {
+                            "video": clip.name,
+                            "codec": info["codec"],
+                            "backend": backend,
+                            "threads": threads,
+                            **best,
+                            "fps": best["frames"] / best["wall"] if best["wall"] else 0.0,
+                            "cpu_percent": 100 * best["cpu"] / best["wall"] if best["wall"] else 0.0,
+                        }
+                    )
+
+    print(f"\n📊 Decode backends ({cores} CPU cores)")
+    print(
+        f"   {'video':<20}{'codec':<7}{'backend':<9}{'threads':>8}{'frames':>8}"
+        f"{'wall s':>9}{'frames/s':>10}{'CPU %':>8}{'of cores':>10}"
+    )
+    for r in results:
+        threads = r["threads"] or "auto"
+        print(
+            f"   {r['video']:<20}{r['codec']:<7}{r['backend']:<9}{threads:>8}{r['frames']:>8}"
+            f"{r['wall']:>9.2f}{r['fps']:>10.1f}{r['cpu_percent']:>8.0f}{r['cpu_percent'] / cores:>9.0f}%"
+        )
+    print("   CPU % = CPU seconds / wall seconds (100 = one busy core), including ffmpeg child processes")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\n   • {args.json}")
+
+
+if __name__ == "__main__":
+    main()
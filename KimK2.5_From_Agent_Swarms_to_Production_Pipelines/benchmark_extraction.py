@@ -0,0 +1,169 @@
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from response_parsing import HtmlStreamExtractor, extract_code, extract_html
+
+
+def _legacy_extract_code(content: str) -> str:
+    fenced = re.findall(r"```(?:\w+)?\n(.*?)```", content, re.DOTALL)
+    if fenced:
+        return fenced[0].strip()
+    return content.strip()
+
+
+def _legacy_extract_html(content: str) -> str:
+    text = content.strip()
+    if not text:
+        return "<!doctype html>\n<html><body><pre></pre></body></html>"
+    fenced = re.findall(r"```(?:html)?\n(.*?)```", text, re.DOTALL | re.IGNORECASE)
+    if fenced:
+        return fenced[0].strip()
+    if text.startswith("```html") or text.startswith("```"):
+        text = re.sub(r"^```(?:html)?\n?", "", text, flags=re.IGNORECASE).strip()
+    text = re.sub(r"\n?```$", "", text).strip()
+    if "<html" in text.lower():
+        return text
+    return f"<!doctype html>\n<html><body><pre>{text}</pre></body></html>"
+
+
+def _words(rng: random.Random, tokens: int) -> str:
+    # ~1 token per short word.
+    vocab = ["step", "click", "the", "button", "panel", "opens", "code", "editor", "value", "render"]
+    return " ".join(rng.choice(vocab) for _ in range(tokens))
+
+
+def _html_page(rng: random.Random, tokens: int) -> str:
+    sections = []
+    for i in range(max(1, tokens // 60)):
+        sections.append(
+            f'<section id="step-{i}"><h2>Step {i}</h2><p>{_words(rng, 40)}</p>'
+            f"<pre><code>const value{i} = render({i});</code></pre></section>"
+        )
+    body = "\n".join(sections)
+    return f"<!doctype html>\n<html><head><title>Tutorial</title></head><body>\n{body}\n</body></html>"
+
+
+def _code_blocks(rng: random.Random, tokens: int) -> str:
+    blocks = []
+    for i in range(max(1, tokens // 50)):
+        blocks.append(f"Step {i}: {_words(rng, 10)}\n```javascript\nfunction step{i}() {{\n  // {_words(rng, 30)}\n}}\n```")
+    return "\n\n".join(blocks)
+
+
+def synthetic_responses(tokens: int, seed: int = 0) -> Dict[str, str]:
+    rng = random.Random(seed)
+    page = _html_page(rng, tokens)
+    return {
+        "fenced_html": f"Here is the page:\n\n```html\n{page}\n```\n\n{_words(rng, 200)}",
+        "unfenced_html": page,
+        "fence_wrapped_html": f"```HTML\n{page}",
+        "plain_text": _words(rng, tokens),
+        "code_blocks": _code_blocks(rng, tokens),
+    }
+
+
+def _deltas(text: str, rng: random.Random, max_size: int = 24) -> List[str]:
+    # Stream-like pieces of 1..max_size characters.
+    deltas, i = [], 0
+    while i < len(text):
+        size = rng.randint(1, max_size)
+        deltas.append(text[i : i + size])
+        i += size
+    return deltas
+
+
+def _fed(deltas: List[str]) -> HtmlStreamExtractor:
+    extractor = HtmlStreamExtractor()
+    for delta in deltas:
+        extractor.feed(delta)
+    return extractor
+
+
+def _legacy_finish(deltas: List[str]) -> str:
+    # What the docs stage did once the stream ended: join, then extract.
+    return _legacy_extract_html("".join(deltas))
+
+
+def _time_per_call(func: Callable, arg, min_seconds: float) -> float:
+    runs, started = 0, time.perf_counter()
+    while True:
+        func(arg)
+        runs += 1
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_seconds:
+            return elapsed / runs
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Compare the response extractors with the previous findall/sub versions on large synthetic responses."
+    )
+    parser.add_argument(
+        "--tokens",
+        default="8000,32000",
+        help="Comma-separated approximate response sizes in tokens.",
+    )
+    parser.add_argument("--min-seconds", type=float, default=0.3, help="Minimum timing per measurement.")
+    parser.add_argument("--json", default="", help="Optional path to write the report as JSON.")
+    return parser
+
+
+def main() -> None:
+    args = _build_arg_parser().parse_args()
+    rng = random.Random(1)
+    results = []
+    for tokens in [int(t) for t in args.tokens.split(",") if t.strip()]:
+        for name, text in synthetic_responses(tokens).items():
+            deltas = _deltas(text, rng)
+            if name == "code_blocks":
+                pairs = [("extract_code", _legacy_extract_code, extract_code, text)]
+            else:
+                # "stream" is the work left after the last delta; the feed cost
+                # is spread over the stream and reported per delta.
+                extractor = _fed(deltas)
+                pairs = [
+                    ("extract_html", _legacy_extract_html, extract_html, text),
+                    ("stream", _legacy_finish, lambda _: extractor.result(), deltas),
+                ]
+            for kind, legacy, current, arg in pairs:
+                if legacy(arg) != current(arg):
+                    raise AssertionError(f"{kind} output differs from the previous version on {name}")
+                before = _time_per_call(legacy, arg, args.min_seconds)
+                after = _time_per_call(current, arg, args.min_seconds)
+                result = {
+                    "tokens": tokens,
+                    "response": name,
+                    "kind": kind,
+                    "chars": len(text),
+                    "before_us": before * 1e6,
+                    "after_us": after * 1e6,
+                }
+                if kind == "stream":
+                    result["deltas"] = len(deltas)
+                    result["feed_us_per_delta"] = _time_per_call(_fed, deltas, args.min_seconds) * 1e6 / len(deltas)
+                results.append(result)
+
+    print("\n📊 Response extraction (identical output verified for every case)")
+    print(f"   {'tokens':>7} {'response':<19}{'extractor':<14}{'before µs':>11}{'after µs':>11}{'speedup':>9}")
+    for r in results:
+        print(
+            f"   {r['tokens']:>7} {r['response']:<19}{r['kind']:<14}{r['before_us']:>11.1f}"
+            f"{r['after_us']:>11.1f}{r['before_us'] / r['after_us']:>8.1f}x"
+        )
+    print("   stream = time from the last delta to the extracted page (join + extract vs HtmlStreamExtractor.result())")
+    feeds = [r["feed_us_per_delta"] for r in results if r["kind"] == "stream"]
+    if feeds:
+        print(f"   HtmlStreamExtractor.feed costs {min(feeds):.2f}-{max(feeds):.2f} µs per delta while streaming")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\n   • {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import json
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from frame_encoding import encode_frame, payload_stats
+
+
+DEFAULT_SETTINGS = "0:95,1568:85,1280:80,1024:75,1568:85:legible"
+
+
+def _parse_settings(spec: str) -> List[Dict]:
+    # Each setting is LONG_EDGE:QUALITY[:legible]; a long edge of 0 keeps native size.
+    settings = []
+    for item in spec.split(","):
+        parts = [p.strip() for p in item.split(":") if p.strip()]
+        if len(parts) < 2:
+            raise ValueError(f"Invalid setting '{item}'. Use LONG_EDGE:QUALITY[:legible].")
+        settings.append(
+            {
+                "long_edge": int(parts[0]),
+                "quality": int(parts[1]),
+                "text_legible": len(parts) > 2 and parts[2] == "legible",
+            }
+        )
+    return settings
+
+
+def _label(setting: Dict) -> str:
+    edge = setting["long_edge"] or "native"
+    suffix = " legible" if setting["text_legible"] else ""
+    return f"{edge}@q{setting['quality']}{suffix}"
+
+
+def _sample_frames(video_path: Path, count: int) -> List[np.ndarray]:
+    cap = cv2.VideoCapture(str(video_path))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    targets = np.linspace(0, max(total_frames - 1, 0), num=count, dtype=int)
+    frames = []
+    for target in dict.fromkeys(targets.tolist()):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+        ret, frame = cap.read()
+        if ret:
+            frames.append(frame)
+    cap.release()
+    return frames
+
+
+def _measure(frames: List[np.ndarray], setting: Dict) -> Dict:
+    stats = []
+    for frame in frames:
+        jpeg, width, height = encode_frame(
+            frame,
+            max_long_edge=setting["long_edge"],
+            quality=setting["quality"],
+            text_legible=setting["text_legible"],
+        )
+        stats.append(payload_stats(len(jpeg), width, height))
+    return {
+        "setting": _label(setting),
+        "width": stats[0]["width"],
+        "height": stats[0]["height"],
+        "jpeg_bytes": sum(s["jpeg_bytes"] for s in stats) / len(stats),
+        "base64_bytes": sum(s["base64_bytes"] for s in stats) / len(stats),
+        "image_tokens": sum(s["image_tokens"] for s in stats) / len(stats),
+    }
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Report bytes and estimated image tokens per frame for encoding settings."
+    )
+    parser.add_argument("--video", required=True, help="Video to sample frames from.")
+    parser.add_argument("--frames", type=int, default=10, help="Frames to sample evenly.")
+    parser.add_argument(
+        "--settings",
+        default=DEFAULT_SETTINGS,
+        help="Comma-separated LONG_EDGE:QUALITY[:legible]. The first entry is the baseline.",
+    )
+    parser.add_argument("--json", default="", help="Optional path to write the report as JSON.")
+    return parser
+
+
+def main() -> None:
+    args = _build_arg_parser().parse_args()
+    video_path = Path(args.video)
+    if not video_path.exists():
+        raise FileNotFoundError(f"Video file not found: {video_path}")
+
+    frames = _sample_frames(video_path, args.frames)
+    if not frames:
+        raise ValueError("No frames could be read from the video.")
+
+    results = [_measure(frames, s) for s in _parse_settings(args.settings)]
+    baseline = results[0]
+
+    print(f"\n📊 Frame payload report ({len(frames)} frames from {video_path.name})")
+    print(
+        f"   {'setting':<22}{'size':>12}{'jpeg KB':>10}{'b64 KB':>10}"
+        f"{'tokens':>9}{'bytes vs base':>15}{'tokens vs base':>16}"
+    )
+    for r in results:
+        print(
+            f"   {r['setting']:<22}{str(r['width']) + 'x' + str(r['height']):>12}"
+            f"{r['jpeg_bytes'] / 1024:>10.1f}{r['base64_bytes'] / 1024:>10.1f}"
+            f"{r['image_tokens']:>9.0f}"
+            f"{r['base64_bytes'] / baseline['base64_bytes']:>14.0%} "
+            f"{r['image_tokens'] / baseline['image_tokens']:>15.0%}"
+        )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\n   • {args.json}")
+
+
+if __name__ == "__main__":
+    main()
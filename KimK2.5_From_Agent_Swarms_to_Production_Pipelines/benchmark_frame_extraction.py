@@ -0,0 +1,136 @@
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from config import Config
+from video_processor import SAMPLING_MODES, VideoFrameExtractor
+
+
+def _write_synthetic_video(path: Path, seconds: int, fps: int, width: int, height: int) -> None:
+    writer = cv2.VideoWriter(
+        str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height)
+    )
+    rng = np.random.default_rng(0)
+    base = rng.integers(0, 255, size=(height, width, 3), dtype=np.uint8)
+    for i in range(seconds * fps):
+        frame = np.roll(base, i * 4, axis=1)
+        cv2.putText(
+            frame, f"{i / fps:.2f}s", (20, 60), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3
+        )
+        writer.write(frame)
+    writer.release()
+
+
+def _video_minutes(video_path: Path) -> float:
+    cap = cv2.VideoCapture(str(video_path))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    cap.release()
+    return (total_frames / fps) / 60 if fps > 0 else 0
+
+
+def _cpu_seconds() -> float:
+    # Shard workers are child processes, so count waited-for children too.
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def _run_mode(video_path: Path, mode: str, interval: int, max_frames: int, shards: int = 1) -> dict:
+    with tempfile.TemporaryDirectory() as frames_dir:
+        extractor = VideoFrameExtractor(str(video_path), output_dir=frames_dir, shards=shards)
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        frames = extractor.extract_key_frames(
+            interval_seconds=interval,
+            max_frames=max_frames,
+            sampling_mode=mode,
+        )
+        return {
+            "mode": mode if shards == 1 else f"{mode} x{shards}",
+            "frames": len(frames),
+            "wall": time.perf_counter() - wall_start,
+            "cpu": _cpu_seconds() - cpu_start,
+        }
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Compare wall time and CPU per minute of video across frame sampling modes."
+    )
+    parser.add_argument(
+        "--video",
+        default="",
+        help="Video to benchmark. A synthetic clip is generated when omitted.",
+    )
+    parser.add_argument("--synthetic-seconds", type=int, default=120)
+    parser.add_argument("--synthetic-fps", type=int, default=60)
+    parser.add_argument("--synthetic-size", default="1280x720", help="WIDTHxHEIGHT")
+    parser.add_argument("--interval", type=int, default=10, help="Seconds between frames.")
+    parser.add_argument("--max-frames", type=int, default=15)
+    parser.add_argument(
+        "--modes",
+        default=",".join(SAMPLING_MODES),
+        help="Comma-separated sampling modes to compare.",
+    )
+    parser.add_argument(
+        "--shards",
+        default="1",
+        help="Comma-separated shard counts per mode (worker processes per video, 0 = one per core).",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per mode (best is reported).")
+    return parser
+
+
+def main() -> None:
+    args = _build_arg_parser().parse_args()
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    shard_counts = [int(s) for s in args.shards.split(",") if s.strip()]
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        if args.video:
+            video_path = Path(args.video)
+            if not video_path.exists():
+                raise FileNotFoundError(f"Video file not found: {video_path}")
+        else:
+            width, height = (int(v) for v in args.synthetic_size.lower().split("x"))
+            video_path = Path(work_dir) / "synthetic.mp4"
+            print(
+                f"🎞️ Generating {args.synthetic_seconds}s synthetic clip at "
+                f"{args.synthetic_fps} FPS ({width}x{height})..."
+            )
+            _write_synthetic_video(
+                video_path, args.synthetic_seconds, args.synthetic_fps, width, height
+            )
+
+        minutes = _video_minutes(video_path)
+        if minutes <= 0:
+            raise ValueError("Could not determine video duration.")
+
+        # Sharding applies to videos of any length here.
+        Config.FRAME_SHARD_MIN_SECONDS = 0
+        results = []
+        for mode in modes:
+            for shards in shard_counts:
+                runs = [
+                    _run_mode(video_path, mode, args.interval, args.max_frames, shards)
+                    for _ in range(args.repeat)
+                ]
+                results.append(min(runs, key=lambda r: r["wall"]))
+
+    print("\n📊 Frame extraction benchmark")
+    print(f"   Video length: {minutes:.2f} min")
+    print(f"   {'mode':<14}{'frames':>8}{'wall s':>10}{'cpu s':>10}{'wall s/min':>12}{'cpu s/min':>12}")
+    for r in results:
+        print(
+            f"   {r['mode']:<14}{r['frames']:>8}{r['wall']:>10.3f}{r['cpu']:>10.3f}"
+            f"{r['wall'] / minutes:>12.3f}{r['cpu'] / minutes:>12.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
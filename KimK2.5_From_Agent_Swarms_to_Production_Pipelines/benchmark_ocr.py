@@ -0,0 +1,259 @@
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+from config import Config
+from frame_encoding import encode_frame
+from frame_ocr import is_text_dominated, ocr_frame_tokens, ocr_image, tesseract_available, thumbnail_jpeg
+
+_CODE = """import os
+from pathlib import Path
+
+
+def load_settings(path):
+    settings = {}
+    for line in Path(path).read_text().splitlines():
+        key, _, value = line.partition("=")
+        if key and not key.startswith("#"):
+            settings[key.strip()] = value.strip()
+    return settings
+
+
+class Pipeline:
+    def __init__(self, video_path, output_dir="output"):
+        self.video_path = video_path
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(exist_ok=True)
+
+    def run(self, max_frames=10):
+        frames = extract_frames(self.video_path, max_frames)
+        if not frames:
+            raise ValueError("No frames extracted")
+        return analyze(frames)
+"""
+
+_TERMINAL = """$ pip install -r requirements.txt
+Collecting openai>=1.0.0
+  Downloading openai-1.51.0-py3-none-any.whl (383 kB)
+Collecting opencv-python>=4.8.0
+  Downloading opencv_python-4.10.0.84-cp37-abi3-manylinux.whl (62.5 MB)
+Installing collected packages: numpy, opencv-python, openai
+Successfully installed numpy-1.26.4 openai-1.51.0 opencv-python-4.10.0.84
+$ python main.py tutorial.mp4 --context "Setting up the project"
+Extracting video frames...
+Extracted 15 frames from 150.0s video
+Deduplicated frames: 15 -> 11
+Analyzing workflow with Kimi K2.5 (Vision)...
+Workflow analysis complete
+"""
+
+_DOCS = """Getting started
+
+Create a new project from the dashboard and open the settings page.
+Copy the API key shown under Credentials and paste it into the .env file
+next to OPENROUTER_API_KEY. Keys are shown once, so store them safely.
+
+Next, choose the model used for analysis. The instant model is faster and
+cheaper, while the thinking model returns its reasoning with each answer.
+Both accept images, so frames can be sent directly from the extractor.
+
+Finally, run the pipeline on a short recording to check the setup before
+processing longer tutorials or whole batches of videos.
+"""
+
+_UI_LABELS = """New project
+Name
+Template
+Cancel
+Create
+"""
+
+
+def _render_text(text: str, size, dark: bool) -> np.ndarray:
+    width, height = size
+    background, ink = ((30, 30, 30), (220, 220, 220)) if dark else ((250, 250, 250), (20, 20, 20))
+    frame = np.full((height, width, 3), background, dtype=np.uint8)
+    for row, line in enumerate(text.splitlines()):
+        cv2.putText(
+            frame, line, (24, 34 + row * 27), cv2.FONT_HERSHEY_SIMPLEX, 0.65, ink, 1, cv2.LINE_AA
+        )
+    return frame
+
+
+def _render_form(size) -> np.ndarray:
+    # A dialog: a few labels over mostly graphics.
+    width, height = size
+    frame = np.full((height, width, 3), (235, 238, 242), dtype=np.uint8)
+    cv2.rectangle(frame, (width // 4, height // 5), (3 * width // 4, 4 * height // 5), (255, 255, 255), -1)
+    labels = _UI_LABELS.splitlines()
+    x, y = width // 4 + 30, height // 5 + 50
+    cv2.putText(frame, labels[0], (x, y), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (20, 20, 20), 2, cv2.LINE_AA)
+    for i, label in enumerate(labels[1:3]):
+        top = y + 50 + i * 90
+        cv2.putText(frame, label, (x, top), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (60, 60, 60), 1, cv2.LINE_AA)
+        cv2.rectangle(frame, (x, top + 12), (3 * width // 4 - 30, top + 52), (180, 180, 180), 2)
+    bottom = 4 * height // 5 - 40
+    for i, label in enumerate(labels[3:]):
+        left = 3 * width // 4 - 260 + i * 130
+        cv2.rectangle(frame, (left, bottom - 30), (left + 110, bottom + 10), (200, 120, 40), -1)
+        cv2.putText(frame, label, (left + 14, bottom - 2), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 1, cv2.LINE_AA)
+    return frame
+
+
+def _render_scene(size) -> np.ndarray:
+    # No text: shapes over a gradient, like a diagram or camera shot.
+    width, height = size
+    rng = np.random.default_rng(0)
+    gradient = np.linspace(0, 255, width, dtype=np.uint8)
+    frame = np.dstack([np.tile(gradient, (height, 1))] * 3)
+    for _ in range(12):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        cv2.circle(frame, center, int(rng.integers(20, 120)), color, -1)
+    return frame
+
+
+def synthetic_samples(size=(1280, 720)) -> List[Dict]:
+    return [
+        {"name": "code_dark", "frame": _render_text(_CODE, size, dark=True), "truth": _CODE},
+        {"name": "code_light", "frame": _render_text(_CODE, size, dark=False), "truth": _CODE},
+        {"name": "terminal", "frame": _render_text(_TERMINAL, size, dark=True), "truth": _TERMINAL},
+        {"name": "docs_page", "frame": _render_text(_DOCS, size, dark=False), "truth": _DOCS},
+        {"name": "ui_form", "frame": _render_form(size), "truth": _UI_LABELS},
+        {"name": "scene", "frame": _render_scene(size), "truth": ""},
+    ]
+
+
+def directory_samples(directory: Path) -> List[Dict]:
+    # Real frames: <name>.jpg/.png with the expected text in <name>.txt.
+    samples = []
+    for image_path in sorted(directory.iterdir()):
+        if image_path.suffix.lower() not in (".jpg", ".jpeg", ".png"):
+            continue
+        truth_path = image_path.with_suffix(".txt")
+        frame = cv2.imread(str(image_path))
+        if frame is None or not truth_path.exists():
+            print(f"⚠️ Skipping {image_path.name}: unreadable or no {truth_path.name}")
+            continue
+        samples.append({"name": image_path.stem, "frame": frame, "truth": truth_path.read_text(encoding="utf-8")})
+    return samples
+
+
+def _normalize(text: str) -> str:
+    # Indentation and line breaks are approximate in every route; compare words.
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def character_error_rate(reference: str, hypothesis: str) -> float:
+    reference, hypothesis = _normalize(reference), _normalize(hypothesis)
+    if not reference:
+        return 0.0 if not hypothesis else 1.0
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_char in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_char in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_char != hyp_char)))
+        previous = current
+    return previous[-1] / len(reference)
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Token savings and text accuracy of sending OCR text instead of frame images."
+    )
+    parser.add_argument(
+        "--samples",
+        default="",
+        help="Directory of frames with <name>.txt ground truth. Synthetic screens are used when omitted.",
+    )
+    parser.add_argument(
+        "--compare-model",
+        action="store_true",
+        help="Also have the vision model transcribe each full frame and thumbnail (billed API calls).",
+    )
+    parser.add_argument("--json", default="", help="Optional path to write the report as JSON.")
+    return parser
+
+
+def main() -> None:
+    args = _build_arg_parser().parse_args()
+    if not tesseract_available():
+        raise SystemExit("❌ tesseract is not on PATH; install it to run this benchmark.")
+    samples = directory_samples(Path(args.samples)) if args.samples else synthetic_samples()
+    client = None
+    if args.compare_model:
+        from openrouter_client import KimiK25OpenRouterClient
+
+        client = KimiK25OpenRouterClient()
+
+    results = []
+    for sample in samples:
+        # The frame as the pipeline stores and sends it.
+        jpeg, _, _ = encode_frame(sample["frame"])
+        started = time.perf_counter()
+        ocr = ocr_image(jpeg)
+        result = {
+            "sample": sample["name"],
+            "ocr_seconds": time.perf_counter() - started,
+            "words": ocr["words"],
+            "confidence": ocr["confidence"],
+            "coverage": ocr["coverage"],
+            "text_dominated": is_text_dominated(ocr),
+            "image_tokens": ocr_frame_tokens(ocr, "text")["image"],
+            "text_tokens": ocr_frame_tokens(ocr, "text")["ocr"],
+            "thumbnail_tokens": ocr_frame_tokens(ocr, "thumbnail")["ocr"],
+            "ocr_cer": character_error_rate(sample["truth"], ocr["text"]),
+        }
+        if client:
+            full = client.transcribe_frame(jpeg)
+            thumb = client.transcribe_frame(thumbnail_jpeg(jpeg))
+            result["model_cer"] = character_error_rate(sample["truth"], full["content"] or "")
+            result["thumbnail_model_cer"] = character_error_rate(sample["truth"], thumb["content"] or "")
+            result["model_prompt_tokens"] = full["usage"]["prompt_tokens"]
+        results.append(result)
+
+    print(f"\n📊 Frame OCR ({len(results)} samples, thresholds: {Config.OCR_MIN_WORDS} words, "
+          f"{Config.OCR_MIN_CONFIDENCE:.0f} conf, {Config.OCR_MIN_TEXT_COVERAGE:.0%} coverage)")
+    header = f"   {'sample':<14}{'words':>6}{'conf':>6}{'cover':>7}{'text?':>7}{'image tok':>10}{'text tok':>9}{'+thumb':>8}{'OCR CER':>9}"
+    if client:
+        header += f"{'model CER':>10}{'thumb CER':>10}"
+    print(header)
+    for r in results:
+        line = (
+            f"   {r['sample']:<14}{r['words']:>6}{r['confidence']:>6.0f}{r['coverage']:>7.1%}"
+            f"{'yes' if r['text_dominated'] else 'no':>7}{r['image_tokens']:>10}{r['text_tokens']:>9}"
+            f"{r['thumbnail_tokens']:>8}{r['ocr_cer']:>9.1%}"
+        )
+        if client:
+            line += f"{r['model_cer']:>10.1%}{r['thumbnail_model_cer']:>10.1%}"
+        print(line)
+
+    # Only text-dominated frames switch route; the rest stay images.
+    baseline = sum(r["image_tokens"] for r in results)
+    print(f"\n   Image tokens for all frames: {baseline}")
+    for mode, key in (("text", "text_tokens"), ("thumbnail", "thumbnail_tokens")):
+        total = sum(r[key] if r["text_dominated"] else r["image_tokens"] for r in results)
+        saved = 1 - total / baseline if baseline else 0.0
+        print(f"   FRAME_OCR={mode:<10} {total:>7} tokens ({saved:.0%} fewer)")
+    switched = [r for r in results if r["text_dominated"]]
+    if switched:
+        mean_cer = sum(r["ocr_cer"] for r in switched) / len(switched)
+        print(f"   OCR CER on the {len(switched)} frames sent as text: {mean_cer:.1%}")
+        if client:
+            model_cer = sum(r["model_cer"] for r in switched) / len(switched)
+            print(f"   Vision model CER on the same frames (full image): {model_cer:.1%}")
+    print("   CER = character edit distance / reference length, whitespace collapsed; tokens are estimates")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\n   • {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict
+
+from moonshot_video import VIDEO_INPUT_MODES, preflight_video, video_completion
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    # Minimal Moonshot stand-in: drains request bodies without keeping them and
+    # answers chat completions and file uploads with canned responses.
+    received: Dict[str, int] = {}
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        remaining = length
+        while remaining:
+            chunk = self.rfile.read(min(remaining, 1024 * 1024))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+        type(self).received[self.path] = type(self).received.get(self.path, 0) + length
+
+        if self.path.endswith("/files"):
+            body = {
+                "id": "file-bench",
+                "object": "file",
+                "bytes": length,
+                "created_at": int(time.time()),
+                "filename": "video.mp4",
+                "purpose": "video",
+                "status": "processed",
+            }
+        else:
+            body = {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "kimi-k2.5",
+                "choices": [
+                    {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}
+                ],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+        self._reply(body)
+
+    def do_DELETE(self):
+        self._reply({"id": self.path.rsplit("/", 1)[-1], "object": "file", "deleted": True})
+
+    def _reply(self, body: Dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_worker(args: argparse.Namespace) -> None:
+    from openai import OpenAI
+
+    client = OpenAI(api_key="benchmark", base_url=args.base_url, max_retries=0)
+    baseline = _peak_rss_mb()
+    started = time.perf_counter()
+    video_path = Path(args.video)
+    if args.max_mb:
+        video_path = preflight_video(video_path, Path(tempfile.mkdtemp()), max_mb=args.max_mb)
+    content = video_completion(client, video_path, "Describe the video.", mode=args.worker)["content"]
+    print(
+        json.dumps(
+            {
+                "seconds": time.perf_counter() - started,
+                "baseline_mb": baseline,
+                "peak_mb": _peak_rss_mb(),
+                "sent_mb": video_path.stat().st_size / (1024 * 1024),
+                "ok": content == "ok",
+            }
+        )
+    )
+
+
+def _build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Peak memory and time of each Moonshot video input mode against a local stand-in server."
+    )
+    parser.add_argument(
+        "--video",
+        default="",
+        help="Video to send. Without it a file of random bytes is generated.",
+    )
+    parser.add_argument("--size-mb", type=int, default=200, help="Size of the generated file.")
+    parser.add_argument(
+        "--modes",
+        default="inline,stream,upload",
+        help="Comma-separated input modes to run.",
+    )
+    parser.add_argument(
+        "--max-mb",
+        type=float,
+        default=0,
+        help="Transcode videos over this size before sending (needs a real --video).",
+    )
+    parser.add_argument("--json", default="", help="Optional path to write the report as JSON.")
+    parser.add_argument("--worker", choices=VIDEO_INPUT_MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", default="", help=argparse.SUPPRESS)
+    return parser
+
+
+def main() -> None:
+    args = _build_arg_parser().parse_args()
+    if args.worker:
+        _run_worker(args)
+        return
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    for mode in modes:
+        if mode not in VIDEO_INPUT_MODES:
+            raise ValueError(f"Unknown mode '{mode}'. Choose from: {', '.join(VIDEO_INPUT_MODES)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path = Path(args.video) if args.video else Path(tmp) / "random.mp4"
+        if not args.video:
+            print(f"🎞️ Generating {args.size_mb} MB test file...")
+            with open(video_path, "wb") as file:
+                for _ in range(args.size_mb):
+                    file.write(os.urandom(1024 * 1024))
+        if not video_path.exists():
+            raise FileNotFoundError(f"Video file not found: {video_path}")
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+        results = []
+        for mode in modes:
+            print(f"\n⏱️ Sending {video_path.name} in {mode} mode...")
+            _StandInHandler.received = {}
+            command = [
+                sys.executable, __file__, "--worker", mode, "--base-url", base_url,
+                "--video", str(video_path), "--max-mb", str(args.max_mb),
+            ]
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            result["mode"] = mode
+            result["received_mb"] = sum(_StandInHandler.received.values()) / (1024 * 1024)
+            results.append(result)
+        server.shutdown()
+
+    size_mb = Path(args.video).stat().st_size / (1024 * 1024) if args.video else args.size_mb
+    print(f"\n📊 Video input modes ({size_mb:.0f} MB file)")
+    print(f"   {'mode':<8}{'wall s':>9}{'peak RSS MB':>13}{'over baseline':>15}{'request MB':>12}{'ok':>5}")
+    for r in results:
+        print(
+            f"   {r['mode']:<8}{r['seconds']:>9.2f}{r['peak_mb']:>13.0f}"
+            f"{r['peak_mb'] - r['baseline_mb']:>15.0f}{r['received_mb']:>12.0f}{'yes' if r['ok'] else 'no':>5}"
+        )
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"\n   • {args.json}")
+
+
+if __name__ == "__main__":
+    main()
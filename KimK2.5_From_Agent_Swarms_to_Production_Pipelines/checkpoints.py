@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Union
+
+from stage_graph import downstream
+
+
+def fingerprint(*parts: Any) -> str:
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def file_fingerprint(path: str) -> Dict:
+    # Size and mtime identify a video cheaply without hashing gigabytes.
+    stat = Path(path).stat()
+    return {"path": str(Path(path).resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def frames_manifest(frames: List[Dict]) -> List[Dict]:
+    # In-memory JPEG bytes are not serialisable and are not needed downstream.
+    return [{k: v for k, v in f.items() if k != "jpeg"} for f in frames]
+
+
+class CheckpointStore:
+    """
+    Per-output-directory record of finished pipeline stages.
+
+    ``checkpoints.json`` maps each stage to the fingerprint of its inputs, its
+    JSON-serialisable result and the files it wrote. With ``resume`` a stage is
+    skipped when its fingerprint matches and its files still exist. Fingerprints
+    include upstream results, so a recomputed stage invalidates everything that
+    consumed it. ``stages`` maps each stage to the stages it depends on;
+    ``from_stage`` forces that stage and everything downstream of it to
+    recompute (and implies ``resume`` for the rest).
+    Checkpoints are always written, so any run can be resumed later.
+    """
+
+    def __init__(
+        self,
+        output_dir: str,
+        stages: Dict[str, List[str]],
+        resume: bool = False,
+        from_stage: str = None,
+    ):
+        if from_stage and from_stage not in stages:
+            raise ValueError(f"Unknown stage '{from_stage}'. Choose from: {', '.join(stages)}")
+        self.path = Path(output_dir) / "checkpoints.json"
+        self.resume = resume or bool(from_stage)
+        self.forced = downstream(stages, from_stage) if from_stage else set()
+        self.resumed: List[str] = []
+        self._incomplete = set()
+        self._lock = threading.Lock()
+        self._manifest: Dict[str, Dict] = {}
+        if self.path.exists():
+            try:
+                self._manifest = json.loads(self.path.read_text(encoding="utf-8"))
+            except json.JSONDecodeError:
+                print(f"⚠️ Ignoring unreadable checkpoint file: {self.path}")
+
+    def run(
+        self,
+        stage: str,
+        stage_fingerprint: str,
+        func: Callable[[], Any],
+        outputs: Union[Iterable[str], Callable[[Any], Iterable[str]]] = (),
+        serialize: Callable[[Any], Any] = None,
+    ) -> Any:
+        entry = self._manifest.get(stage)
+        if (
+            self.resume
+            and stage not in self.forced
+            and entry
+            and entry.get("fingerprint") == stage_fingerprint
+            and all(Path(p).exists() for p in entry.get("outputs", []))
+        ):
+            print(f"⏭️ Resuming: '{stage}' inputs unchanged, reusing checkpoint")
+            with self._lock:
+                self.resumed.append(stage)
+            return entry["value"]
+
+        value = func()
+        if stage in self._incomplete:
+            return value
+        # Some stages only know which files they wrote once they have run.
+        written = outputs(value) if callable(outputs) else outputs
+        self.save(stage, stage_fingerprint, serialize(value) if serialize else value, written)
+        return value
+
+    def mark_incomplete(self, stage: str) -> None:
+        # Called from inside a stage whose output is partial, so run() does not
+        # checkpoint it and the next --resume recomputes it.
+        with self._lock:
+            self._incomplete.add(stage)
+
+    def save(self, stage: str, stage_fingerprint: str, value: Any, outputs: Iterable[str] = ()) -> None:
+        with self._lock:
+            self._manifest[stage] = {
+                "fingerprint": stage_fingerprint,
+                "value": value,
+                "outputs": [str(p) for p in outputs],
+                "completed_at": time.time(),
+            }
+            tmp_path = self.path.with_suffix(".json.tmp")
+            tmp_path.write_text(json.dumps(self._manifest, indent=2), encoding="utf-8")
+            os.replace(tmp_path, self.path)
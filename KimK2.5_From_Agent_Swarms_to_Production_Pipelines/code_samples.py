@@ -0,0 +1,263 @@
+import json
+import math
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+from config import Config
+from telemetry import usage_cost
+
+CODE_SAMPLE_MODES = ("chained", "parallel")
+
+_IDENTIFIER_PATTERNS = [
+    re.compile(r"\bid=[\"']([\w-]+)[\"']"),
+    re.compile(r"\bclass=[\"']([\w\s-]+)[\"']"),
+    re.compile(r"\bfunction\s+([A-Za-z_$][\w$]*)"),
+    re.compile(r"\b(?:const|let|var|class)\s+([A-Za-z_$][\w$]*)"),
+    re.compile(r"\bdef\s+([A-Za-z_]\w*)"),
+]
+
+
+def skeleton_prompt(workflow_steps: str, steps: List[str], output_format: str) -> str:
+    step_block = "\n".join(f"{i}. {step}" for i, step in enumerate(steps, 1))
+    return (
+        "Plan the shared project skeleton for a tutorial whose steps will each get "
+        "their own code sample.\n\n"
+        f"Workflow:\n{workflow_steps}\n\n"
+        f"Steps that need code:\n{step_block}\n\n"
+        f"Output Format: {output_format}\n\n"
+        "Requirements:\n"
+        "- List the files, element ids, CSS classes, function and variable names "
+        "every step must reuse\n"
+        "- Give signatures and one-line purposes only, no implementations\n"
+        "- Keep it under 60 lines\n\n"
+        "Return only the skeleton."
+    )
+
+
+def step_prompt_with_skeleton(step_description: str, skeleton: str, output_format: str) -> str:
+    return (
+        "Based on this tutorial step, generate complete, working code:\n\n"
+        f"Step Description: {step_description}\n\n"
+        f"Shared Project Skeleton (reuse these names exactly):\n{skeleton}\n\n"
+        f"Output Format: {output_format}\n\n"
+        "Requirements:\n"
+        "- Generate production-ready code\n"
+        "- Include comments explaining each section\n"
+        "- Ensure code is fully functional and can run standalone\n"
+        "- Use modern best practices\n"
+        "- Add proper error handling\n\n"
+        "Generate only the code with inline comments."
+    )
+
+
+def reconcile_prompt(skeleton: str, code_samples: List[Dict], output_format: str) -> str:
+    return (
+        "These code samples were written independently for consecutive steps of one "
+        "tutorial. Make them consistent with each other and with the skeleton.\n\n"
+        f"Shared Project Skeleton:\n{skeleton}\n\n"
+        f"Code Samples:\n{json.dumps(code_samples, indent=2)}\n\n"
+        f"Output Format: {output_format}\n\n"
+        "Requirements:\n"
+        "- Use the same ids, class names, function names and file names across steps\n"
+        "- Later steps must build on what earlier steps defined\n"
+        "- Change only what is needed for consistency\n\n"
+        'Return ONLY a JSON array of {"step": <number>, "code": "<code>"} objects, '
+        "one per step, without code fences."
+    )
+
+
+def apply_reconciliation(code_samples: List[Dict], content: str) -> Tuple[List[Dict], bool]:
+    # The reconciled code replaces a draft only when the step is present in a
+    # well-formed reply; anything else keeps the independently generated draft.
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", (content or "").strip(), flags=re.IGNORECASE)
+    try:
+        reconciled = json.loads(text)
+    except json.JSONDecodeError:
+        return code_samples, False
+    if not isinstance(reconciled, list):
+        return code_samples, False
+    by_step = {
+        item.get("step"): item.get("code")
+        for item in reconciled
+        if isinstance(item, dict) and isinstance(item.get("code"), str) and item["code"].strip()
+    }
+    merged = [
+        {**sample, "code": by_step.get(sample["step"], sample["code"])}
+        for sample in code_samples
+    ]
+    return merged, bool(by_step)
+
+
+# Prompt characters around the step and its context in a code-sample call.
+_STEP_PROMPT_CHARS = len(step_prompt_with_skeleton("", "", "html"))
+
+
+class CodeSampleBudget:
+    """
+    Token and cost ceiling for the code-sample stage, checked before each call.
+
+    A call is estimated from its prompt characters plus the mean completion
+    of the calls so far (``expected_output_tokens`` before the first one).
+    Steps whose calls would not fit get no code sample; 0 disables a limit.
+    """
+
+    def __init__(self, max_tokens: int = None, max_cost: float = None, expected_output_tokens: int = None):
+        self.max_tokens = Config.CODE_SAMPLE_TOKEN_BUDGET if max_tokens is None else max_tokens
+        self.max_cost = Config.CODE_SAMPLE_COST_BUDGET if max_cost is None else max_cost
+        self.expected_output_tokens = expected_output_tokens or Config.CODE_SAMPLE_EXPECTED_OUTPUT_TOKENS
+        self.tokens = 0
+        self.cost = 0.0
+        self.calls = 0
+        self._billed_calls = 0
+        self._completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def output_tokens(self) -> int:
+        if not self._billed_calls:
+            return self.expected_output_tokens
+        return round(self._completion_tokens / self._billed_calls)
+
+    def estimate(self, prompt_chars: int, output_tokens: int = None) -> Tuple[int, float]:
+        input_tokens = math.ceil(prompt_chars / Config.CHARS_PER_TOKEN)
+        output_tokens = self.output_tokens() if output_tokens is None else output_tokens
+        return input_tokens + output_tokens, usage_cost(input_tokens, output_tokens)
+
+    def step_estimate(self, step: str, context: str) -> Tuple[int, float]:
+        return self.estimate(_STEP_PROMPT_CHARS + len(step) + len(context))
+
+    def fits(self, tokens: int, cost: float) -> bool:
+        return (not self.max_tokens or self.tokens + tokens <= self.max_tokens) and (
+            not self.max_cost or self.cost + cost <= self.max_cost
+        )
+
+    def record(self, usage: Dict) -> None:
+        prompt_tokens = int(usage.get("prompt_tokens", 0) or 0)
+        completion_tokens = int(usage.get("completion_tokens", 0) or 0)
+        cached_tokens = int(usage.get("cached_tokens", 0) or 0)
+        with self._lock:
+            self.calls += 1
+            self.tokens += prompt_tokens + completion_tokens
+            self.cost += usage_cost(prompt_tokens, completion_tokens, cached_tokens)
+            # Cache hits report no usage and say nothing about reply length.
+            if completion_tokens:
+                self._billed_calls += 1
+                self._completion_tokens += completion_tokens
+
+    def affordable_steps(self, steps: List[str], context: str, reconcile: bool = False) -> int:
+        # Longest prefix of steps whose calls fit, plus the reconciliation
+        # call, which reads and rewrites every draft.
+        tokens, cost, count = 0, 0.0, 0
+        drafts = self.output_tokens()
+        for n, step in enumerate(steps, 1):
+            step_tokens, step_cost = self.step_estimate(step, context)
+            tokens, cost = tokens + step_tokens, cost + step_cost
+            extra_tokens, extra_cost = 0, 0.0
+            if reconcile and n > 1:
+                extra_tokens, extra_cost = self.estimate(int(n * drafts * Config.CHARS_PER_TOKEN), n * drafts)
+            if not self.fits(tokens + extra_tokens, cost + extra_cost):
+                break
+            count = n
+        return count
+
+    def report(self, steps: List[str], covered: int) -> Dict:
+        # Spend so far plus an estimate for the steps left without code.
+        needed_tokens, needed_cost = self.tokens, self.cost
+        for step in steps[covered:]:
+            step_tokens, step_cost = self.step_estimate(step, "")
+            needed_tokens, needed_cost = needed_tokens + step_tokens, needed_cost + step_cost
+        return {
+            "steps": len(steps),
+            "covered_steps": covered,
+            "coverage": covered / len(steps) if steps else 1.0,
+            "calls": self.calls,
+            "tokens": self.tokens,
+            "cost": self.cost,
+            "token_budget": self.max_tokens,
+            "cost_budget": self.max_cost,
+            "full_coverage_tokens": needed_tokens,
+            "full_coverage_cost": needed_cost,
+        }
+
+
+def generate_chained(
+    steps: List[str],
+    generate_step: Callable[[int, str, str], str],
+    budget: CodeSampleBudget = None,
+) -> List[Dict]:
+    # Each step sees the previous step's code, so calls run one after another.
+    code_samples = []
+    for i, step in enumerate(steps, 1):
+        prev_code = code_samples[-1]["code"] if code_samples else ""
+        if budget and not budget.fits(*budget.step_estimate(step, prev_code)):
+            print(f"⚠️ Code sample budget reached; steps {i}-{len(steps)} get no code.")
+            break
+        print(f"   📝 Generating code for step {i}/{len(steps)}...")
+        code_samples.append({"step": i, "description": step, "code": generate_step(i, step, prev_code)})
+    return code_samples
+
+
+def generate_parallel(
+    steps: List[str],
+    generate_skeleton: Callable[[], str],
+    generate_step: Callable[[int, str, str], str],
+    reconcile: Callable[[str, List[Dict]], str],
+    max_workers: int = 4,
+    max_skeleton_chars: int = 4000,
+    budget: CodeSampleBudget = None,
+) -> Tuple[List[Dict], str]:
+    """
+    Generate every step's code at once from a shared skeleton.
+
+    One call plans a compact project skeleton, each step is then generated in
+    parallel with only that skeleton as context (so prompt size stays flat as
+    steps are added), and a final call reconciles naming across the drafts.
+    ``generate_step(index, step, context)`` receives the skeleton as context.
+    With a ``budget``, only the steps it can afford (after the skeleton and
+    including the reconciliation call) are generated.
+    """
+    print("   🧱 Planning shared project skeleton...")
+    skeleton = (generate_skeleton() or "").strip()[:max_skeleton_chars]
+    if budget:
+        affordable = budget.affordable_steps(steps, skeleton, reconcile=len(steps) > 1)
+        if affordable < len(steps):
+            print(f"⚠️ Code sample budget covers {affordable}/{len(steps)} steps; the rest get no code.")
+            steps = steps[:affordable]
+    if not steps:
+        return [], skeleton
+
+    print(f"   📝 Generating code for {len(steps)} steps in parallel...")
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        codes = list(pool.map(lambda item: generate_step(item[0], item[1], skeleton), enumerate(steps, 1)))
+    code_samples = [
+        {"step": i, "description": step, "code": code}
+        for i, (step, code) in enumerate(zip(steps, codes), 1)
+    ]
+    if len(code_samples) < 2:
+        return code_samples, skeleton
+
+    print("   🔗 Reconciling code samples...")
+    code_samples, applied = apply_reconciliation(code_samples, reconcile(skeleton, code_samples))
+    if not applied:
+        print("⚠️ Reconciliation reply was not usable; keeping the parallel drafts.")
+    return code_samples, skeleton
+
+
+def identifiers(code: str) -> set:
+    names = set()
+    for pattern in _IDENTIFIER_PATTERNS:
+        for match in pattern.findall(code):
+            names.update(match.split())
+    return names
+
+
+def consistency_score(code_samples: List[Dict]) -> float:
+    # Mean Jaccard overlap of ids, classes and function/variable names between
+    # consecutive steps: higher means later steps reuse earlier names.
+    scores = []
+    for previous, current in zip(code_samples, code_samples[1:]):
+        a, b = identifiers(previous["code"]), identifiers(current["code"])
+        if a or b:
+            scores.append(len(a & b) / len(a | b))
+    return sum(scores) / len(scores) if scores else 0.0
@@ -20,7 +20,149 @@ class Config:
 
     # Video processing
     FRAME_INTERVAL_SECONDS = 10
-    MAX_FRAMES = 15
+    MAX_FRAMES = int(os.getenv("MAX_FRAMES", "15"))
+    # The vision analysis sees at most FRAME_WINDOW_SIZE frames per call. More
+    # frames are split into windows sharing FRAME_WINDOW_OVERLAP frames,
+    # analyzed FRAME_WINDOW_WORKERS at a time and merged into one step list.
+    FRAME_WINDOW_SIZE = int(os.getenv("FRAME_WINDOW_SIZE", "10"))
+    FRAME_WINDOW_OVERLAP = int(os.getenv("FRAME_WINDOW_OVERLAP", "2"))
+    FRAME_WINDOW_WORKERS = int(os.getenv("FRAME_WINDOW_WORKERS", "4"))
+    # "seek" jumps to each target timestamp, "grab" skips frames without
+    # converting them, "sequential" decodes every frame (original behaviour).
+    FRAME_SAMPLING_MODE = os.getenv("FRAME_SAMPLING_MODE", "seek")
+    # Below this gap (in frames) seeking costs more than grabbing forward.
+    SEEK_MIN_GAP_FRAMES = int(os.getenv("SEEK_MIN_GAP_FRAMES", "30"))
+    # Frame decoder: "opencv", "pyav" (needs the av package), "ffmpeg" (raw
+    # frames piped from the ffmpeg CLI), or "auto" to pick per codec/container
+    # from DECODE_BACKEND_RULES (e.g. "hevc=pyav|ffmpeg,webm=pyav"), else opencv.
+    # No rules ship, so "auto" needs DECODE_BACKEND_RULES to change anything.
+    DECODE_BACKEND = os.getenv("DECODE_BACKEND", "opencv")
+    DECODE_BACKEND_RULES = os.getenv("DECODE_BACKEND_RULES", "")
+    # Decoder threads (0 = decoder default) and hardware decoding (opencv/ffmpeg).
+    DECODE_THREADS = int(os.getenv("DECODE_THREADS", "0"))
+    DECODE_HW_ACCELERATION = os.getenv("DECODE_HW_ACCELERATION", "false").lower() in ("1", "true", "yes")
+    # Split one video's frame range across this many worker processes, each
+    # with its own decoder (1 = off, 0 = one per CPU core); only for videos of
+    # at least FRAME_SHARD_MIN_SECONDS. Batch mode keeps one process per video.
+    FRAME_EXTRACT_SHARDS = int(os.getenv("FRAME_EXTRACT_SHARDS", "1"))
+    FRAME_SHARD_MIN_SECONDS = float(os.getenv("FRAME_SHARD_MIN_SECONDS", "600"))
+    # "interval" keeps one frame every FRAME_INTERVAL_SECONDS, "scene" keeps
+    # frames at visual change points (still capped by MAX_FRAMES).
+    FRAME_SELECTION = os.getenv("FRAME_SELECTION", "interval")
+    SCENE_PROBE_SECONDS = float(os.getenv("SCENE_PROBE_SECONDS", "1.0"))
+    SCENE_CHANGE_THRESHOLD = float(os.getenv("SCENE_CHANGE_THRESHOLD", "0.03"))
+    SCENE_MIN_GAP_SECONDS = float(os.getenv("SCENE_MIN_GAP_SECONDS", "2.0"))
+    # Collapse consecutive frames whose 16x16 dHash differs by at most this many
+    # bits. Off by default: dropping frames is lossy.
+    FRAME_DEDUP = os.getenv("FRAME_DEDUP", "false").lower() in ("1", "true", "yes")
+    FRAME_DEDUP_MAX_DISTANCE = int(os.getenv("FRAME_DEDUP_MAX_DISTANCE", "1"))
+    FRAME_DEDUP_HASH_SIZE = int(os.getenv("FRAME_DEDUP_HASH_SIZE", "16"))
+    # "disk" writes frames/ JPEGs, "memory" keeps JPEG bytes in memory only,
+    # "both" keeps bytes and also writes the files.
+    FRAME_STORAGE = os.getenv("FRAME_STORAGE", "disk")
+    # Frame payload size. The defaults keep native resolution at OpenCV's
+    # imwrite quality, as frames were always saved; opt in to smaller
+    # payloads, e.g. 1568 / 85 or what benchmark_frame_encoding.py suggests.
+    FRAME_MAX_LONG_EDGE = int(os.getenv("FRAME_MAX_LONG_EDGE", "0"))
+    FRAME_JPEG_QUALITY = int(os.getenv("FRAME_JPEG_QUALITY", "95"))
+    FRAME_TEXT_LEGIBLE = os.getenv("FRAME_TEXT_LEGIBLE", "false").lower() in ("1", "true", "yes")
+    FRAME_TEXT_LEGIBLE_MIN_LONG_EDGE = int(os.getenv("FRAME_TEXT_LEGIBLE_MIN_LONG_EDGE", "1920"))
+    FRAME_TEXT_LEGIBLE_MIN_QUALITY = int(os.getenv("FRAME_TEXT_LEGIBLE_MIN_QUALITY", "90"))
+    # Pixels per image token side used for cost estimates.
+    IMAGE_TOKEN_TILE = int(os.getenv("IMAGE_TOKEN_TILE", "28"))
+    # Local OCR of extracted frames (needs the tesseract CLI). Text-dominated
+    # frames go to the vision analysis as their OCR text plus a low-res
+    # thumbnail ("thumbnail") or as text only ("text"); other frames keep the
+    # full image. "off" sends every frame as an image.
+    FRAME_OCR = os.getenv("FRAME_OCR", "off")
+    OCR_LANG = os.getenv("OCR_LANG", "eng")
+    OCR_PSM = int(os.getenv("OCR_PSM", "3"))
+    OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(os.cpu_count() or 2)))
+    # A frame is text-dominated with at least this many words, this mean word
+    # confidence (0-100) and this share of the frame covered by word boxes.
+    OCR_MIN_WORDS = int(os.getenv("OCR_MIN_WORDS", "30"))
+    OCR_MIN_CONFIDENCE = float(os.getenv("OCR_MIN_CONFIDENCE", "80"))
+    OCR_MIN_TEXT_COVERAGE = float(os.getenv("OCR_MIN_TEXT_COVERAGE", "0.08"))
+    OCR_THUMBNAIL_LONG_EDGE = int(os.getenv("OCR_THUMBNAIL_LONG_EDGE", "448"))
+
+    # Batch mode (main.py --video-dir / --manifest)
+    BATCH_EXTRACT_WORKERS = int(os.getenv("BATCH_EXTRACT_WORKERS", str(os.cpu_count() or 2)))
+    BATCH_API_WORKERS = int(os.getenv("BATCH_API_WORKERS", "4"))
+
+    # Independent pipeline stages run concurrently on this many threads.
+    PIPELINE_MAX_WORKERS = int(os.getenv("PIPELINE_MAX_WORKERS", "4"))
+
+    # API concurrency (AsyncKimiK25OpenRouterClient)
+    MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))
+    REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "600"))
+
+    # Retries for 429 / 5xx / connection errors (exponential backoff with full
+    # jitter, or the server's Retry-After) and for empty completions.
+    MAX_RETRIES = int(os.getenv("MAX_RETRIES", "4"))
+    RETRY_BASE_DELAY_SECONDS = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "1.0"))
+    RETRY_MAX_DELAY_SECONDS = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "60"))
+    EMPTY_RETRY_BUDGET = int(os.getenv("EMPTY_RETRY_BUDGET", "3"))
+    # Client-side token buckets per model; 0 disables a limit. RATE_LIMITS_JSON
+    # overrides per model, e.g. {"moonshotai/kimi-k2.5": {"rpm": 60, "tpm": 200000}}.
+    RATE_LIMIT_RPM = float(os.getenv("RATE_LIMIT_RPM", "0"))
+    RATE_LIMIT_TPM = float(os.getenv("RATE_LIMIT_TPM", "0"))
+    RATE_LIMITS_JSON = os.getenv("RATE_LIMITS_JSON", "")
+    RATE_LIMIT_IMAGE_TOKENS = int(os.getenv("RATE_LIMIT_IMAGE_TOKENS", "1000"))
+
+    # On-disk response cache keyed by model, messages and sampling parameters.
+    RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    RESPONSE_CACHE_DIR = os.getenv("RESPONSE_CACHE_DIR", ".cache/responses")
+    RESPONSE_CACHE_MAX_MB = float(os.getenv("RESPONSE_CACHE_MAX_MB", "500"))
+    RESPONSE_CACHE_TTL_HOURS = float(os.getenv("RESPONSE_CACHE_TTL_HOURS", "168"))
+
+    # "chained" feeds each step the previous step's code (serial); "parallel"
+    # generates all steps from a shared skeleton, then reconciles them once.
+    CODE_SAMPLE_MODE = os.getenv("CODE_SAMPLE_MODE", "chained")
+    CODE_SAMPLE_WORKERS = int(os.getenv("CODE_SAMPLE_WORKERS", "5"))
+    CODE_SKELETON_MAX_CHARS = int(os.getenv("CODE_SKELETON_MAX_CHARS", "4000"))
+    # Steps that get a code sample (0 = every step in the workflow analysis),
+    # and the estimated token / USD budget for the whole code-sample stage
+    # (0 = unlimited). Calls are checked before they are sent; steps past the
+    # budget get no code. Replies are estimated at
+    # CODE_SAMPLE_EXPECTED_OUTPUT_TOKENS until real ones have been seen.
+    CODE_SAMPLE_MAX_STEPS = int(os.getenv("CODE_SAMPLE_MAX_STEPS", "0"))
+    CODE_SAMPLE_TOKEN_BUDGET = int(os.getenv("CODE_SAMPLE_TOKEN_BUDGET", "0"))
+    CODE_SAMPLE_COST_BUDGET = float(os.getenv("CODE_SAMPLE_COST_BUDGET", "0"))
+    CODE_SAMPLE_EXPECTED_OUTPUT_TOKENS = int(os.getenv("CODE_SAMPLE_EXPECTED_OUTPUT_TOKENS", "1500"))
+
+    # Shared context (workflow analysis, code samples) resent to later stages:
+    # "off" sends it verbatim, "lossless" strips whitespace and JSON indentation,
+    # "budget" also sends the workflow as a step list when it alone is over
+    # PROMPT_CONTEXT_TOKEN_BUDGET estimated tokens (opt-in; lossy). Chosen
+    # once per run so every stage shares the same cacheable prefix.
+    PROMPT_COMPACTION = os.getenv("PROMPT_COMPACTION", "lossless")
+    PROMPT_CONTEXT_TOKEN_BUDGET = int(os.getenv("PROMPT_CONTEXT_TOKEN_BUDGET", "8000"))
+    CHARS_PER_TOKEN = float(os.getenv("CHARS_PER_TOKEN", "4.0"))
+
+    # Mark the shared context prefix with cache_control so providers that
+    # support prompt caching reuse it across the summary, Q&A and docs calls.
+    PROMPT_CACHE_HINTS = os.getenv("PROMPT_CACHE_HINTS", "true").lower() in ("1", "true", "yes")
+
+    # Stream the documentation stage into interactive_tutorial_raw.txt as it is generated.
+    DOC_STREAMING = os.getenv("DOC_STREAMING", "true").lower() in ("1", "true", "yes")
+
+    # Moonshot video input: "stream" base64-encodes the file chunk by chunk into
+    # a streamed request body, "upload" sends it through the Files API and
+    # references it by id, "inline" builds the whole data URL in memory.
+    MOONSHOT_VIDEO_INPUT = os.getenv("MOONSHOT_VIDEO_INPUT", "stream")
+    MOONSHOT_VIDEO_UPLOAD_PURPOSE = os.getenv("MOONSHOT_VIDEO_UPLOAD_PURPOSE", "video")
+    MOONSHOT_VIDEO_URL_TEMPLATE = os.getenv("MOONSHOT_VIDEO_URL_TEMPLATE", "ms://{file_id}")
+    VIDEO_BASE64_CHUNK_BYTES = int(os.getenv("VIDEO_BASE64_CHUNK_BYTES", str(3 * 1024 * 1024)))
+    # Opt-in: videos larger than this are transcoded to a lower resolution and
+    # frame rate first. 0 (default) always sends the original file.
+    MOONSHOT_VIDEO_MAX_MB = float(os.getenv("MOONSHOT_VIDEO_MAX_MB", "0"))
+    VIDEO_PREFLIGHT_MAX_HEIGHT = int(os.getenv("VIDEO_PREFLIGHT_MAX_HEIGHT", "720"))
+    VIDEO_PREFLIGHT_FPS = float(os.getenv("VIDEO_PREFLIGHT_FPS", "10"))
+    # Split long Moonshot videos into overlapping segments analyzed concurrently
+    # and merged into one workflow (0 sends the whole video in one request).
+    VIDEO_SEGMENT_SECONDS = float(os.getenv("VIDEO_SEGMENT_SECONDS", "0"))
+    VIDEO_SEGMENT_OVERLAP_SECONDS = float(os.getenv("VIDEO_SEGMENT_OVERLAP_SECONDS", "10"))
+    VIDEO_SEGMENT_WORKERS = int(os.getenv("VIDEO_SEGMENT_WORKERS", "4"))
 
     # Model parameters
     ANALYSIS_TEMPERATURE = 0.3
@@ -34,6 +176,25 @@ class Config:
     # Cost estimation (USD per 1M tokens). Update if pricing changes.
     COST_PER_M_INPUT = float(os.getenv("COST_PER_M_INPUT", "0.60"))
     COST_PER_M_OUTPUT = float(os.getenv("COST_PER_M_OUTPUT", "0.60"))
+    # Prompt tokens served from the provider's prefix cache.
+    COST_PER_M_CACHED_INPUT = float(os.getenv("COST_PER_M_CACHED_INPUT", "0.15"))
+    # Spend ceilings in USD (0 = none), checked before each API call
+    # against its worst case (estimated prompt + max_tokens): per video, per
+    # run (a batch, or COST_RUN_ID shared by several processes) and over the
+    # last 24 hours for everything recorded in COST_LEDGER_PATH. A call that
+    # would breach one gets a lower max_tokens, or is refused below
+    # COST_MIN_MAX_TOKENS.
+    COST_LIMIT_PER_VIDEO = float(os.getenv("COST_LIMIT_PER_VIDEO", "0"))
+    COST_LIMIT_PER_BATCH = float(os.getenv("COST_LIMIT_PER_BATCH", "0"))
+    COST_LIMIT_DAILY = float(os.getenv("COST_LIMIT_DAILY", "0"))
+    COST_LEDGER_PATH = os.getenv("COST_LEDGER_PATH", ".cache/cost_ledger.sqlite3")
+    COST_RUN_ID = os.getenv("COST_RUN_ID", "")
+    COST_MIN_MAX_TOKENS = int(os.getenv("COST_MIN_MAX_TOKENS", "1024"))
+    # Prompt tokens a Moonshot video is predicted to cost: per second of
+    # video, or per MB when the container reports no duration. Estimates;
+    # the ledger settles to the billed usage either way.
+    COST_VIDEO_TOKENS_PER_SECOND = float(os.getenv("COST_VIDEO_TOKENS_PER_SECOND", "300"))
+    COST_VIDEO_TOKENS_PER_MB = float(os.getenv("COST_VIDEO_TOKENS_PER_MB", "2500"))
 
     # Provider routing (optional)
     ENABLE_PROVIDER_ROUTING = bool(PREFERRED_PROVIDER)
@@ -0,0 +1,252 @@
+import base64
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+from config import Config
+from frame_encoding import estimate_image_tokens
+from prompt_budget import estimate_tokens
+from telemetry import usage_cost
+
+# Reservations of calls that never settled (e.g. a killed process) stop
+# counting against the ceilings after this long.
+_RESERVATION_TTL_SECONDS = 3600
+_DAY_SECONDS = 24 * 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    run TEXT NOT NULL,
+    video TEXT NOT NULL,
+    model TEXT NOT NULL,
+    status TEXT NOT NULL,
+    predicted_cost REAL NOT NULL,
+    cost REAL NOT NULL DEFAULT 0,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS calls_created_at ON calls (created_at);
+CREATE INDEX IF NOT EXISTS calls_run ON calls (run, video);
+"""
+
+
+class CostLimitExceeded(RuntimeError):
+    pass
+
+
+def default_run_id() -> str:
+    # One run per process unless COST_RUN_ID ties several processes together.
+    return Config.COST_RUN_ID or f"{socket.gethostname()}-{os.getpid()}-{int(time.time())}"
+
+
+def cost_limits_configured() -> bool:
+    return bool(Config.COST_LIMIT_PER_VIDEO or Config.COST_LIMIT_PER_BATCH or Config.COST_LIMIT_DAILY)
+
+
+def _jpeg_size(data: bytes) -> Optional[Tuple[int, int]]:
+    # Width and height from the first start-of-frame marker.
+    i = 2
+    while i + 9 <= len(data) and data[i] == 0xFF:
+        marker = data[i + 1]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            return int.from_bytes(data[i + 7 : i + 9], "big"), int.from_bytes(data[i + 5 : i + 7], "big")
+        i += 2 + int.from_bytes(data[i + 2 : i + 4], "big")
+    return None
+
+
+def _image_tokens(url: str) -> int:
+    # Only the header is decoded; unknown images count as a full-size 16:9 frame.
+    size = None
+    if url.startswith("data:image/jpeg;base64,"):
+        encoded = url.split(",", 1)[1][:65536]
+        size = _jpeg_size(base64.b64decode(encoded[: len(encoded) // 4 * 4]))
+    if not size:
+        long_edge = Config.FRAME_MAX_LONG_EDGE or 1920
+        size = (long_edge, long_edge * 9 // 16)
+    return estimate_image_tokens(*size)
+
+
+def estimate_video_tokens(duration_seconds: float, size_bytes: int) -> int:
+    # Video requests carry a data URL, a streamed body or a file id, none of
+    # which says how long the video is, so the caller passes its length.
+    if duration_seconds > 0:
+        return int(duration_seconds * Config.COST_VIDEO_TOKENS_PER_SECOND)
+    return int(size_bytes / (1024 * 1024) * Config.COST_VIDEO_TOKENS_PER_MB)
+
+
+def predict_prompt_tokens(request: Dict) -> int:
+    tokens = 0
+    for message in request.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            tokens += estimate_tokens(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                tokens += estimate_tokens(part["text"])
+            elif part.get("type") == "image_url":
+                tokens += _image_tokens(part["image_url"]["url"])
+    return tokens
+
+
+class CostGovernor:
+    """
+    Spend ceilings enforced before each call, backed by a SQLite ledger.
+
+    A call's worst case is its estimated prompt tokens plus ``max_tokens`` at
+    the COST_PER_M_* prices. It is reserved in the ledger if it fits under
+    every ceiling (this video in this run, this run, all calls in the last 24
+    hours); otherwise ``max_tokens`` is lowered to what fits, or the call is
+    refused with ``CostLimitExceeded`` when that would be below
+    COST_MIN_MAX_TOKENS. Reservations are settled to the billed usage once
+    the reply arrives. The ledger file can be shared by any number of
+    processes; check-and-reserve is one write transaction.
+    """
+
+    def __init__(
+        self,
+        video: str = "",
+        run_id: str = None,
+        per_video: float = None,
+        per_batch: float = None,
+        daily: float = None,
+        ledger_path: str = None,
+    ):
+        self.video = video
+        self.run_id = run_id or default_run_id()
+        self.per_video = Config.COST_LIMIT_PER_VIDEO if per_video is None else per_video
+        self.per_batch = Config.COST_LIMIT_PER_BATCH if per_batch is None else per_batch
+        self.daily = Config.COST_LIMIT_DAILY if daily is None else daily
+        self.ledger_path = Path(ledger_path or Config.COST_LEDGER_PATH)
+        self.ledger_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stats = {"admitted": 0, "downgraded": 0, "refused": 0, "predicted_cost": 0.0, "cost": 0.0}
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Autocommit connection; admit() opens its own write transaction.
+        db = sqlite3.connect(self.ledger_path, timeout=30, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def predict(self, request: Dict, media_tokens: int = 0) -> Dict:
+        # ``media_tokens`` covers media the request refers to but does not
+        # carry as text or images, e.g. a video from ``estimate_video_tokens``.
+        prompt_tokens = predict_prompt_tokens(request) + media_tokens
+        max_tokens = int(request.get("max_tokens") or 0)
+        return {"prompt_tokens": prompt_tokens, "max_tokens": max_tokens, "cost": usage_cost(prompt_tokens, max_tokens)}
+
+    def _spent(self, db: sqlite3.Connection, now: float) -> Dict:
+        # Billed cost plus the predicted cost of calls still in flight.
+        row = db.execute(
+            """
+            SELECT
+                COALESCE(SUM(CASE WHEN run = ? AND video = ? THEN amount END), 0),
+                COALESCE(SUM(CASE WHEN run = ? THEN amount END), 0),
+                COALESCE(SUM(CASE WHEN created_at >= ? THEN amount END), 0)
+            FROM (
+                SELECT run, video, created_at,
+                       CASE status WHEN 'billed' THEN cost ELSE predicted_cost END AS amount
+                FROM calls
+                WHERE (created_at >= ? OR run = ?)
+                  AND (status = 'billed' OR (status = 'reserved' AND created_at >= ?))
+            )
+            """,
+            (
+                self.run_id, self.video, self.run_id, now - _DAY_SECONDS,
+                now - _DAY_SECONDS, self.run_id, now - _RESERVATION_TTL_SECONDS,
+            ),
+        ).fetchone()
+        return {"video": row[0], "batch": row[1], "daily": row[2]}
+
+    def _headroom(self, spent: Dict) -> Tuple[float, str]:
+        # Smallest remaining allowance and the ceiling it comes from.
+        limits = {"video": self.per_video, "batch": self.per_batch, "daily": self.daily}
+        remaining = [(limit - spent[scope], scope) for scope, limit in limits.items() if limit]
+        return min(remaining) if remaining else (float("inf"), "")
+
+    def admit(self, request: Dict, media_tokens: int = 0) -> Tuple[Dict, int]:
+        """Return the request to send (possibly with a lower ``max_tokens``) and its reservation id."""
+        prediction = self.predict(request, media_tokens)
+        now = time.time()
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                headroom, scope = self._headroom(self._spent(db, now))
+                status, downgraded = "reserved", False
+                if prediction["cost"] > headroom:
+                    # Lower max_tokens to what the remaining allowance pays for.
+                    output_price = usage_cost(0, 1_000_000) / 1_000_000
+                    affordable = (
+                        (headroom - usage_cost(prediction["prompt_tokens"], 0)) / output_price if output_price else -1
+                    )
+                    if affordable >= min(Config.COST_MIN_MAX_TOKENS, prediction["max_tokens"] or 1):
+                        request = {**request, "max_tokens": int(affordable)}
+                        prediction, downgraded = self.predict(request, media_tokens), True
+                    else:
+                        status = "refused"
+                cursor = db.execute(
+                    "INSERT INTO calls (created_at, run, video, model, status, predicted_cost) VALUES (?, ?, ?, ?, ?, ?)",
+                    (now, self.run_id, self.video, request.get("model", ""), status, prediction["cost"]),
+                )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+
+        with self._lock:
+            if status == "refused":
+                self._stats["refused"] += 1
+            else:
+                self._stats["admitted"] += 1
+                self._stats["downgraded"] += int(downgraded)
+                self._stats["predicted_cost"] += prediction["cost"]
+        if status == "refused":
+            raise CostLimitExceeded(
+                f"Call refused: ~${prediction['cost']:.4f} predicted, ${max(headroom, 0):.4f} left "
+                f"under the {scope} cost limit."
+            )
+        return request, cursor.lastrowid
+
+    def settle(self, reservation: int, usage: Optional[Dict]) -> None:
+        # ``usage`` is None when the call failed without a reply. A reply with
+        # no reported usage (e.g. a dropped stream) is billed at its prediction.
+        prompt_tokens = int((usage or {}).get("prompt_tokens", 0) or 0)
+        completion_tokens = int((usage or {}).get("completion_tokens", 0) or 0)
+        cached_tokens = int((usage or {}).get("cached_tokens", 0) or 0)
+        with self._connect() as db:
+            if usage is None:
+                db.execute("UPDATE calls SET status = 'failed' WHERE id = ?", (reservation,))
+            elif prompt_tokens or completion_tokens:
+                db.execute(
+                    "UPDATE calls SET status = 'billed', cost = ?, prompt_tokens = ?, completion_tokens = ? WHERE id = ?",
+                    (usage_cost(prompt_tokens, completion_tokens, cached_tokens), prompt_tokens, completion_tokens, reservation),
+                )
+            else:
+                db.execute("UPDATE calls SET status = 'billed', cost = predicted_cost WHERE id = ?", (reservation,))
+            cost = db.execute("SELECT cost FROM calls WHERE id = ?", (reservation,)).fetchone()[0]
+        with self._lock:
+            self._stats["cost"] += cost
+
+    def summary(self) -> Dict:
+        with self._connect() as db:
+            spent = self._spent(db, time.time())
+        with self._lock:
+            stats = dict(self._stats)
+        return {
+            **stats,
+            "run": self.run_id,
+            "spent": spent,
+            "limits": {"video": self.per_video, "batch": self.per_batch, "daily": self.daily},
+        }
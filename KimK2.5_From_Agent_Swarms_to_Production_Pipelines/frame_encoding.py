@@ -0,0 +1,76 @@
+import math
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+
+from config import Config
+
+
+def resize_long_edge(frame: np.ndarray, max_long_edge: int) -> np.ndarray:
+    height, width = frame.shape[:2]
+    long_edge = max(height, width)
+    if not max_long_edge or long_edge <= max_long_edge:
+        return frame
+    scale = max_long_edge / long_edge
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+
+
+def encode_frame(
+    frame: np.ndarray,
+    max_long_edge: int = None,
+    quality: int = None,
+    text_legible: bool = None,
+) -> Tuple[bytes, int, int]:
+    """JPEG-encode a BGR frame after downscaling; returns (bytes, width, height).
+
+    Text-legible mode never shrinks below FRAME_TEXT_LEGIBLE_MIN_LONG_EDGE, applies
+    a light unsharp mask to restore glyph edges lost to INTER_AREA, keeps a quality
+    floor and disables chroma subsampling so coloured syntax highlighting stays
+    crisp. It trades some bytes for readable UI text.
+    """
+    max_long_edge = Config.FRAME_MAX_LONG_EDGE if max_long_edge is None else max_long_edge
+    quality = quality or Config.FRAME_JPEG_QUALITY
+    text_legible = Config.FRAME_TEXT_LEGIBLE if text_legible is None else text_legible
+
+    params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+    if text_legible:
+        if max_long_edge:
+            max_long_edge = max(max_long_edge, Config.FRAME_TEXT_LEGIBLE_MIN_LONG_EDGE)
+        resized = resize_long_edge(frame, max_long_edge)
+        if resized is not frame:
+            blurred = cv2.GaussianBlur(resized, (0, 0), 1.0)
+            resized = cv2.addWeighted(resized, 1.5, blurred, -0.5, 0)
+        params = [
+            cv2.IMWRITE_JPEG_QUALITY,
+            max(int(quality), Config.FRAME_TEXT_LEGIBLE_MIN_QUALITY),
+            cv2.IMWRITE_JPEG_SAMPLING_FACTOR,
+            cv2.IMWRITE_JPEG_SAMPLING_FACTOR_444,
+        ]
+    else:
+        resized = resize_long_edge(frame, max_long_edge)
+
+    ok, encoded = cv2.imencode(".jpg", resized, params)
+    if not ok:
+        raise ValueError("Could not JPEG-encode frame")
+    height, width = resized.shape[:2]
+    return encoded.tobytes(), width, height
+
+
+def estimate_image_tokens(width: int, height: int) -> int:
+    # Kimi K2.5's vision encoder uses 14px patches merged 2x2, i.e. one token per
+    # 28x28 tile. Other providers differ; adjust IMAGE_TOKEN_TILE to match.
+    tile = Config.IMAGE_TOKEN_TILE
+    return math.ceil(width / tile) * math.ceil(height / tile)
+
+
+def payload_stats(jpeg_bytes: int, width: int, height: int) -> Dict:
+    return {
+        "width": width,
+        "height": height,
+        "jpeg_bytes": jpeg_bytes,
+        # Base64 inflates by 4/3, rounded up to a 4-byte boundary.
+        "base64_bytes": 4 * math.ceil(jpeg_bytes / 3),
+        "image_tokens": estimate_image_tokens(width, height),
+    }
@@ -0,0 +1,178 @@
+import os
+import shutil
+import statistics
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from config import Config
+from frame_encoding import encode_frame, estimate_image_tokens
+
+FRAME_OCR_MODES = ("off", "thumbnail", "text")
+
+
+def tesseract_available() -> bool:
+    return shutil.which("tesseract") is not None
+
+
+def _image_bytes(image: Union[str, bytes]) -> bytes:
+    # In-memory frames are JPEG bytes; anything else is a file path.
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return bytes(image)
+    with open(image, "rb") as image_file:
+        return image_file.read()
+
+
+def _tsv_words(tsv: str):
+    # Returns (page width, page height, words); words are level-5 TSV rows.
+    page_width = page_height = 0
+    words = []
+    rows = tsv.splitlines()
+    for row in rows[1:]:
+        cols = row.split("\t")
+        if len(cols) < 12:
+            continue
+        level = int(cols[0])
+        if level == 1:
+            page_width, page_height = int(cols[8]), int(cols[9])
+        elif level == 5 and cols[11].strip() and float(cols[10]) >= 0:
+            words.append(
+                {
+                    "line": (int(cols[2]), int(cols[3]), int(cols[4])),
+                    "left": int(cols[6]),
+                    "width": int(cols[8]),
+                    "height": int(cols[9]),
+                    "conf": float(cols[10]),
+                    "text": cols[11],
+                }
+            )
+    return page_width, page_height, words
+
+
+def _layout_text(words: List[Dict]) -> str:
+    # Rebuild lines with indentation estimated from each line's left edge, so
+    # code keeps its structure; blocks are separated by a blank line.
+    if not words:
+        return ""
+    char_width = statistics.median(w["width"] / len(w["text"]) for w in words) or 1
+    lines: Dict[Tuple[int, int, int], List[Dict]] = {}
+    for word in words:
+        lines.setdefault(word["line"], []).append(word)
+    block_left: Dict[int, int] = {}
+    for (block, _, _), line_words in lines.items():
+        left = line_words[0]["left"]
+        block_left[block] = min(block_left.get(block, left), left)
+
+    out, previous_block = [], None
+    for key, line_words in lines.items():
+        if previous_block is not None and key[0] != previous_block:
+            out.append("")
+        previous_block = key[0]
+        indent = round((line_words[0]["left"] - block_left[key[0]]) / char_width)
+        out.append(" " * indent + " ".join(w["text"] for w in line_words))
+    return "\n".join(out)
+
+
+def ocr_image(image: Union[str, bytes], lang: str = None, psm: int = None) -> Dict:
+    """
+    OCR one frame with the ``tesseract`` CLI.
+
+    Returns the text plus what ``is_text_dominated`` needs: word count, mean
+    word confidence (0-100) and the share of the frame covered by word boxes.
+    """
+    command = [
+        "tesseract", "stdin", "stdout",
+        "-l", lang or Config.OCR_LANG,
+        "--psm", str(psm or Config.OCR_PSM),
+        "tsv",
+    ]
+    # One thread per tesseract process; parallelism comes from the pool.
+    env = {**os.environ, "OMP_THREAD_LIMIT": "1"}
+    tsv = subprocess.run(
+        command, input=_image_bytes(image), capture_output=True, check=True, env=env
+    ).stdout.decode("utf-8", "replace")
+    page_width, page_height, words = _tsv_words(tsv)
+    page_area = page_width * page_height
+    return {
+        "text": _layout_text(words),
+        "words": len(words),
+        "confidence": round(statistics.fmean(w["conf"] for w in words), 1) if words else 0.0,
+        "coverage": round(sum(w["width"] * w["height"] for w in words) / page_area, 4) if page_area else 0.0,
+        "width": page_width,
+        "height": page_height,
+    }
+
+
+def is_text_dominated(ocr: Optional[Dict]) -> bool:
+    # Enough confidently read words covering enough of the screen that the
+    # text carries the frame (editors, terminals, docs pages).
+    return bool(
+        ocr
+        and ocr["words"] >= Config.OCR_MIN_WORDS
+        and ocr["confidence"] >= Config.OCR_MIN_CONFIDENCE
+        and ocr["coverage"] >= Config.OCR_MIN_TEXT_COVERAGE
+    )
+
+
+def attach_ocr(frames: List[Dict], workers: int = None) -> List[Dict]:
+    """OCR every frame in a process pool and store the result as ``frame["ocr"]``."""
+    if not frames:
+        return frames
+    if not tesseract_available():
+        print("⚠️ FRAME_OCR needs the tesseract CLI on PATH; sending frames as images.")
+        return frames
+
+    workers = max(1, min(workers or Config.OCR_WORKERS, len(frames)))
+    images = [f.get("jpeg") or f["path"] for f in frames]
+    started = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(ocr_image, images))
+    else:
+        results = [ocr_image(image) for image in images]
+    for frame, ocr in zip(frames, results):
+        frame["ocr"] = ocr
+
+    text_frames = [f for f in frames if is_text_dominated(f["ocr"])]
+    print(
+        f"🔤 OCR: {len(text_frames)}/{len(frames)} frames are text-dominated "
+        f"({time.perf_counter() - started:.1f}s, {workers} workers)"
+    )
+    return frames
+
+
+def thumbnail_jpeg(image: Union[str, bytes], long_edge: int = None) -> bytes:
+    frame = cv2.imdecode(np.frombuffer(_image_bytes(image), dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        raise ValueError("Could not decode frame for thumbnail")
+    jpeg, _, _ = encode_frame(
+        frame,
+        max_long_edge=long_edge or Config.OCR_THUMBNAIL_LONG_EDGE,
+        text_legible=False,
+    )
+    return jpeg
+
+
+def thumbnail_size(width: int, height: int, long_edge: int = None) -> Tuple[int, int]:
+    long_edge = long_edge or Config.OCR_THUMBNAIL_LONG_EDGE
+    scale = min(1.0, long_edge / max(width, height, 1))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def ocr_frame_tokens(ocr: Dict, mode: str = None) -> Dict:
+    """
+    Estimated prompt tokens for one OCR'd frame sent as an image vs as OCR text.
+
+    ``image`` assumes the frame goes at its stored resolution; ``ocr`` is the
+    text (CHARS_PER_TOKEN) plus the thumbnail in "thumbnail" mode.
+    """
+    mode = mode or Config.FRAME_OCR
+    image_tokens = estimate_image_tokens(ocr["width"], ocr["height"])
+    ocr_tokens = int(len(ocr["text"]) / Config.CHARS_PER_TOKEN) + 1
+    if mode == "thumbnail":
+        ocr_tokens += estimate_image_tokens(*thumbnail_size(ocr["width"], ocr["height"]))
+    return {"image": image_tokens, "ocr": ocr_tokens}
@@ -0,0 +1,124 @@
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+
+THUMBNAIL_SIZE = (64, 36)
+HISTOGRAM_BINS = 32
+
+
+def make_thumbnail(frame: np.ndarray, size: tuple = THUMBNAIL_SIZE) -> np.ndarray:
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+def scene_change_scores(thumbnails: np.ndarray, bins: int = HISTOGRAM_BINS) -> np.ndarray:
+    """Score each thumbnail against its predecessor; index 0 always scores 1.0.
+
+    The score is the larger of the normalised grey-level histogram distance and the
+    mean absolute pixel difference, both in [0, 1]. The histogram term catches
+    global changes (slides, theme switches) and the pixel term catches layout
+    changes that keep the same palette, which is typical for UI recordings.
+    """
+    count = len(thumbnails)
+    if count == 0:
+        return np.zeros(0, dtype=np.float32)
+
+    stack = np.asarray(thumbnails, dtype=np.uint8).reshape(count, -1)
+    pixels = stack.shape[1]
+
+    binned = (stack.astype(np.int64) * bins) >> 8
+    offsets = (np.arange(count, dtype=np.int64) * bins)[:, None]
+    histograms = np.bincount((binned + offsets).ravel(), minlength=count * bins)
+    histograms = histograms.reshape(count, bins)
+
+    hist_distance = np.abs(np.diff(histograms, axis=0)).sum(axis=1) / (2.0 * pixels)
+    pixel_distance = np.abs(np.diff(stack.astype(np.int16), axis=0)).mean(axis=1) / 255.0
+
+    scores = np.empty(count, dtype=np.float32)
+    scores[0] = 1.0
+    scores[1:] = np.maximum(hist_distance, pixel_distance)
+    return scores
+
+
+def select_change_points(
+    scores: np.ndarray,
+    budget: int,
+    threshold: float,
+    min_gap: int = 1,
+) -> List[int]:
+    """Pick up to ``budget`` indices at visual change points, in time order.
+
+    The first index is always kept so the starting state is covered. Remaining
+    slots go to the strongest changes above ``threshold`` that are at least
+    ``min_gap`` positions away from an already selected index.
+    """
+    if budget <= 0 or len(scores) == 0:
+        return []
+
+    selected = [0]
+    candidates = np.flatnonzero(scores[1:] >= threshold) + 1
+    for idx in candidates[np.argsort(-scores[candidates], kind="stable")]:
+        if len(selected) >= budget:
+            break
+        if all(abs(int(idx) - s) >= min_gap for s in selected):
+            selected.append(int(idx))
+
+    return sorted(selected)
+
+
+def dhash(gray: np.ndarray, hash_size: int = 16) -> np.ndarray:
+    """Difference hash as a flat boolean array of ``hash_size ** 2`` bits."""
+    small = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    small = small.astype(np.int16)
+    return (small[:, 1:] > small[:, :-1]).ravel()
+
+
+def load_frame_gray(frame: Dict) -> np.ndarray:
+    if frame.get("jpeg"):
+        buffer = np.frombuffer(frame["jpeg"], dtype=np.uint8)
+        image = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+        source = f"in-memory frame {frame.get('index')}"
+    else:
+        image = cv2.imread(frame["path"], cv2.IMREAD_GRAYSCALE)
+        source = frame["path"]
+    if image is None:
+        raise ValueError(f"Could not read frame image: {source}")
+    return image
+
+
+def dedupe_frames(
+    frames: List[Dict],
+    max_distance: int,
+    hash_size: int = 16,
+) -> List[Dict]:
+    """Collapse runs of consecutive near-duplicate frames.
+
+    Each frame is compared with the frame that currently represents its run, so a
+    slow drift cannot chain unrelated screens together. The surviving frame keeps
+    its own ``index`` and gains ``span_start``/``span_end`` covering every frame it
+    replaced, plus ``duplicates`` with the number of frames merged into it.
+    """
+    if not frames:
+        return []
+
+    hashes = np.stack([dhash(load_frame_gray(f), hash_size) for f in frames])
+
+    kept = []
+    representative = None
+    for frame, frame_hash in zip(frames, hashes):
+        if representative is not None:
+            distance = int(np.count_nonzero(frame_hash != representative))
+            if distance <= max_distance:
+                kept[-1]["span_end"] = frame.get("span_end", frame["timestamp"])
+                kept[-1]["duplicates"] += 1 + frame.get("duplicates", 0)
+                continue
+        survivor = dict(frame)
+        survivor["span_start"] = frame.get("span_start", frame["timestamp"])
+        survivor["span_end"] = frame.get("span_end", frame["timestamp"])
+        survivor["duplicates"] = frame.get("duplicates", 0)
+        kept.append(survivor)
+        representative = frame_hash
+
+    return kept
@@ -0,0 +1,128 @@
+import json
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+from config import Config
+from video_segments import format_timestamp, numbered_steps, stitch_segments
+
+
+def plan_windows(frames: List[Dict], window_size: int, overlap: int) -> List[Dict]:
+    # Fewest windows of ``window_size`` frames that share at least
+    # ``overlap`` frames with their neighbour, spread evenly from the first
+    # frame to the last; no window holds more than window_size frames.
+    if len(frames) <= window_size:
+        starts = [0]
+    else:
+        overlap = min(overlap, window_size // 2)
+        count = math.ceil((len(frames) - overlap) / (window_size - overlap))
+        starts = [round(i * (len(frames) - window_size) / (count - 1)) for i in range(count)]
+    windows = []
+    for i, start in enumerate(starts):
+        window_frames = frames[start : start + window_size]
+        windows.append(
+            {
+                "index": i + 1,
+                "frames": window_frames,
+                "start": window_frames[0].get("span_start", window_frames[0]["timestamp"]),
+                "end": window_frames[-1].get("span_end", window_frames[-1]["timestamp"]),
+            }
+        )
+    return windows
+
+
+def window_context(context: str, window: Dict, total: int) -> str:
+    times = ", ".join(format_timestamp(f["timestamp"]) for f in window["frames"])
+    return (
+        f"{context}\n\n"
+        f"These frames are window {window['index']} of {total} of a longer video and cover "
+        f"{format_timestamp(window['start'])}-{format_timestamp(window['end'])}. "
+        f"Frame times, in order: {times}.\n"
+        "- Return numbered steps for these frames only\n"
+        "- Start each step with the [MM:SS] time of the frame it is seen in\n"
+    )
+
+
+def _overlap_seconds(windows: List[Dict]) -> float:
+    overlaps = [max(0.0, prev["end"] - cur["start"]) for prev, cur in zip(windows, windows[1:])]
+    return sum(overlaps) / len(overlaps) if overlaps else 0.0
+
+
+def analyze_windowed(
+    frames: List[Dict],
+    context: str,
+    analyze: Callable[[List[Dict], str], Dict],
+    merge: Callable[[List[Dict], float], Dict],
+    output_dir: Path,
+    window_size: int = None,
+    overlap: int = None,
+    max_workers: int = None,
+) -> Tuple[str, List[Dict]]:
+    """
+    Map-reduce analysis of more frames than one vision call takes.
+
+    Overlapping frame windows are analyzed concurrently with
+    ``analyze(frames, context)``, then ``merge(windows, overlap_seconds)``
+    combines their step lists in one text-only call; if that reply has no
+    numbered steps, windows are stitched at their overlap midpoints instead.
+    Per-window analyses go to ``output_dir/windows/``.
+    """
+    window_size = window_size or Config.FRAME_WINDOW_SIZE
+    overlap = Config.FRAME_WINDOW_OVERLAP if overlap is None else overlap
+    max_workers = max_workers or Config.FRAME_WINDOW_WORKERS
+    windows = plan_windows(frames, window_size, overlap)
+    windows_dir = Path(output_dir) / "windows"
+    windows_dir.mkdir(parents=True, exist_ok=True)
+    print(
+        f"🪟 {len(frames)} frames -> {len(windows)} windows of up to {window_size} "
+        f"(at least {overlap} shared, {max_workers} concurrent)"
+    )
+
+    def analyze_window(window: Dict) -> Dict:
+        started = time.perf_counter()
+        result = analyze(window["frames"], window_context(context, window, len(windows)))
+        analysis = result["content"] or ""
+        (windows_dir / f"window_{window['index']:02d}.txt").write_text(analysis, encoding="utf-8")
+        seconds = time.perf_counter() - started
+        print(f"   🖼️ Window {window['index']}/{len(windows)} analyzed in {seconds:.1f}s")
+        return {**window, "seconds": seconds, "analysis": analysis}
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        results = list(pool.map(analyze_window, windows))
+    map_seconds = time.perf_counter() - started
+
+    if len(results) == 1:
+        merged, merge_method = results[0]["analysis"], "single"
+    else:
+        print("🔗 Merging window workflows...")
+        merged = merge(results, _overlap_seconds(results))["content"] or ""
+        merge_method = "model"
+        if not numbered_steps(merged):
+            print("⚠️ Merge reply had no numbered steps; stitching windows at overlap midpoints.")
+            merged, merge_method = stitch_segments(results), "stitch"
+
+    report = {
+        "frames": len(frames),
+        "window_size": window_size,
+        "overlap": overlap,
+        "workers": max_workers,
+        "map_seconds": map_seconds,
+        "merge": merge_method,
+        "steps": len(numbered_steps(merged)),
+        "windows": [
+            {
+                "index": r["index"],
+                "start": r["start"],
+                "end": r["end"],
+                "frames": [f["index"] for f in r["frames"]],
+                "seconds": r["seconds"],
+                "steps": len(numbered_steps(r["analysis"])),
+            }
+            for r in results
+        ],
+    }
+    (windows_dir / "windows.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return merged, results
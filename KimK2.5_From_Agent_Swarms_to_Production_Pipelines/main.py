@@ -1,203 +1,334 @@
 import argparse
 import json
-import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List
-from video_processor import VideoFrameExtractor
-from openrouter_client import KimiK25OpenRouterClient
+from typing import Dict, List, Tuple
 from config import Config
+from cost_governor import default_run_id
+from telemetry import print_summary, summarize
+from code_samples import CODE_SAMPLE_MODES
+from checkpoints import CheckpointStore
+from pipeline import PIPELINE_STAGE_DEPS, PIPELINE_STAGES, DocsPipeline, FrameAnalysis
+
+
+VIDEO_EXTENSIONS = {".mp4", ".mov", ".mkv", ".webm", ".avi", ".m4v"}
+
+
+class VideoToDocsConverter(DocsPipeline):
+    # The frame-based pipeline: frames extracted locally, analyzed via OpenRouter.
+    def __init__(
+        self,
+        video_path: str,
+        context: str = "",
+        frame_storage: str = None,
+        output_dir: str = "output",
+        frames_dir: str = "frames",
+        use_cache: bool = None,
+        resume: bool = False,
+        from_stage: str = None,
+        code_sample_mode: str = None,
+        cost_run: str = None,
+    ):
+        super().__init__(
+            FrameAnalysis(video_path, frames_dir=frames_dir, frame_storage=frame_storage),
+            context=context,
+            output_dir=output_dir,
+            use_cache=use_cache,
+            resume=resume,
+            from_stage=from_stage,
+            code_sample_mode=code_sample_mode,
+            cost_run=cost_run,
+        )
+        self.video_path = video_path
 
 
-class VideoToDocsConverter:
-    def __init__(self, video_path: str, context: str = ""):
-        self.video_path = video_path
-        self.context = context
-        self.kimi = KimiK25OpenRouterClient()
-        self.output_dir = Path("output")
-        self.output_dir.mkdir(exist_ok=True)
-        self.cost_tracker = {"input_tokens": 0, "output_tokens": 0, "estimated_cost": 0.0}
-
-    def process(self) -> Dict:
-        print("=" * 60)
-        print("🚀 Video to Interactive Documentation Converter")
-        print("   Powered by Kimi K2.5 via OpenRouter")
-        print("=" * 60)
-
-        print("\n📹 Step 1: Extracting video frames...")
-        extractor = VideoFrameExtractor(self.video_path)
-        frames = extractor.extract_key_frames()
-
-        if not frames:
-            raise ValueError("No frames extracted from video")
-
-        print("\n🔍 Step 2: Analyzing workflow with Kimi K2.5 (Vision)...")
-        analysis_result = self.kimi.analyze_frame_sequence(
-            frames,
-            self.context,
-            max_frames=10,
-        )
-        workflow_analysis = analysis_result["content"]
-        self._track_usage(analysis_result["usage"])
-
-        analysis_path = self.output_dir / "workflow_analysis.txt"
-        with open(analysis_path, "w", encoding="utf-8") as file:
-            file.write(f"Context: {self.context}\n\n")
-            file.write(workflow_analysis or "")
-            if "reasoning" in analysis_result:
-                file.write(f"\n\n--- Reasoning ---\n{analysis_result['reasoning']}")
-
-        print("✅ Workflow analysis complete")
-        print(f"   Tokens used: {analysis_result['usage']['total_tokens']}")
-
-        print("\n💻 Step 3: Generating code samples...")
-        steps = self._parse_steps(workflow_analysis or "")
-        code_samples = []
-
-        for i, step in enumerate(steps[:5], 1):
-            print(f"   📝 Generating code for step {i}/{min(len(steps), 5)}...")
-            prev_code = code_samples[-1]["code"] if code_samples else ""
-
-            code_result = self.kimi.generate_code_from_description(
-                step,
-                previous_code=prev_code,
-                output_format="html",
-            )
-            code_samples.append(
+def load_batch_jobs(video_dir: str = "", manifest: str = "", context: str = "") -> List[Dict]:
+    entries = []
+    if manifest:
+        manifest_path = Path(manifest)
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"Manifest not found: {manifest_path}")
+        for item in json.loads(manifest_path.read_text(encoding="utf-8")):
+            if isinstance(item, str):
+                item = {"video": item}
+            # Relative paths in a manifest are resolved against the manifest itself.
+            video = Path(item["video"])
+            if not video.is_absolute():
+                video = manifest_path.parent / video
+            entries.append(
                 {
-                    "step": i,
-                    "description": step,
-                    "code": self._extract_code(code_result["content"] or ""),
+                    "video": str(video),
+                    "context": item.get("context", context),
+                    "name": item.get("name", video.stem),
                 }
             )
-            self._track_usage(code_result["usage"])
-
-        print("✅ Code generation complete")
-
-        code_path = self.output_dir / "code_samples.json"
-        with open(code_path, "w", encoding="utf-8") as file:
-            json.dump(code_samples, file, indent=2)
-
-        print("\n🧭 Step 3b: Creating timestamped summary...")
-        summary_result = self.kimi.generate_timestamped_summary(
-            frames,
-            workflow_analysis or "",
-            context=self.context,
-        )
-        self._track_usage(summary_result["usage"])
-        summary_path = self.output_dir / "summary_with_timestamps.txt"
-        with open(summary_path, "w", encoding="utf-8") as file:
-            file.write(summary_result["content"] or "")
-        print("✅ Timestamped summary created")
-
-        print("\n📚 Step 4: Creating interactive documentation...")
-        doc_result = self.kimi.create_interactive_documentation(
-            workflow_analysis or "",
-            json.dumps(code_samples, indent=2),
-        )
-        self._track_usage(doc_result["usage"])
-
-        doc_path = self.output_dir / "interactive_tutorial.html"
-        raw_doc_path = self.output_dir / "interactive_tutorial_raw.txt"
-        raw_content = doc_result["content"] or ""
-        if raw_content.strip():
-            html_content = self._extract_html(raw_content)
-        else:
-            html_content = (
-                "<!doctype html>\n"
-                "<html><body><pre>"
-                "Documentation generation returned an empty response. "
-                "See output/interactive_tutorial_raw.txt for details."
-                "</pre></body></html>"
-            )
-        with open(doc_path, "w", encoding="utf-8") as file:
-            file.write(html_content)
-        with open(raw_doc_path, "w", encoding="utf-8") as file:
-            file.write(raw_content)
-
-        if raw_content.strip():
-            print("✅ Documentation created")
-        else:
-            print("⚠️ Documentation response was empty; wrote a placeholder HTML.")
-
-        print("\n" + "=" * 60)
-        print("🎉 Conversion Complete!")
-        print("=" * 60)
-        print("\n📊 Token Usage Summary:")
-        print(f"   Input tokens:  {self.cost_tracker['input_tokens']:,}")
-        print(f"   Output tokens: {self.cost_tracker['output_tokens']:,}")
-        print(
-            f"   Total tokens:  {self.cost_tracker['input_tokens'] + self.cost_tracker['output_tokens']:,}"
-        )
-        print(f"   Est. cost:     ${self.cost_tracker['estimated_cost']:.4f}")
-        print("\n📁 Output files:")
-        print(f"   • {analysis_path}")
-        print(f"   • {code_path}")
-        print(f"   • {summary_path}")
-        print(f"   • {doc_path}")
-
-        return {
-            "frames": frames,
-            "workflow": workflow_analysis,
-            "code_samples": code_samples,
-            "summary_path": str(summary_path),
-            "documentation_path": str(doc_path),
-            "cost_tracker": self.cost_tracker,
+    else:
+        directory = Path(video_dir)
+        if not directory.is_dir():
+            raise FileNotFoundError(f"Video directory not found: {directory}")
+        for video in sorted(directory.iterdir()):
+            if video.suffix.lower() in VIDEO_EXTENSIONS:
+                entries.append({"video": str(video), "context": context, "name": video.stem})
+
+    if not entries:
+        raise ValueError("Batch contains no videos.")
+
+    seen = {}
+    for entry in entries:
+        if not Path(entry["video"]).exists():
+            raise FileNotFoundError(f"Video file not found: {entry['video']}")
+        # Keep output directories distinct when two videos share a stem.
+        count = seen.get(entry["name"], 0)
+        seen[entry["name"]] = count + 1
+        if count:
+            entry["name"] = f"{entry['name']}_{count + 1}"
+    return entries
+
+
+def _timed_extract(
+    video_path: str,
+    output_dir: str,
+    frame_storage: str,
+    resume: bool = False,
+    from_stage: str = None,
+) -> Tuple[List[Dict], float]:
+    started = time.perf_counter()
+    # Videos are already extracted in parallel, so no nested shard or OCR pools.
+    backend = FrameAnalysis(
+        video_path,
+        frames_dir=str(Path(output_dir) / "frames"),
+        frame_storage=frame_storage,
+        shards=1,
+        ocr_workers=1,
+    )
+    # Same frames checkpoint as a single-video run, so --resume skips extraction.
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    checkpoints = CheckpointStore(output_dir, PIPELINE_STAGE_DEPS, resume=resume, from_stage=from_stage)
+    frames = backend.extract(checkpoints)
+    return frames, time.perf_counter() - started
+
+
+def _run_batch_job(
+    job: Dict,
+    frames: List[Dict],
+    output_dir: Path,
+    questions: List[str],
+    qa_auto: bool,
+    frame_storage: str,
+    use_cache: bool,
+    resume: bool = False,
+    from_stage: str = None,
+    code_sample_mode: str = None,
+    cost_run: str = None,
+) -> Dict:
+    started = time.perf_counter()
+    converter = VideoToDocsConverter(
+        job["video"],
+        context=job["context"],
+        frame_storage=frame_storage,
+        output_dir=str(output_dir),
+        frames_dir=str(output_dir / "frames"),
+        use_cache=use_cache,
+        resume=resume,
+        from_stage=from_stage,
+        code_sample_mode=code_sample_mode,
+        cost_run=cost_run,
+    )
+    converter.process(frames=frames, questions=questions, qa_auto=qa_auto)
+    cache_stats = converter.cache_stats()
+    return {
+        "api_seconds": time.perf_counter() - started,
+        "frames": len(frames),
+        **converter.cost_tracker,
+        "cache_hits": cache_stats.get("hits", 0),
+        "cache_misses": cache_stats.get("misses", 0),
+        "retries": converter.retry_stats(),
+        "cost_governor": converter.governor_stats(),
+        "telemetry_records": converter.telemetry.records,
+    }
+
+
+def run_batch(
+    jobs: List[Dict],
+    output_root: str = "output",
+    questions: List[str] = None,
+    qa_auto: bool = False,
+    frame_storage: str = None,
+    extract_workers: int = None,
+    api_workers: int = None,
+    use_cache: bool = None,
+    resume: bool = False,
+    from_stage: str = None,
+    code_sample_mode: str = None,
+) -> Dict:
+    output_root = Path(output_root)
+    output_root.mkdir(parents=True, exist_ok=True)
+    questions = questions or []
+    batch_started = time.perf_counter()
+    # Every video in this batch shares one run in the cost ledger.
+    cost_run = default_run_id()
+
+    entries = {
+        job["name"]: {
+            "name": job["name"],
+            "video": job["video"],
+            "output_dir": str(output_root / job["name"]),
+            "status": "pending",
         }
-
-    def _parse_steps(self, workflow_text: str) -> List[str]:
-        steps = []
-        lines = [line.strip() for line in workflow_text.splitlines() if line.strip()]
-
-        numbered_pattern = re.compile(r"^(?:step\s*)?(\d+)[\).\:\-]\s+(.*)$", re.IGNORECASE)
-        for line in lines:
-            match = numbered_pattern.match(line)
-            if match:
-                steps.append(match.group(2).strip())
-
-        if steps:
-            return steps
-
-        paragraphs = [p.strip() for p in workflow_text.split("\n\n") if p.strip()]
-        if paragraphs:
-            return paragraphs
-
-        return lines
-
-    def _extract_code(self, content: str) -> str:
-        fenced = re.findall(r"```(?:\w+)?\n(.*?)```", content, re.DOTALL)
-        if fenced:
-            return fenced[0].strip()
-        return content.strip()
-
-    def _extract_html(self, content: str) -> str:
-        text = content.strip()
-        if not text:
-            return "<!doctype html>\n<html><body><pre></pre></body></html>"
-        fenced = re.findall(r"```(?:html)?\n(.*?)```", text, re.DOTALL | re.IGNORECASE)
-        if fenced:
-            return fenced[0].strip()
-        if text.startswith("```html") or text.startswith("```"):
-            text = re.sub(r"^```(?:html)?\n?", "", text, flags=re.IGNORECASE).strip()
-        text = re.sub(r"\n?```$", "", text).strip()
-        if "<html" in text.lower():
-            return text
-        return f"<!doctype html>\n<html><body><pre>{text}</pre></body></html>"
-
-    def _track_usage(self, usage: Dict) -> None:
-        prompt_tokens = int(usage.get("prompt_tokens", 0) or 0)
-        completion_tokens = int(usage.get("completion_tokens", 0) or 0)
-        self.cost_tracker["input_tokens"] += prompt_tokens
-        self.cost_tracker["output_tokens"] += completion_tokens
-        self.cost_tracker["estimated_cost"] += (
-            (prompt_tokens / 1_000_000) * Config.COST_PER_M_INPUT
-            + (completion_tokens / 1_000_000) * Config.COST_PER_M_OUTPUT
-        )
+        for job in jobs
+    }
+
+    print(f"📦 Batch: {len(jobs)} videos, {extract_workers} extract workers, {api_workers} API workers")
+
+    # Frame extraction is CPU-bound and runs in processes; the API stages are
+    # network-bound and run in a bounded thread pool as soon as frames are ready.
+    with ProcessPoolExecutor(max_workers=extract_workers) as extract_pool, ThreadPoolExecutor(
+        max_workers=api_workers
+    ) as api_pool:
+        extract_futures = {
+            extract_pool.submit(
+                _timed_extract,
+                job["video"],
+                str(output_root / job["name"]),
+                frame_storage,
+                resume,
+                from_stage,
+            ): job
+            for job in jobs
+        }
+        api_futures = {}
+        telemetry_records = []
+        for future in as_completed(extract_futures):
+            job = extract_futures[future]
+            entry = entries[job["name"]]
+            try:
+                frames, entry["extract_seconds"] = future.result()
+            except Exception as exc:
+                entry.update(status="failed", error=f"extract: {exc}")
+                print(f"❌ [{job['name']}] frame extraction failed: {exc}")
+                continue
+            api_futures[
+                api_pool.submit(
+                    _run_batch_job,
+                    job,
+                    frames,
+                    output_root / job["name"],
+                    questions,
+                    qa_auto,
+                    frame_storage,
+                    use_cache,
+                    resume,
+                    from_stage,
+                    code_sample_mode,
+                    cost_run,
+                )
+            ] = job
+
+        for future in as_completed(api_futures):
+            job = api_futures[future]
+            entry = entries[job["name"]]
+            try:
+                result = future.result()
+                telemetry_records.extend(result.pop("telemetry_records"))
+                entry.update(result)
+                entry["status"] = "ok"
+            except Exception as exc:
+                entry.update(status="failed", error=f"api: {exc}")
+                print(f"❌ [{job['name']}] API stages failed: {exc}")
+
+    report = _build_batch_report(list(entries.values()), time.perf_counter() - batch_started)
+    report["telemetry"] = summarize(telemetry_records)
+    report_path = output_root / "batch_report.json"
+    report_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    _print_batch_report(report)
+    print(f"   • {report_path}")
+    return report
+
+
+def _build_batch_report(entries: List[Dict], wall_seconds: float) -> Dict:
+    done = [e for e in entries if e["status"] == "ok"]
+    latencies = sorted(e.get("extract_seconds", 0) + e["api_seconds"] for e in done)
+    return {
+        "videos": len(entries),
+        "succeeded": len(done),
+        "failed": len(entries) - len(done),
+        "wall_seconds": wall_seconds,
+        "input_tokens": sum(e["input_tokens"] for e in done),
+        "output_tokens": sum(e["output_tokens"] for e in done),
+        "cached_tokens": sum(e["cached_tokens"] for e in done),
+        "estimated_cost": sum(e["estimated_cost"] for e in done),
+        "cache_hits": sum(e["cache_hits"] for e in done),
+        "cache_misses": sum(e["cache_misses"] for e in done),
+        "retries": sum(e["retries"]["retries"] for e in done),
+        "retry_wait_seconds": sum(
+            e["retries"]["backoff_seconds"] + e["retries"]["throttle_seconds"] for e in done
+        ),
+        "mean_video_seconds": sum(latencies) / len(latencies) if latencies else 0.0,
+        "max_video_seconds": latencies[-1] if latencies else 0.0,
+        "entries": entries,
+    }
+
+
+def _print_batch_report(report: Dict) -> None:
+    print("\n" + "=" * 60)
+    print("📦 Batch Complete")
+    print("=" * 60)
+    print(f"   Videos:        {report['succeeded']}/{report['videos']} succeeded")
+    print(f"   Wall time:     {report['wall_seconds']:.1f}s")
+    print(f"   Per video:     mean {report['mean_video_seconds']:.1f}s, max {report['max_video_seconds']:.1f}s")
+    print(f"   Input tokens:  {report['input_tokens']:,}")
+    print(f"   Output tokens: {report['output_tokens']:,}")
+    print(f"   Cached input:  {report['cached_tokens']:,}")
+    print(f"   Est. cost:     ${report['estimated_cost']:.4f}")
+    print(f"   Cache:         {report['cache_hits']} hits / {report['cache_misses']} misses")
+    print(f"   Retries:       {report['retries']} (waited {report['retry_wait_seconds']:.1f}s)")
+    if report.get("telemetry"):
+        print("\n📈 Call telemetry across the batch (slowest p95 first):")
+        print_summary(report["telemetry"])
+    for entry in report["entries"]:
+        if entry["status"] != "ok":
+            print(f"   ❌ {entry['name']}: {entry.get('error', entry['status'])}")
 
 
 def _build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Convert tutorial videos into interactive docs.")
-    parser.add_argument("--video", required=True, help="Path to the tutorial video file.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--video", help="Path to the tutorial video file.")
+    source.add_argument(
+        "--video-dir",
+        help="Batch mode: process every video file in this directory.",
+    )
+    source.add_argument(
+        "--manifest",
+        help=(
+            "Batch mode: JSON list of videos, each a path or "
+            '{"video": path, "context": "...", "name": "..."}.'
+        ),
+    )
     parser.add_argument("--context", default="", help="Optional context about the tutorial.")
+    parser.add_argument(
+        "--output-dir",
+        default="output",
+        help="Output directory. In batch mode each video gets a subdirectory.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk response cache (RESPONSE_CACHE_DIR) for this run.",
+    )
+    parser.add_argument(
+        "--extract-workers",
+        type=int,
+        default=Config.BATCH_EXTRACT_WORKERS,
+        help="Batch mode: processes used for frame extraction.",
+    )
+    parser.add_argument(
+        "--api-workers",
+        type=int,
+        default=Config.BATCH_API_WORKERS,
+        help="Batch mode: videos whose API stages run concurrently.",
+    )
     parser.add_argument(
         "--qa-file",
         default="",
@@ -208,85 +339,88 @@ def _build_arg_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Auto-generate questions from the workflow analysis and answer them.",
     )
+    parser.add_argument(
+        "--frame-storage",
+        choices=["disk", "memory", "both"],
+        default=None,
+        help="Keep extracted JPEG frames on disk (frames/), in memory only, or both.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse checkpointed stages from a previous run whose inputs are unchanged.",
+    )
+    parser.add_argument(
+        "--from-stage",
+        choices=PIPELINE_STAGES,
+        default=None,
+        help="Recompute this stage and every stage downstream of it; the rest resume. Implies --resume.",
+    )
+    parser.add_argument(
+        "--code-samples",
+        choices=CODE_SAMPLE_MODES,
+        default=None,
+        help=(
+            "chained: each step builds on the previous step's code (serial). "
+            "parallel: all steps from a shared skeleton, then one reconciliation pass."
+        ),
+    )
     return parser
 
 
+def _load_questions(args: argparse.Namespace) -> List[str]:
+    if not args.qa_file:
+        return []
+    qa_path = Path(args.qa_file)
+    if not qa_path.exists():
+        raise FileNotFoundError(f"QA file not found: {qa_path}")
+    questions = [
+        line.strip()
+        for line in qa_path.read_text(encoding="utf-8").splitlines()
+        if line.strip()
+    ]
+    if not questions:
+        raise ValueError("QA file is empty.")
+    return questions
+
+
 def main() -> None:
     parser = _build_arg_parser()
     args = parser.parse_args()
+    questions = _load_questions(args)
+
+    if args.video_dir or args.manifest:
+        jobs = load_batch_jobs(args.video_dir, args.manifest, args.context)
+        run_batch(
+            jobs,
+            output_root=args.output_dir,
+            questions=questions,
+            qa_auto=args.qa_auto,
+            frame_storage=args.frame_storage,
+            extract_workers=args.extract_workers,
+            api_workers=args.api_workers,
+            use_cache=False if args.no_cache else None,
+            resume=args.resume,
+            from_stage=args.from_stage,
+            code_sample_mode=args.code_samples,
+        )
+        return
 
     video_path = Path(args.video)
     if not video_path.exists():
         raise FileNotFoundError(f"Video file not found: {video_path}")
 
-    converter = VideoToDocsConverter(str(video_path), context=args.context)
-    result = converter.process()
-
-    questions = []
-    if args.qa_file:
-        qa_path = Path(args.qa_file)
-        if not qa_path.exists():
-            raise FileNotFoundError(f"QA file not found: {qa_path}")
-        questions = [
-            line.strip()
-            for line in qa_path.read_text(encoding="utf-8").splitlines()
-            if line.strip()
-        ]
-        if not questions:
-            raise ValueError("QA file is empty.")
-    elif args.qa_auto:
-        print("\n❓ Step 5: Auto-generating questions...")
-        gen_result = converter.kimi.generate_questions_from_workflow(
-            result["frames"],
-            result["workflow"] or "",
-            context=args.context,
-        )
-        converter._track_usage(gen_result["usage"])
-        questions = [
-            line.strip()
-            for line in (gen_result["content"] or "").splitlines()
-            if line.strip()
-        ]
-        gen_out_path = Path("output") / "qa_questions.txt"
-        gen_out_path.write_text("\n".join(questions), encoding="utf-8")
-        print("✅ Questions generated")
-        print(f"   • {gen_out_path}")
-
-    if questions:
-        print("\n❓ Step 6: Answering workflow questions...")
-        qa_result = converter.kimi.answer_workflow_questions(
-            result["frames"],
-            result["workflow"] or "",
-            json.dumps(result["code_samples"], indent=2),
-            questions,
-            context=args.context,
-        )
-        converter._track_usage(qa_result["usage"])
-        qa_out_path = Path("output") / "qa_answers.txt"
-        qa_raw_path = Path("output") / "qa_answers_raw.txt"
-        qa_raw_path.write_text(qa_result["content"] or "", encoding="utf-8")
-        if qa_result["content"]:
-            qa_out_path.write_text(qa_result["content"], encoding="utf-8")
-            print("✅ Q&A answers created")
-            print(f"   • {qa_out_path}")
-        else:
-            print("⚠️ Q&A response was empty; retrying once with shorter context...")
-            qa_retry = converter.kimi.answer_workflow_questions(
-                result["frames"],
-                result["workflow"] or "",
-                "",
-                questions,
-                context=args.context,
-            )
-            converter._track_usage(qa_retry["usage"])
-            qa_raw_path.write_text(qa_retry["content"] or "", encoding="utf-8")
-            qa_out_path.write_text(qa_retry["content"] or "", encoding="utf-8")
-            if qa_retry["content"]:
-                print("✅ Q&A answers created (retry)")
-                print(f"   • {qa_out_path}")
-            else:
-                print("❌ Q&A response still empty; see qa_answers_raw.txt")
-        print(f"   • {qa_raw_path}")
+    converter = VideoToDocsConverter(
+        str(video_path),
+        context=args.context,
+        frame_storage=args.frame_storage,
+        output_dir=args.output_dir,
+        use_cache=False if args.no_cache else None,
+        resume=args.resume,
+        from_stage=args.from_stage,
+        code_sample_mode=args.code_samples,
+    )
+    converter.process(questions=questions, qa_auto=args.qa_auto)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,277 @@
+import base64
+import json
+import math
+import os
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Dict, Iterator
+
+import cv2
+import httpx
+from openai import OpenAI
+
+from config import Config
+from cost_governor import estimate_video_tokens
+
+VIDEO_INPUT_MODES = ("inline", "stream", "upload")
+
+MOONSHOT_MODEL = "kimi-k2.5"
+
+_VIDEO_URL_PLACEHOLDER = "__KIMI_VIDEO_DATA_URL__"
+
+
+def moonshot_client() -> OpenAI:
+    api_key = os.environ.get("MOONSHOT_API_KEY")
+    if not api_key:
+        raise ValueError("MOONSHOT_API_KEY is not set in the environment.")
+    return OpenAI(api_key=api_key, base_url="https://api.moonshot.ai/v1")
+
+
+def _usage_dict(usage) -> Dict:
+    # SDK objects and raw JSON dicts alike.
+    if usage is None:
+        return {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cached_tokens": 0}
+    if not isinstance(usage, dict):
+        usage = usage.model_dump()
+    return {
+        "prompt_tokens": usage.get("prompt_tokens", 0) or 0,
+        "completion_tokens": usage.get("completion_tokens", 0) or 0,
+        "total_tokens": usage.get("total_tokens", 0) or 0,
+        "cached_tokens": usage.get("cached_tokens", 0) or 0,
+    }
+
+
+def _result(content: str, usage, model: str, started_at: float, started: float, uploaded: int) -> Dict:
+    # Same shape as the OpenRouter client results, so callers can track usage
+    # and telemetry the same way.
+    return {
+        "content": content or "",
+        "usage": _usage_dict(usage),
+        "model": model,
+        "call": {
+            "model": model,
+            "started_at": started_at,
+            "latency_seconds": time.perf_counter() - started,
+            "bytes_uploaded": uploaded,
+        },
+    }
+
+
+def video_duration(video_path: Path) -> float:
+    cap = cv2.VideoCapture(str(video_path))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frames = cap.get(cv2.CAP_PROP_FRAME_COUNT)
+    cap.release()
+    return frames / fps if fps > 0 else 0.0
+
+
+def video_prompt_tokens(video_path: Path) -> int:
+    # Predicted prompt tokens of the video itself, for the cost governor.
+    video_path = Path(video_path)
+    return estimate_video_tokens(video_duration(video_path), video_path.stat().st_size)
+
+
+def video_mime(video_path: Path) -> str:
+    return f"video/{video_path.suffix.lstrip('.') or 'mp4'}"
+
+
+def base64_length(size: int) -> int:
+    return 4 * math.ceil(size / 3)
+
+
+def iter_base64(video_path: Path, chunk_bytes: int = None) -> Iterator[bytes]:
+    # Chunks are a multiple of 3 bytes, so each encodes without padding and the
+    # concatenation equals base64 of the whole file.
+    chunk_bytes = chunk_bytes or Config.VIDEO_BASE64_CHUNK_BYTES
+    chunk_bytes -= chunk_bytes % 3
+    with open(video_path, "rb") as file:
+        while True:
+            chunk = file.read(chunk_bytes)
+            if not chunk:
+                return
+            yield base64.b64encode(chunk)
+
+
+def video_data_url(video_path: Path) -> str:
+    # Inline mode: the whole data URL in memory (the original behaviour).
+    encoded = b"".join(iter_base64(video_path)).decode("ascii")
+    return f"data:{video_mime(video_path)};base64,{encoded}"
+
+
+def video_messages(video_url: str, prompt: str):
+    return [
+        {"role": "system", "content": "You are Kimi."},
+        {
+            "role": "user",
+            "content": [
+                {"type": "video_url", "video_url": {"url": video_url}},
+                {"type": "text", "text": prompt},
+            ],
+        },
+    ]
+
+
+def _streamed_completion(client: OpenAI, video_path: Path, prompt: str, params: dict) -> Dict:
+    # Serialise the request around a placeholder, then send the JSON prefix,
+    # the base64 video in chunks and the suffix as one streamed body. Peak
+    # memory is one chunk instead of the file plus its base64 copy.
+    body = json.dumps({"messages": video_messages(_VIDEO_URL_PLACEHOLDER, prompt), **params})
+    prefix, suffix = (part.encode("utf-8") for part in body.split(_VIDEO_URL_PLACEHOLDER))
+    prefix += f"data:{video_mime(video_path)};base64,".encode("ascii")
+    content_length = len(prefix) + base64_length(video_path.stat().st_size) + len(suffix)
+
+    def body_chunks() -> Iterator[bytes]:
+        yield prefix
+        yield from iter_base64(video_path)
+        yield suffix
+
+    with httpx.Client(timeout=httpx.Timeout(Config.REQUEST_TIMEOUT_SECONDS, connect=10.0)) as http:
+        response = http.post(
+            str(client.base_url).rstrip("/") + "/chat/completions",
+            content=body_chunks(),
+            headers={
+                "Authorization": f"Bearer {client.api_key}",
+                "Content-Type": "application/json",
+                "Content-Length": str(content_length),
+            },
+        )
+    response.raise_for_status()
+    data = response.json()
+    return {"content": data["choices"][0]["message"]["content"], "usage": data.get("usage"), "bytes": content_length}
+
+
+def _uploaded_completion(client: OpenAI, video_path: Path, prompt: str, params: dict) -> Dict:
+    # The file handle is streamed as multipart, then referenced by id.
+    with open(video_path, "rb") as file:
+        uploaded = client.files.create(file=file, purpose=Config.MOONSHOT_VIDEO_UPLOAD_PURPOSE)
+    try:
+        video_url = Config.MOONSHOT_VIDEO_URL_TEMPLATE.format(file_id=uploaded.id)
+        completion = client.chat.completions.create(messages=video_messages(video_url, prompt), **params)
+        return {
+            "content": completion.choices[0].message.content,
+            "usage": completion.usage,
+            "bytes": video_path.stat().st_size,
+        }
+    finally:
+        client.files.delete(uploaded.id)
+
+
+def video_completion(
+    client: OpenAI,
+    video_path: Path,
+    prompt: str,
+    mode: str = None,
+    **params,
+) -> Dict:
+    """
+    Ask Kimi about a video.
+
+    ``inline`` embeds a base64 data URL built in memory, ``stream`` sends the
+    same request body but encodes and streams the video chunk by chunk, and
+    ``upload`` sends the file through the Files API and references its id.
+    ``params`` are the remaining chat completion fields (model, temperature...).
+    Returns ``content``, ``usage`` and ``call`` timing like the OpenRouter client.
+    """
+    mode = mode or Config.MOONSHOT_VIDEO_INPUT
+    if mode not in VIDEO_INPUT_MODES:
+        raise ValueError(f"Unknown video input mode '{mode}'. Choose from: {', '.join(VIDEO_INPUT_MODES)}")
+    params = {"model": MOONSHOT_MODEL, **params}
+    video_path = Path(video_path)
+    started_at, started = time.time(), time.perf_counter()
+    if mode == "stream":
+        sent = _streamed_completion(client, video_path, prompt, params)
+    elif mode == "upload":
+        sent = _uploaded_completion(client, video_path, prompt, params)
+    else:
+        video_url = video_data_url(video_path)
+        completion = client.chat.completions.create(messages=video_messages(video_url, prompt), **params)
+        sent = {
+            "content": completion.choices[0].message.content,
+            "usage": completion.usage,
+            "bytes": len(video_url),
+        }
+    return _result(sent["content"], sent["usage"], params["model"], started_at, started, sent["bytes"])
+
+
+def transcode_video(
+    src: Path,
+    dst: Path,
+    max_height: int = None,
+    fps: float = None,
+    start: float = 0.0,
+    end: float = None,
+    crf: int = 30,
+) -> Path:
+    # Re-encode without audio, optionally downscaled, resampled and cut to
+    # [start, end). ffmpeg when available; otherwise OpenCV, which keeps one
+    # decoded frame in memory at a time.
+    if shutil.which("ffmpeg"):
+        filters = []
+        if max_height:
+            filters.append(f"scale=-2:'min({max_height},ih)'")
+        if fps:
+            filters.append(f"fps={fps}")
+        command = ["ffmpeg", "-y", "-loglevel", "error"]
+        if start:
+            command += ["-ss", f"{start:.3f}"]
+        command += ["-i", str(src)]
+        if end is not None:
+            command += ["-t", f"{end - start:.3f}"]
+        if filters:
+            command += ["-vf", ",".join(filters)]
+        command += ["-c:v", "libx264", "-preset", "veryfast", "-crf", str(crf), "-an", str(dst)]
+        subprocess.run(command, check=True)
+        return dst
+
+    cap = cv2.VideoCapture(str(src))
+    source_fps = cap.get(cv2.CAP_PROP_FPS) or fps or 30.0
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    scale = min(1.0, max_height / height) if max_height and height else 1.0
+    size = (int(width * scale) // 2 * 2, int(height * scale) // 2 * 2)
+    step = max(1.0, source_fps / fps) if fps else 1.0
+    writer = cv2.VideoWriter(str(dst), cv2.VideoWriter_fourcc(*"mp4v"), source_fps / step, size)
+    if start:
+        cap.set(cv2.CAP_PROP_POS_MSEC, start * 1000)
+    frame_index, next_keep = 0, 0.0
+    while end is None or start + frame_index / source_fps < end:
+        if not cap.grab():
+            break
+        if frame_index >= next_keep:
+            ret, frame = cap.retrieve()
+            if ret:
+                if size != (width, height):
+                    frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+                writer.write(frame)
+            next_keep += step
+        frame_index += 1
+    cap.release()
+    writer.release()
+    return dst
+
+
+def preflight_video(video_path: Path, work_dir: Path, max_mb: float = None) -> Path:
+    # Opt-in: files over the limit are transcoded to a smaller, lower quality
+    # working copy first. A limit of 0 sends the original file.
+    video_path = Path(video_path)
+    max_mb = Config.MOONSHOT_VIDEO_MAX_MB if max_mb is None else max_mb
+    size_mb = video_path.stat().st_size / (1024 * 1024)
+    if not max_mb or size_mb <= max_mb:
+        return video_path
+
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+    target = work_dir / f"{video_path.stem}_preflight.mp4"
+    print(
+        f"⚠️ {video_path.name} is {size_mb:.1f} MB (MOONSHOT_VIDEO_MAX_MB={max_mb:g}); sending a "
+        f"lower quality copy: downscaled to at most {Config.VIDEO_PREFLIGHT_MAX_HEIGHT}p, "
+        f"resampled to {Config.VIDEO_PREFLIGHT_FPS:g} fps, audio dropped..."
+    )
+    transcode_video(video_path, target, Config.VIDEO_PREFLIGHT_MAX_HEIGHT, Config.VIDEO_PREFLIGHT_FPS)
+    new_mb = target.stat().st_size / (1024 * 1024)
+    print(f"   {size_mb:.1f} MB -> {new_mb:.1f} MB")
+    if new_mb > max_mb:
+        print("⚠️ Transcoded video is still over the limit; consider trimming the recording.")
+    return target
@@ -1,38 +1,139 @@
+import asyncio
 import base64
-from typing import Dict, List, Optional
-from openai import OpenAI
+import json
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+import httpx
+from openai import APIError, AsyncOpenAI, OpenAI
+from code_samples import reconcile_prompt, skeleton_prompt, step_prompt_with_skeleton
 from config import Config
+from cost_governor import CostGovernor
+from frame_ocr import is_text_dominated, thumbnail_jpeg
+from moonshot_video import MOONSHOT_MODEL, moonshot_client, video_completion, video_messages, video_prompt_tokens
+from request_scheduler import RequestScheduler
+from response_cache import ResponseCache
+from telemetry import billed_usage, request_bytes
+from video_segments import merge_prompt
+
+
+def _format_frame_timestamps(frames: List[Dict]) -> str:
+    # Deduplicated frames stand in for a time range, e.g. "3@30.0-55.0s".
+    labels = []
+    for f in frames:
+        start = f.get("span_start", f["timestamp"])
+        end = f.get("span_end", f["timestamp"])
+        if end > start:
+            labels.append(f"{f['index']}@{start:.1f}-{end:.1f}s")
+        else:
+            labels.append(f"{f['index']}@{f['timestamp']:.1f}s")
+    return ", ".join(labels)
 
 
-class KimiK25OpenRouterClient:
+class _KimiK25RequestBuilder:
     """
-    Kimi K2.5 client using OpenRouter API.
+    Prompt and request construction shared by the sync and async clients.
+
+    Each ``_*_request`` method returns the keyword arguments for
+    ``chat.completions.create`` so both clients send identical requests.
     """
 
-    def __init__(self):
-        if not Config.OPENROUTER_API_KEY:
-            raise ValueError("OPENROUTER_API_KEY is not set in the environment.")
-        self.client = OpenAI(
-            api_key=Config.OPENROUTER_API_KEY,
-            base_url=Config.OPENROUTER_BASE_URL,
-        )
+    def __init__(self, cache: ResponseCache = None, use_cache: bool = None, governor: CostGovernor = None):
         self.model = Config.MODEL_INSTANT
         self.extra_headers = Config.get_extra_headers()
+        self.cache_hints = Config.PROMPT_CACHE_HINTS
+        use_cache = Config.RESPONSE_CACHE_ENABLED if use_cache is None else use_cache
+        self.cache = (cache or ResponseCache()) if use_cache else None
+        self.scheduler = RequestScheduler()
+        self.governor = governor
+
+    def _cached_result(self, request: Dict):
+        # Returns (cache key, cached result). Hits report zero usage because
+        # nothing was billed; the original usage is kept under "cached_usage".
+        if not self.cache:
+            return None, None
+        key = self.cache.key(request)
+        cached = self.cache.get(key)
+        if cached is None:
+            return key, None
+        result = dict(cached)
+        result["cached_usage"] = result.get("usage", {})
+        result["usage"] = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0, "cached_tokens": 0}
+        result["cache_hit"] = True
+        return key, result
 
-    def encode_image(self, image_path: str) -> str:
-        with open(image_path, "rb") as image_file:
+    def _store_result(self, key: str, result: Dict) -> None:
+        # Empty completions are usually transient failures; don't pin them.
+        # Per-call timing and streaming stats describe this call, not the answer.
+        if key and result.get("content"):
+            self.cache.put(key, {k: v for k, v in result.items() if k not in ("call", "stream")})
+
+    def _admit(self, request: Dict, key: str, media_tokens: int = 0):
+        # The cost governor may lower max_tokens or raise CostLimitExceeded.
+        # A shortened reply is not cached, so it never answers the full request.
+        if not self.governor:
+            return request, key, None
+        admitted, reservation = self.governor.admit(request, media_tokens=media_tokens)
+        return admitted, (key if admitted is request else None), reservation
+
+    def _settle(self, reservation: Optional[int], result: Optional[Dict]) -> None:
+        # Empty completions the scheduler retried were billed as well.
+        if reservation is not None:
+            self.governor.settle(reservation, billed_usage(result) if result else None)
+
+    def _finish_call(self, request: Dict, result: Dict, started_at: float, started: float) -> Dict:
+        # Telemetry for this call; cache hits are marked and upload nothing.
+        call = result.setdefault("call", {})
+        call.update(
+            {
+                "model": request.get("model", ""),
+                "started_at": started_at,
+                "latency_seconds": time.perf_counter() - started,
+                "bytes_uploaded": 0 if result.get("cache_hit") else request_bytes(request),
+            }
+        )
+        return result
+
+    def encode_image(self, image: Union[str, bytes]) -> str:
+        # In-memory frames arrive as JPEG bytes; anything else is a file path.
+        if isinstance(image, (bytes, bytearray, memoryview)):
+            return base64.b64encode(image).decode("utf-8")
+        with open(image, "rb") as image_file:
             return base64.b64encode(image_file.read()).decode("utf-8")
 
-    def _create_message_with_images(self, text: str, image_paths: List[str]) -> List[Dict]:
-        content = [{"type": "text", "text": text}]
-        for path in image_paths:
-            base64_image = self.encode_image(path)
-            content.append(
-                {
-                    "type": "image_url",
-                    "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"},
-                }
-            )
+    def _image_part(self, image: Union[str, bytes]) -> Dict:
+        return {
+            "type": "image_url",
+            "image_url": {"url": f"data:image/jpeg;base64,{self.encode_image(image)}"},
+        }
+
+    def _create_message_with_images(self, text: str, images: List[Union[str, bytes]]) -> List[Dict]:
+        return [{"type": "text", "text": text}] + [self._image_part(image) for image in images]
+
+    def _frame_sequence_content(self, prompt: str, frames: List[Dict]) -> List[Dict]:
+        # With FRAME_OCR on, text-dominated frames go as their OCR text (plus a
+        # low-res thumbnail in "thumbnail" mode) and the rest as labelled images.
+        images = [f.get("jpeg") or f["path"] for f in frames]
+        mode = Config.FRAME_OCR
+        if mode == "off" or not any(is_text_dominated(f.get("ocr")) for f in frames):
+            return self._create_message_with_images(prompt, images)
+
+        content = [
+            {
+                "type": "text",
+                "text": prompt + "\nSome frames are given as the OCR text of the screen; indentation is approximate.",
+            }
+        ]
+        for frame, image in zip(frames, images):
+            label = f"Frame {_format_frame_timestamps([frame])}"
+            if is_text_dominated(frame.get("ocr")):
+                content.append({"type": "text", "text": f"{label} (OCR text):\n```\n{frame['ocr']['text']}\n```"})
+                if mode == "thumbnail":
+                    content.append(self._image_part(thumbnail_jpeg(image)))
+            else:
+                content.append({"type": "text", "text": f"{label}:"})
+                content.append(self._image_part(image))
         return content
 
     def _get_extra_body(self, mode: str = "instant") -> Optional[Dict]:
@@ -43,11 +144,123 @@ class KimiK25OpenRouterClient:
             extra_body["enable_agent"] = True
         return extra_body if extra_body else None
 
-    def analyze_frame_sequence(
+    def _usage_dict(self, usage) -> Dict:
+        # Providers that cache prompt prefixes report the reused part here.
+        details = getattr(usage, "prompt_tokens_details", None)
+        return {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+            "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        }
+
+    def _shared_context_messages(
         self,
-        frames: List[Dict],
+        prompt: str,
         context: str = "",
-        max_frames: int = 10,
+        workflow_steps: str = "",
+        code_samples: str = "",
+    ) -> List[Dict]:
+        """
+        Put the large context shared by several calls in leading system blocks.
+
+        The first block (context, then workflow analysis) is laid out
+        identically for every call on the same video and the code samples
+        follow in a second block, so providers with prefix caching can reuse
+        the workflow prefix across all stages and the code prefix across the
+        docs and Q&A calls; only ``prompt`` differs between calls.
+        """
+        parts = ["Reference material for the tutorial being documented."]
+        if context:
+            parts.append(f"Context: {context}")
+        if workflow_steps:
+            parts.append(f"Workflow analysis:\n{workflow_steps}")
+        blocks = [{"type": "text", "text": "\n\n".join(parts)}]
+        if code_samples:
+            blocks.append({"type": "text", "text": f"Code samples:\n{code_samples}"})
+        if self.cache_hints:
+            for block in blocks:
+                block["cache_control"] = {"type": "ephemeral"}
+        return [
+            {"role": "system", "content": blocks},
+            {"role": "user", "content": prompt},
+        ]
+
+    def _parse_response(self, response, include_reasoning: bool = False) -> Dict:
+        result = {
+            "content": response.choices[0].message.content,
+            "model": response.model,
+            "usage": self._usage_dict(response.usage),
+        }
+
+        if include_reasoning and hasattr(response.choices[0].message, "reasoning"):
+            result["reasoning"] = response.choices[0].message.reasoning
+
+        return result
+
+    def _stream_request(self, request: Dict) -> Dict:
+        # Ask for a final usage chunk so streamed calls are still costed.
+        return {**request, "stream": True, "stream_options": {"include_usage": True}}
+
+    def _stream_state(self) -> Dict:
+        return {"started": time.perf_counter(), "first_token_at": None, "parts": [], "model": None, "usage": None}
+
+    def _consume_chunk(self, state: Dict, chunk, on_delta: Callable[[str], None] = None) -> None:
+        state["model"] = getattr(chunk, "model", None) or state["model"]
+        if getattr(chunk, "usage", None):
+            state["usage"] = chunk.usage
+        if not chunk.choices:
+            return
+        text = getattr(chunk.choices[0].delta, "content", None)
+        if not text:
+            return
+        if state["first_token_at"] is None:
+            state["first_token_at"] = time.perf_counter()
+        state["parts"].append(text)
+        if on_delta:
+            on_delta(text)
+
+    def _stream_result(self, state: Dict, error: Exception = None) -> Dict:
+        ended = time.perf_counter()
+        usage = self._usage_dict(state["usage"])
+        completion_tokens = usage["completion_tokens"]
+        first_token_at = state["first_token_at"]
+        generating = ended - first_token_at if first_token_at else 0.0
+        # Without a usage chunk (e.g. dropped connection) count chunks instead;
+        # providers send roughly one token per chunk.
+        generated = completion_tokens or len(state["parts"])
+        result = {
+            "content": "".join(state["parts"]),
+            "model": state["model"],
+            "usage": usage,
+            "stream": {
+                "ttft_seconds": first_token_at - state["started"] if first_token_at else None,
+                "seconds": ended - state["started"],
+                "tokens_per_second": generated / generating if generating else 0.0,
+                "chunks": len(state["parts"]),
+            },
+        }
+        if error is not None:
+            result["interrupted"] = True
+            result["error"] = str(error)
+        return result
+
+    def _cached_stream_result(self, request: Dict, on_delta: Callable[[str], None] = None):
+        key, cached = self._cached_result(request)
+        self._replay_cached(cached, on_delta)
+        return key, cached
+
+    @staticmethod
+    def _replay_cached(cached: Optional[Dict], on_delta: Callable[[str], None] = None) -> None:
+        # A cache hit is handed to on_delta in one piece, like a fast stream.
+        if cached is not None and on_delta and cached.get("content"):
+            on_delta(cached["content"])
+
+    def _analyze_frame_sequence_request(
+        self,
+        frames: List[Dict],
+        context: str,
+        max_frames: int,
     ) -> Dict:
         prompt = (
             "Analyze this sequence of video frames from a tutorial in ONE coherent pass.\n\n"
@@ -64,45 +277,51 @@ class KimiK25OpenRouterClient:
             "- Provide a structured breakdown with numbered steps.\n"
         )
 
-        image_paths = [f["path"] for f in frames[:max_frames]]
         messages = [
             {
                 "role": "user",
-                "content": self._create_message_with_images(prompt, image_paths),
+                "content": self._frame_sequence_content(prompt, frames[:max_frames]),
             }
         ]
 
-        extra_body = self._get_extra_body(mode="thinking")
-
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=Config.ANALYSIS_TEMPERATURE,
-            max_tokens=Config.MAX_TOKENS,
-            extra_headers=self.extra_headers,
-            extra_body=extra_body,
-        )
-
-        result = {
-            "content": response.choices[0].message.content,
-            "model": response.model,
-            "usage": {
-                "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
-                "completion_tokens": getattr(response.usage, "completion_tokens", 0),
-                "total_tokens": getattr(response.usage, "total_tokens", 0),
-            },
+        return {
+            "model": self.model,
+            "messages": messages,
+            "temperature": Config.ANALYSIS_TEMPERATURE,
+            "max_tokens": Config.MAX_TOKENS,
+            "extra_headers": self.extra_headers,
+            "extra_body": self._get_extra_body(mode="thinking"),
         }
 
-        if hasattr(response.choices[0].message, "reasoning"):
-            result["reasoning"] = response.choices[0].message.reasoning
+    def _merge_workflow_analyses_request(self, windows: List[Dict], overlap_seconds: float) -> Dict:
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": merge_prompt(windows, overlap_seconds)}],
+            "temperature": Config.ANALYSIS_TEMPERATURE,
+            "max_tokens": Config.MAX_TOKENS,
+            "extra_headers": self.extra_headers,
+            "extra_body": self._get_extra_body(),
+        }
 
-        return result
+    def _transcribe_frame_request(self, image: Union[str, bytes]) -> Dict:
+        prompt = (
+            "Transcribe all text visible in this screenshot exactly, line by line, "
+            "keeping code indentation. Output only the text."
+        )
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": self._create_message_with_images(prompt, [image])}],
+            "temperature": Config.ANALYSIS_TEMPERATURE,
+            "max_tokens": Config.MAX_TOKENS,
+            "extra_headers": self.extra_headers,
+            "extra_body": self._get_extra_body(),
+        }
 
-    def generate_code_from_description(
+    def _code_from_description_request(
         self,
         step_description: str,
-        previous_code: str = "",
-        output_format: str = "html",
+        previous_code: str,
+        output_format: str,
     ) -> Dict:
         prompt = (
             "Based on this tutorial step, generate complete, working code:\n\n"
@@ -118,32 +337,57 @@ class KimiK25OpenRouterClient:
             "Generate only the code with inline comments."
         )
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=Config.CODE_GENERATION_TEMPERATURE,
-            max_tokens=Config.MAX_TOKENS,
-            extra_headers=self.extra_headers,
-        )
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": Config.CODE_GENERATION_TEMPERATURE,
+            "max_tokens": Config.MAX_TOKENS,
+            "extra_headers": self.extra_headers,
+        }
 
+    def _project_skeleton_request(self, workflow_steps: str, steps: List[str], output_format: str) -> Dict:
         return {
-            "content": response.choices[0].message.content,
-            "usage": {
-                "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
-                "completion_tokens": getattr(response.usage, "completion_tokens", 0),
-                "total_tokens": getattr(response.usage, "total_tokens", 0),
-            },
+            "model": self.model,
+            "messages": [{"role": "user", "content": skeleton_prompt(workflow_steps, steps, output_format)}],
+            "temperature": Config.CODE_GENERATION_TEMPERATURE,
+            "max_tokens": Config.MAX_TOKENS,
+            "extra_headers": self.extra_headers,
         }
 
-    def create_interactive_documentation(
+    def _code_from_skeleton_request(self, step_description: str, skeleton: str, output_format: str) -> Dict:
+        prompt = step_prompt_with_skeleton(step_description, skeleton, output_format)
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": Config.CODE_GENERATION_TEMPERATURE,
+            "max_tokens": Config.MAX_TOKENS,
+            "extra_headers": self.extra_headers,
+        }
+
+    def _reconcile_code_samples_request(
+        self,
+        skeleton: str,
+        code_samples: List[Dict],
+        output_format: str,
+    ) -> Dict:
+        # Reconciliation rewrites every sample, so it gets the larger budget.
+        return {
+            "model": self.model,
+            "messages": [{"role": "user", "content": reconcile_prompt(skeleton, code_samples, output_format)}],
+            "temperature": Config.CODE_GENERATION_TEMPERATURE,
+            "max_tokens": Config.DOC_MAX_TOKENS,
+            "extra_headers": self.extra_headers,
+        }
+
+    def _interactive_documentation_request(
         self,
         workflow_steps: str,
         code_samples: str,
+        context: str = "",
     ) -> Dict:
         prompt = (
-            "Create a complete, interactive HTML documentation page for this tutorial.\n\n"
-            f"Workflow Steps:\n{workflow_steps}\n\n"
-            f"Code Samples:\n{code_samples}\n\n"
+            "Create a complete, interactive HTML documentation page for this tutorial "
+            "from the workflow analysis and code samples above.\n\n"
             "Requirements:\n"
             "1. Single-page HTML with embedded CSS and JavaScript\n"
             "2. Navigation sidebar with progress tracker\n"
@@ -164,159 +408,319 @@ class KimiK25OpenRouterClient:
             "Generate the complete, standalone HTML file."
         )
 
-        extra_body = self._get_extra_body(mode="agent")
-
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=Config.DOCUMENTATION_TEMPERATURE,
-            max_tokens=Config.DOC_MAX_TOKENS,
-            extra_headers=self.extra_headers,
-            extra_body=extra_body,
-        )
-
         return {
-            "content": response.choices[0].message.content,
-            "usage": {
-                "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
-                "completion_tokens": getattr(response.usage, "completion_tokens", 0),
-                "total_tokens": getattr(response.usage, "total_tokens", 0),
-            },
+            "model": self.model,
+            "messages": self._shared_context_messages(
+                prompt, context=context, workflow_steps=workflow_steps, code_samples=code_samples
+            ),
+            "temperature": Config.DOCUMENTATION_TEMPERATURE,
+            "max_tokens": Config.DOC_MAX_TOKENS,
+            "extra_headers": self.extra_headers,
+            "extra_body": self._get_extra_body(mode="agent"),
         }
 
-    def generate_timestamped_summary(
+    def _timestamped_summary_request(
         self,
         frames: List[Dict],
         workflow_steps: str,
-        context: str = "",
+        context: str,
     ) -> Dict:
-        timestamps = ", ".join([f"{f['index']}@{f['timestamp']:.1f}s" for f in frames])
+        timestamps = _format_frame_timestamps(frames)
         has_timestamps = bool(timestamps)
+        timestamp_block = (
+            f"Available frame timestamps (index@seconds): {timestamps}\n\n" if has_timestamps else ""
+        )
+        timestamp_rules = (
+            "- Each bullet must include a timestamp in seconds (e.g., 30s)\n"
+            "- Use the provided timestamps; if uncertain, say 'approx.'\n"
+            "- Cover the full timeline: include at least one early, mid, and late timestamp\n"
+            if has_timestamps
+            else ""
+        )
         prompt = (
-            "Create a concise, coherent tutorial summary.\n\n"
-            f"Context: {context}\n\n"
-            f"{'Available frame timestamps (index@seconds): ' + timestamps + '\\n\\n' if has_timestamps else ''}"
-            f"Workflow analysis:\n{workflow_steps}\n\n"
+            "Create a concise, coherent tutorial summary of the workflow analysis above.\n\n"
+            f"{timestamp_block}"
             "Requirements:\n"
             "- Produce 8-12 bullet points\n"
-            f"{'- Each bullet must include a timestamp in seconds (e.g., 30s)\\n' if has_timestamps else ''}"
-            f"{'- Use the provided timestamps; if uncertain, say \\'approx.\\'\\n' if has_timestamps else ''}"
-            f"{'- Cover the full timeline: include at least one early, mid, and late timestamp\\n' if has_timestamps else ''}"
+            f"{timestamp_rules}"
             "- Keep terminology consistent across the entire tutorial\n"
         )
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=Config.SUMMARY_MAX_TOKENS,
-            extra_headers=self.extra_headers,
-        )
-
         return {
-            "content": response.choices[0].message.content,
-            "usage": {
-                "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
-                "completion_tokens": getattr(response.usage, "completion_tokens", 0),
-                "total_tokens": getattr(response.usage, "total_tokens", 0),
-            },
+            "model": self.model,
+            "messages": self._shared_context_messages(prompt, context=context, workflow_steps=workflow_steps),
+            "temperature": 0.2,
+            "max_tokens": Config.SUMMARY_MAX_TOKENS,
+            "extra_headers": self.extra_headers,
         }
 
-    def answer_workflow_questions(
+    def _answer_workflow_questions_request(
         self,
         frames: List[Dict],
         workflow_steps: str,
         code_samples: str,
         questions: List[str],
-        context: str = "",
+        context: str,
     ) -> Dict:
-        timestamps = ", ".join([f"{f['index']}@{f['timestamp']:.1f}s" for f in frames])
+        timestamps = _format_frame_timestamps(frames)
         has_timestamps = bool(timestamps)
+        timestamp_block = (
+            f"Available frame timestamps (index@seconds): {timestamps}\n\n" if has_timestamps else ""
+        )
+        timestamp_rule = "- Include a timestamp (seconds) when possible\n" if has_timestamps else ""
         question_block = "\n".join([f"- {q}" for q in questions])
         prompt = (
-            "Answer the questions using the full tutorial context below.\n\n"
-            f"Context: {context}\n\n"
-            f"{'Available frame timestamps (index@seconds): ' + timestamps + '\\n\\n' if has_timestamps else ''}"
-            f"Workflow analysis:\n{workflow_steps}\n\n"
-            f"Code samples:\n{code_samples}\n\n"
+            "Answer the questions using the full tutorial context above.\n\n"
+            f"{timestamp_block}"
             "Questions:\n"
             f"{question_block}\n\n"
             "Requirements:\n"
             "- Answer each question in 1-3 sentences\n"
-            f"{'- Include a timestamp (seconds) when possible\\n' if has_timestamps else ''}"
+            f"{timestamp_rule}"
             "- Prefer answers that reference early + late steps if relevant\n"
             "- If unsure, say what is missing\n"
         )
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=Config.QA_MAX_TOKENS,
-            extra_headers=self.extra_headers,
-        )
-
         return {
-            "content": response.choices[0].message.content,
-            "usage": {
-                "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
-                "completion_tokens": getattr(response.usage, "completion_tokens", 0),
-                "total_tokens": getattr(response.usage, "total_tokens", 0),
-            },
+            "model": self.model,
+            "messages": self._shared_context_messages(
+                prompt, context=context, workflow_steps=workflow_steps, code_samples=code_samples
+            ),
+            "temperature": 0.2,
+            "max_tokens": Config.QA_MAX_TOKENS,
+            "extra_headers": self.extra_headers,
         }
 
-    def generate_questions_from_workflow(
+    def _questions_from_workflow_request(
         self,
         frames: List[Dict],
         workflow_steps: str,
-        context: str = "",
-        max_questions: int = 6,
+        context: str,
+        max_questions: int,
     ) -> Dict:
-        timestamps = ", ".join([f"{f['index']}@{f['timestamp']:.1f}s" for f in frames])
+        timestamps = _format_frame_timestamps(frames)
         has_timestamps = bool(timestamps)
+        timestamp_block = (
+            f"Available frame timestamps (index@seconds): {timestamps}\n\n" if has_timestamps else ""
+        )
+        timestamp_rule = (
+            "- At least two questions should explicitly reference timing or sequence\n"
+            if has_timestamps
+            else ""
+        )
         prompt = (
-            "Generate a short list of useful questions about this tutorial.\n\n"
-            f"Context: {context}\n\n"
-            f"{'Available frame timestamps (index@seconds): ' + timestamps + '\\n\\n' if has_timestamps else ''}"
-            f"Workflow analysis:\n{workflow_steps}\n\n"
+            "Generate a short list of useful questions about the tutorial above.\n\n"
+            f"{timestamp_block}"
             "Requirements:\n"
             f"- Write {max_questions} questions\n"
             "- Each question should be answerable from the analysis\n"
             "- Favor questions that require global context (early + mid + late steps)\n"
-            f"{'- At least two questions should explicitly reference timing or sequence\\n' if has_timestamps else ''}"
+            f"{timestamp_rule}"
             "- Return only the questions, one per line\n"
         )
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=Config.QA_MAX_TOKENS,
-            extra_headers=self.extra_headers,
-        )
+        return {
+            "model": self.model,
+            "messages": self._shared_context_messages(prompt, context=context, workflow_steps=workflow_steps),
+            "temperature": 0.2,
+            "max_tokens": Config.QA_MAX_TOKENS,
+            "extra_headers": self.extra_headers,
+        }
 
+    def _test_connection_request(self) -> Dict:
         return {
-            "content": response.choices[0].message.content,
-            "usage": {
-                "prompt_tokens": getattr(response.usage, "prompt_tokens", 0),
-                "completion_tokens": getattr(response.usage, "completion_tokens", 0),
-                "total_tokens": getattr(response.usage, "total_tokens", 0),
-            },
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": "Say 'OpenRouter connection successful' if you can read this.",
+                }
+            ],
+            "max_tokens": 20,
+            "extra_headers": self.extra_headers,
         }
 
-    def test_connection(self) -> bool:
+
+class KimiK25OpenRouterClient(_KimiK25RequestBuilder):
+    """
+    Kimi K2.5 client using OpenRouter API.
+    """
+
+    def __init__(
+        self,
+        cache: ResponseCache = None,
+        use_cache: bool = None,
+        governor: CostGovernor = None,
+        client: OpenAI = None,
+    ):
+        if client is None and not Config.OPENROUTER_API_KEY:
+            raise ValueError("OPENROUTER_API_KEY is not set in the environment.")
+        super().__init__(cache=cache, use_cache=use_cache, governor=governor)
+        # Retries are owned by the scheduler, not the SDK.
+        self.client = client or OpenAI(
+            api_key=Config.OPENROUTER_API_KEY,
+            base_url=Config.OPENROUTER_BASE_URL,
+            max_retries=0,
+        )
+
+    def _complete(self, request: Dict, include_reasoning: bool = False) -> Dict:
+        started_at, started = time.time(), time.perf_counter()
+        key, cached = self._cached_result(request)
+        if cached is not None:
+            return self._finish_call(request, cached, started_at, started)
+        request, key, reservation = self._admit(request, key)
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": "Say 'OpenRouter connection successful' if you can read this.",
-                    }
-                ],
-                max_tokens=20,
-                extra_headers=self.extra_headers,
+            result = self.scheduler.call(
+                request,
+                lambda: self._parse_response(
+                    self.client.chat.completions.create(**request),
+                    include_reasoning=include_reasoning,
+                ),
             )
+        except BaseException:
+            self._settle(reservation, None)
+            raise
+        self._settle(reservation, result)
+        self._store_result(key, result)
+        return self._finish_call(request, result, started_at, started)
+
+    def _stream_complete(self, request: Dict, on_delta: Callable[[str], None] = None) -> Dict:
+        """
+        Stream a completion, passing each content delta to ``on_delta``.
+
+        If the connection drops after some content arrived, the partial text is
+        returned with ``interrupted`` set instead of raising, so long outputs
+        are not lost. Interrupted results are never cached.
+        """
+        started_at, started = time.time(), time.perf_counter()
+        key, cached = self._cached_stream_result(request, on_delta)
+        if cached is not None:
+            return self._finish_call(request, cached, started_at, started)
+        request, key, reservation = self._admit(request, key)
+
+        def attempt() -> Dict:
+            # Failures before the first token are retried by the scheduler;
+            # after that, deltas were already handed out, so keep the partial.
+            state = self._stream_state()
+            try:
+                for chunk in self.client.chat.completions.create(**self._stream_request(request)):
+                    self._consume_chunk(state, chunk, on_delta)
+            except (APIError, httpx.HTTPError) as exc:
+                if not state["parts"]:
+                    raise
+                return self._stream_result(state, error=exc)
+            return self._stream_result(state)
+
+        try:
+            result = self.scheduler.call(request, attempt, retry_empty=False)
+        except BaseException:
+            self._settle(reservation, None)
+            raise
+        self._settle(reservation, result)
+        if not result.get("interrupted"):
+            self._store_result(key, result)
+        return self._finish_call(request, result, started_at, started)
+
+    def analyze_frame_sequence(
+        self,
+        frames: List[Dict],
+        context: str = "",
+        max_frames: int = 10,
+    ) -> Dict:
+        return self._complete(
+            self._analyze_frame_sequence_request(frames, context, max_frames),
+            include_reasoning=True,
+        )
+
+    def merge_workflow_analyses(self, windows: List[Dict], overlap_seconds: float = 0.0) -> Dict:
+        return self._complete(self._merge_workflow_analyses_request(windows, overlap_seconds))
+
+    def transcribe_frame(self, image: Union[str, bytes]) -> Dict:
+        return self._complete(self._transcribe_frame_request(image))
+
+    def generate_code_from_description(
+        self,
+        step_description: str,
+        previous_code: str = "",
+        output_format: str = "html",
+    ) -> Dict:
+        return self._complete(
+            self._code_from_description_request(step_description, previous_code, output_format)
+        )
+
+    def generate_project_skeleton(
+        self,
+        workflow_steps: str,
+        steps: List[str],
+        output_format: str = "html",
+    ) -> Dict:
+        return self._complete(self._project_skeleton_request(workflow_steps, steps, output_format))
+
+    def generate_code_from_skeleton(
+        self,
+        step_description: str,
+        skeleton: str,
+        output_format: str = "html",
+    ) -> Dict:
+        return self._complete(self._code_from_skeleton_request(step_description, skeleton, output_format))
+
+    def reconcile_code_samples(
+        self,
+        skeleton: str,
+        code_samples: List[Dict],
+        output_format: str = "html",
+    ) -> Dict:
+        return self._complete(self._reconcile_code_samples_request(skeleton, code_samples, output_format))
+
+    def create_interactive_documentation(
+        self,
+        workflow_steps: str,
+        code_samples: str,
+        stream: bool = False,
+        on_delta: Callable[[str], None] = None,
+        context: str = "",
+    ) -> Dict:
+        request = self._interactive_documentation_request(workflow_steps, code_samples, context)
+        if stream:
+            return self._stream_complete(request, on_delta=on_delta)
+        return self._complete(request)
+
+    def generate_timestamped_summary(
+        self,
+        frames: List[Dict],
+        workflow_steps: str,
+        context: str = "",
+    ) -> Dict:
+        return self._complete(self._timestamped_summary_request(frames, workflow_steps, context))
+
+    def answer_workflow_questions(
+        self,
+        frames: List[Dict],
+        workflow_steps: str,
+        code_samples: str,
+        questions: List[str],
+        context: str = "",
+    ) -> Dict:
+        return self._complete(
+            self._answer_workflow_questions_request(
+                frames, workflow_steps, code_samples, questions, context
+            )
+        )
+
+    def generate_questions_from_workflow(
+        self,
+        frames: List[Dict],
+        workflow_steps: str,
+        context: str = "",
+        max_questions: int = 6,
+    ) -> Dict:
+        return self._complete(
+            self._questions_from_workflow_request(frames, workflow_steps, context, max_questions)
+        )
+
+    def test_connection(self) -> bool:
+        try:
+            response = self.client.chat.completions.create(**self._test_connection_request())
             print("✅ OpenRouter connection successful!")
             print(f"   Model: {response.model}")
             print(f"   Response: {response.choices[0].message.content}")
@@ -326,6 +730,322 @@ class KimiK25OpenRouterClient:
             return False
 
 
+class KimiK25MoonshotClient(KimiK25OpenRouterClient):
+    """
+    The same client on Moonshot's own API (``MOONSHOT_API_KEY``).
+
+    Prompts, response cache, scheduler and cost governor are shared with the
+    OpenRouter client. Requests use Moonshot's model name and its fixed
+    temperature, and drop the OpenRouter-only headers, provider routing and
+    cache hints (Moonshot caches prompt prefixes by itself).
+    """
+
+    temperature = 1
+
+    def __init__(self, cache: ResponseCache = None, use_cache: bool = None, governor: CostGovernor = None):
+        super().__init__(
+            cache=cache,
+            use_cache=use_cache,
+            governor=governor,
+            client=moonshot_client().with_options(max_retries=0),
+        )
+        self.model = MOONSHOT_MODEL
+        self.extra_headers = None
+        self.cache_hints = False
+
+    def _get_extra_body(self, mode: str = "instant") -> Optional[Dict]:
+        return None
+
+    def _complete(self, request: Dict, include_reasoning: bool = False) -> Dict:
+        return super()._complete({**request, "temperature": self.temperature}, include_reasoning)
+
+    def _stream_complete(self, request: Dict, on_delta: Callable[[str], None] = None) -> Dict:
+        return super()._stream_complete({**request, "temperature": self.temperature}, on_delta)
+
+    def analyze_video(
+        self,
+        prompt: str,
+        source: Dict,
+        open_video: Callable[[], Path],
+        mode: str = None,
+        max_tokens: int = None,
+    ) -> Dict:
+        """
+        Ask about a video through the response cache, scheduler and governor.
+
+        The cache key uses ``source`` (a file fingerprint, plus the clip range
+        for a segment) in place of the video, so ``open_video`` only runs, and
+        the video is only preflighted, cut and sent, on a cache miss.
+        """
+        started_at, started = time.time(), time.perf_counter()
+        # Preflight settings decide what is actually sent, so they key it too.
+        source = {
+            **source,
+            "preflight": [
+                Config.MOONSHOT_VIDEO_MAX_MB,
+                Config.VIDEO_PREFLIGHT_MAX_HEIGHT,
+                Config.VIDEO_PREFLIGHT_FPS,
+            ],
+        }
+        request = {
+            "model": self.model,
+            "messages": video_messages(json.dumps(source, sort_keys=True, default=str), prompt),
+            "temperature": self.temperature,
+        }
+        if max_tokens:
+            request["max_tokens"] = max_tokens
+        key, cached = self._cached_result(request)
+        if cached is not None:
+            return self._finish_call(request, cached, started_at, started)
+        video_path = open_video()
+        request, key, reservation = self._admit(request, key, media_tokens=video_prompt_tokens(video_path))
+        params = {name: value for name, value in request.items() if name != "messages"}
+        try:
+            # video_completion records its own timing and upload size.
+            result = self.scheduler.call(
+                request, lambda: video_completion(self.client, video_path, prompt, mode=mode, **params)
+            )
+        except BaseException:
+            self._settle(reservation, None)
+            raise
+        self._settle(reservation, result)
+        self._store_result(key, result)
+        return result
+
+    def complete_text(self, prompt: str, max_tokens: int = None, system: str = None) -> Dict:
+        messages = [{"role": "system", "content": system}] if system else []
+        return self._complete(
+            {
+                "model": self.model,
+                "messages": messages + [{"role": "user", "content": prompt}],
+                "max_tokens": max_tokens or Config.MAX_TOKENS,
+            }
+        )
+
+
+class AsyncKimiK25OpenRouterClient(_KimiK25RequestBuilder):
+    """
+    Async Kimi K2.5 client using OpenRouter API.
+
+    All calls share one pooled HTTP client, and a semaphore caps how many
+    requests are in flight at once. Use it as an async context manager, or
+    call ``aclose()`` when done, so pooled connections are released.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = None,
+        http_client: httpx.AsyncClient = None,
+        cache: ResponseCache = None,
+        use_cache: bool = None,
+        governor: CostGovernor = None,
+    ):
+        if not Config.OPENROUTER_API_KEY:
+            raise ValueError("OPENROUTER_API_KEY is not set in the environment.")
+        super().__init__(cache=cache, use_cache=use_cache, governor=governor)
+        max_concurrency = max_concurrency or Config.MAX_CONCURRENT_REQUESTS
+        # A caller-supplied HTTP client is theirs to close.
+        self._owns_http_client = http_client is None
+        self.http_client = http_client or httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+            timeout=httpx.Timeout(Config.REQUEST_TIMEOUT_SECONDS, connect=10.0),
+        )
+        self.client = AsyncOpenAI(
+            api_key=Config.OPENROUTER_API_KEY,
+            base_url=Config.OPENROUTER_BASE_URL,
+            http_client=self.http_client,
+            max_retries=0,
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self) -> "AsyncKimiK25OpenRouterClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        # AsyncOpenAI.close() closes the HTTP client it was given.
+        if self._owns_http_client:
+            await self.client.close()
+
+    async def _complete(self, request: Dict, include_reasoning: bool = False) -> Dict:
+        started_at, started = time.time(), time.perf_counter()
+        # The response cache and the ledger are file I/O; keep them off the
+        # event loop.
+        key, cached = await asyncio.to_thread(self._cached_result, request)
+        if cached is not None:
+            return self._finish_call(request, cached, started_at, started)
+        request, key, reservation = await asyncio.to_thread(self._admit, request, key)
+
+        async def attempt() -> Dict:
+            # Hold a connection slot only while the request is in flight, not
+            # while backing off.
+            async with self._semaphore:
+                response = await self.client.chat.completions.create(**request)
+            return self._parse_response(response, include_reasoning=include_reasoning)
+
+        try:
+            result = await self.scheduler.call_async(request, attempt)
+        except BaseException:
+            await asyncio.to_thread(self._settle, reservation, None)
+            raise
+        await asyncio.to_thread(self._settle, reservation, result)
+        await asyncio.to_thread(self._store_result, key, result)
+        return self._finish_call(request, result, started_at, started)
+
+    async def _stream_complete(self, request: Dict, on_delta: Callable[[str], None] = None) -> Dict:
+        started_at, started = time.time(), time.perf_counter()
+        key, cached = await asyncio.to_thread(self._cached_result, request)
+        if cached is not None:
+            self._replay_cached(cached, on_delta)
+            return self._finish_call(request, cached, started_at, started)
+        request, key, reservation = await asyncio.to_thread(self._admit, request, key)
+
+        async def attempt() -> Dict:
+            state = self._stream_state()
+            async with self._semaphore:
+                try:
+                    response = await self.client.chat.completions.create(**self._stream_request(request))
+                    async for chunk in response:
+                        self._consume_chunk(state, chunk, on_delta)
+                except (APIError, httpx.HTTPError) as exc:
+                    if not state["parts"]:
+                        raise
+                    return self._stream_result(state, error=exc)
+            return self._stream_result(state)
+
+        try:
+            result = await self.scheduler.call_async(request, attempt, retry_empty=False)
+        except BaseException:
+            await asyncio.to_thread(self._settle, reservation, None)
+            raise
+        await asyncio.to_thread(self._settle, reservation, result)
+        if not result.get("interrupted"):
+            await asyncio.to_thread(self._store_result, key, result)
+        return self._finish_call(request, result, started_at, started)
+
+    async def analyze_frame_sequence(
+        self,
+        frames: List[Dict],
+        context: str = "",
+        max_frames: int = 10,
+    ) -> Dict:
+        return await self._complete(
+            self._analyze_frame_sequence_request(frames, context, max_frames),
+            include_reasoning=True,
+        )
+
+    async def merge_workflow_analyses(self, windows: List[Dict], overlap_seconds: float = 0.0) -> Dict:
+        return await self._complete(self._merge_workflow_analyses_request(windows, overlap_seconds))
+
+    async def transcribe_frame(self, image: Union[str, bytes]) -> Dict:
+        return await self._complete(self._transcribe_frame_request(image))
+
+    async def generate_code_from_description(
+        self,
+        step_description: str,
+        previous_code: str = "",
+        output_format: str = "html",
+    ) -> Dict:
+        return await self._complete(
+            self._code_from_description_request(step_description, previous_code, output_format)
+        )
+
+    async def generate_project_skeleton(
+        self,
+        workflow_steps: str,
+        steps: List[str],
+        output_format: str = "html",
+    ) -> Dict:
+        return await self._complete(self._project_skeleton_request(workflow_steps, steps, output_format))
+
+    async def generate_code_from_skeleton(
+        self,
+        step_description: str,
+        skeleton: str,
+        output_format: str = "html",
+    ) -> Dict:
+        return await self._complete(
+            self._code_from_skeleton_request(step_description, skeleton, output_format)
+        )
+
+    async def reconcile_code_samples(
+        self,
+        skeleton: str,
+        code_samples: List[Dict],
+        output_format: str = "html",
+    ) -> Dict:
+        return await self._complete(
+            self._reconcile_code_samples_request(skeleton, code_samples, output_format)
+        )
+
+    async def create_interactive_documentation(
+        self,
+        workflow_steps: str,
+        code_samples: str,
+        stream: bool = False,
+        on_delta: Callable[[str], None] = None,
+        context: str = "",
+    ) -> Dict:
+        request = self._interactive_documentation_request(workflow_steps, code_samples, context)
+        if stream:
+            return await self._stream_complete(request, on_delta=on_delta)
+        return await self._complete(request)
+
+    async def generate_timestamped_summary(
+        self,
+        frames: List[Dict],
+        workflow_steps: str,
+        context: str = "",
+    ) -> Dict:
+        return await self._complete(
+            self._timestamped_summary_request(frames, workflow_steps, context)
+        )
+
+    async def answer_workflow_questions(
+        self,
+        frames: List[Dict],
+        workflow_steps: str,
+        code_samples: str,
+        questions: List[str],
+        context: str = "",
+    ) -> Dict:
+        return await self._complete(
+            self._answer_workflow_questions_request(
+                frames, workflow_steps, code_samples, questions, context
+            )
+        )
+
+    async def generate_questions_from_workflow(
+        self,
+        frames: List[Dict],
+        workflow_steps: str,
+        context: str = "",
+        max_questions: int = 6,
+    ) -> Dict:
+        return await self._complete(
+            self._questions_from_workflow_request(frames, workflow_steps, context, max_questions)
+        )
+
+    async def test_connection(self) -> bool:
+        try:
+            async with self._semaphore:
+                response = await self.client.chat.completions.create(
+                    **self._test_connection_request()
+                )
+            print("✅ OpenRouter connection successful (async)!")
+            print(f"   Model: {response.model}")
+            print(f"   Response: {response.choices[0].message.content}")
+            return True
+        except Exception as exc:
+            print(f"❌ OpenRouter connection failed: {exc}")
+            return False
+
+
 if __name__ == "__main__":
     client = KimiK25OpenRouterClient()
     client.test_connection()
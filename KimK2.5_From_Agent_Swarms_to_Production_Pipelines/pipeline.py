@@ -0,0 +1,828 @@
+import json
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+from checkpoints import CheckpointStore, file_fingerprint, fingerprint, frames_manifest
+from code_samples import CODE_SAMPLE_MODES, CodeSampleBudget, generate_chained, generate_parallel
+from config import Config
+from cost_governor import CostGovernor, cost_limits_configured
+from frame_ocr import FRAME_OCR_MODES, attach_ocr
+from frame_selection import dedupe_frames
+from frame_windows import analyze_windowed
+from moonshot_video import preflight_video
+from openrouter_client import KimiK25MoonshotClient, KimiK25OpenRouterClient
+from prompt_budget import PromptBudget, minify_code_samples, normalize_whitespace, section, step_list
+from response_parsing import HtmlStreamExtractor, extract_code, parse_steps
+from stage_graph import StageGraph
+from telemetry import CallTelemetry, billed_usage, print_summary, summarize, usage_cost
+from video_processor import VideoFrameExtractor
+from video_segments import analyze_segmented
+
+
+# Stage dependencies, used to build the stage graph and by --from-stage:
+# forcing a stage also forces everything downstream of it.
+PIPELINE_STAGE_DEPS = {
+    "frames": [],
+    "analysis": ["frames"],
+    "code_samples": ["analysis"],
+    "summary": ["frames", "analysis"],
+    "questions": ["frames", "analysis"],
+    "documentation": ["analysis", "code_samples"],
+    "answers": ["frames", "analysis", "code_samples", "questions"],
+}
+PIPELINE_STAGES = list(PIPELINE_STAGE_DEPS)
+
+
+def extract_video_frames(
+    video_path: str,
+    frames_dir: str = "frames",
+    frame_storage: str = None,
+    shards: int = None,
+    ocr_workers: int = None,
+) -> List[Dict]:
+    # Module-level so batch mode can run it in a worker process.
+    if Config.FRAME_OCR not in FRAME_OCR_MODES:
+        raise ValueError(f"Unknown FRAME_OCR '{Config.FRAME_OCR}'. Choose from: {', '.join(FRAME_OCR_MODES)}")
+    extractor = VideoFrameExtractor(video_path, output_dir=frames_dir, frame_storage=frame_storage, shards=shards)
+    frames = extractor.extract_key_frames()
+
+    if not frames:
+        raise ValueError(f"No frames extracted from video: {video_path}")
+
+    if Config.FRAME_DEDUP:
+        extracted = len(frames)
+        frames = dedupe_frames(
+            frames,
+            max_distance=Config.FRAME_DEDUP_MAX_DISTANCE,
+            hash_size=Config.FRAME_DEDUP_HASH_SIZE,
+        )
+        print(f"🧹 Deduplicated frames: {extracted} -> {len(frames)}")
+
+    if Config.FRAME_OCR != "off":
+        attach_ocr(frames, workers=ocr_workers)
+
+    return frames
+
+
+class FrameAnalysis:
+    """Frames extracted locally and analyzed together by the OpenRouter vision model."""
+
+    title = "Powered by Kimi K2.5 via OpenRouter"
+    analysis_file = "workflow_analysis.txt"
+    summary_file = "summary_with_timestamps.txt"
+
+    def __init__(
+        self,
+        video_path: str,
+        frames_dir: str = "frames",
+        frame_storage: str = None,
+        window_size: int = None,
+        window_overlap: int = None,
+        window_workers: int = None,
+        shards: int = None,
+        ocr_workers: int = None,
+    ):
+        self.video_path = video_path
+        self.name = Path(video_path).name
+        self.frames_dir = frames_dir
+        self.frame_storage = frame_storage or Config.FRAME_STORAGE
+        self.shards = shards
+        self.ocr_workers = ocr_workers
+        self.window_size = window_size or Config.FRAME_WINDOW_SIZE
+        self.window_overlap = Config.FRAME_WINDOW_OVERLAP if window_overlap is None else window_overlap
+        self.window_workers = window_workers or Config.FRAME_WINDOW_WORKERS
+
+    def fingerprint(self):
+        # The frames manifest already identifies the analysis input.
+        return [self.window_size, self.window_overlap]
+
+    def frames(self, pipeline) -> List[Dict]:
+        return self.extract(pipeline.checkpoints)
+
+    def extract(self, checkpoints: CheckpointStore) -> List[Dict]:
+        # Also called from batch-mode extraction workers, before the pipeline exists.
+        if self.frame_storage == "memory":
+            # Nothing on disk to resume from; extraction always reruns.
+            return self._stage_frames()
+        stage_fingerprint = fingerprint(
+            "frames", file_fingerprint(self.video_path), str(self.frames_dir), self._extraction_settings()
+        )
+        return checkpoints.run(
+            "frames",
+            stage_fingerprint,
+            self._stage_frames,
+            outputs=lambda frames: [f["path"] for f in frames],
+            serialize=frames_manifest,
+        )
+
+    @staticmethod
+    def _extraction_settings() -> Dict:
+        return {
+            name: getattr(Config, name)
+            for name in (
+                "FRAME_INTERVAL_SECONDS",
+                "MAX_FRAMES",
+                "FRAME_SELECTION",
+                "SCENE_PROBE_SECONDS",
+                "SCENE_CHANGE_THRESHOLD",
+                "SCENE_MIN_GAP_SECONDS",
+                "FRAME_DEDUP",
+                "FRAME_DEDUP_MAX_DISTANCE",
+                "FRAME_DEDUP_HASH_SIZE",
+                "FRAME_MAX_LONG_EDGE",
+                "FRAME_JPEG_QUALITY",
+                "FRAME_TEXT_LEGIBLE",
+                "FRAME_OCR",
+                "OCR_LANG",
+                "OCR_PSM",
+            )
+        }
+
+    def _stage_frames(self) -> List[Dict]:
+        print("\n📹 Step 1: Extracting video frames...")
+        return extract_video_frames(
+            self.video_path,
+            self.frames_dir,
+            self.frame_storage,
+            shards=self.shards,
+            ocr_workers=self.ocr_workers,
+        )
+
+    def analyze(self, pipeline, frames: List[Dict]) -> str:
+        print("\n🔍 Step 2: Analyzing workflow with Kimi K2.5 (Vision)...")
+
+        def analyze_frames(window_frames: List[Dict], context: str) -> Dict:
+            result = pipeline.kimi.analyze_frame_sequence(window_frames, context, max_frames=len(window_frames))
+            pipeline._track_result(result, stage="analysis")
+            return result
+
+        def merge(windows: List[Dict], overlap_seconds: float) -> Dict:
+            result = pipeline.kimi.merge_workflow_analyses(windows, overlap_seconds)
+            pipeline._track_result(result, stage="analysis")
+            return result
+
+        # Frames that fit one window go in a single call; more are analyzed
+        # in overlapping windows so later parts of long videos are not dropped.
+        reasoning = None
+        if len(frames) <= self.window_size:
+            analysis_result = analyze_frames(frames, pipeline.context)
+            workflow_analysis = analysis_result["content"] or ""
+            reasoning = analysis_result.get("reasoning")
+        else:
+            workflow_analysis, _ = analyze_windowed(
+                frames,
+                pipeline.context,
+                analyze_frames,
+                merge,
+                pipeline.output_dir,
+                window_size=self.window_size,
+                overlap=self.window_overlap,
+                max_workers=self.window_workers,
+            )
+
+        analysis_path = pipeline.output_dir / self.analysis_file
+        with open(analysis_path, "w", encoding="utf-8") as file:
+            file.write(f"Context: {pipeline.context}\n\n")
+            file.write(workflow_analysis)
+            if reasoning is not None:
+                file.write(f"\n\n--- Reasoning ---\n{reasoning}")
+
+        usage = pipeline.stage_usage.get("analysis", {})
+        print("✅ Workflow analysis complete")
+        print(f"   Tokens used: {usage.get('input_tokens', 0) + usage.get('output_tokens', 0)}")
+        return workflow_analysis
+
+
+class MoonshotVideoAnalysis:
+    """The whole video (or its segments) analyzed directly by Kimi K2.5 on Moonshot."""
+
+    title = "Video analysis via Moonshot, docs via OpenRouter"
+    analysis_file = "video_analysis.txt"
+    summary_file = "summary.txt"
+
+    def __init__(
+        self,
+        video_path: str,
+        prompt: str,
+        video_input: str = None,
+        segment_seconds: float = None,
+        overlap_seconds: float = None,
+        segment_workers: int = None,
+        title: str = None,
+    ):
+        self.video_path = Path(video_path)
+        self.name = self.video_path.name
+        self.prompt = prompt
+        self.video_input = video_input
+        self.segment_seconds = Config.VIDEO_SEGMENT_SECONDS if segment_seconds is None else segment_seconds
+        self.overlap_seconds = overlap_seconds
+        self.segment_workers = segment_workers
+        if title:
+            self.title = title
+
+    def fingerprint(self):
+        # The input mode only changes transport, not the analysis.
+        return [file_fingerprint(self.video_path), self.prompt, self.segment_seconds, self.overlap_seconds]
+
+    def frames(self, pipeline) -> List[Dict]:
+        return []
+
+    def analyze(self, pipeline, frames: List[Dict]) -> str:
+        print("\n🎬 Step 2: Analyzing the video with Kimi K2.5 (Moonshot)...")
+        # Video calls share the docs client's cache and cost governor.
+        kimi = pipeline.kimi
+        if not isinstance(kimi, KimiK25MoonshotClient):
+            kimi = KimiK25MoonshotClient(
+                cache=kimi.cache, use_cache=kimi.cache is not None, governor=pipeline.governor
+            )
+
+        def track(result: Dict) -> None:
+            pipeline._track_result(result, stage="analysis")
+
+        if self.segment_seconds:
+            analysis, _ = analyze_segmented(
+                kimi,
+                self.video_path,
+                self.prompt,
+                pipeline.output_dir,
+                video_input=self.video_input,
+                segment_seconds=self.segment_seconds,
+                overlap_seconds=self.overlap_seconds,
+                max_workers=self.segment_workers,
+                on_result=track,
+            )
+        else:
+            result = kimi.analyze_video(
+                self.prompt,
+                file_fingerprint(self.video_path),
+                lambda: preflight_video(self.video_path, pipeline.output_dir),
+                self.video_input,
+            )
+            track(result)
+            analysis = result["content"]
+
+        (pipeline.output_dir / self.analysis_file).write_text(analysis, encoding="utf-8")
+        print("✅ Video analysis complete")
+        return analysis
+
+
+class AnalysisFile:
+    """A workflow analysis written earlier, e.g. by video_processor_kimi_video.py."""
+
+    title = "Docs from an existing analysis via OpenRouter"
+    analysis_file = None
+    summary_file = "summary.txt"
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.name = self.path.name
+
+    def fingerprint(self):
+        return file_fingerprint(self.path)
+
+    def frames(self, pipeline) -> List[Dict]:
+        return []
+
+    def analyze(self, pipeline, frames: List[Dict]) -> str:
+        print(f"\n📄 Step 2: Reading workflow analysis from {self.path}...")
+        return self.path.read_text(encoding="utf-8")
+
+
+class DocsPipeline:
+    """
+    The video-to-docs stage graph shared by every entry point.
+
+    Only the first two stages depend on where the workflow analysis comes
+    from, so they are delegated to a backend (``FrameAnalysis``,
+    ``MoonshotVideoAnalysis`` or ``AnalysisFile``). A backend provides
+    ``name``, ``title``, ``analysis_file``, ``summary_file``, ``fingerprint()``,
+    ``frames(pipeline)`` and ``analyze(pipeline, frames)``. Code samples,
+    summary, Q&A and documentation run on ``client_class`` (the OpenRouter
+    client unless given, e.g. ``KimiK25MoonshotClient``) with the response
+    cache, checkpoints, prompt budget, concurrency and telemetry for all of
+    them.
+    """
+
+    def __init__(
+        self,
+        backend,
+        context: str = "",
+        output_dir: str = "output",
+        use_cache: bool = None,
+        resume: bool = False,
+        from_stage: str = None,
+        code_sample_mode: str = None,
+        max_steps: int = None,
+        cost_run: str = None,
+        client_class: type = None,
+        max_questions: int = 6,
+    ):
+        self.backend = backend
+        self.context = context
+        self.max_steps = Config.CODE_SAMPLE_MAX_STEPS if max_steps is None else max_steps
+        self.max_questions = max_questions
+        self.code_sample_mode = code_sample_mode or Config.CODE_SAMPLE_MODE
+        if self.code_sample_mode not in CODE_SAMPLE_MODES:
+            raise ValueError(
+                f"Unknown code sample mode '{self.code_sample_mode}'. "
+                f"Choose from: {', '.join(CODE_SAMPLE_MODES)}"
+            )
+        # Spend ceilings are enforced per call when any COST_LIMIT_* is set.
+        self.governor = CostGovernor(video=backend.name, run_id=cost_run) if cost_limits_configured() else None
+        self.kimi = (client_class or KimiK25OpenRouterClient)(use_cache=use_cache, governor=self.governor)
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.cost_tracker = {"input_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "estimated_cost": 0.0}
+        self.stage_usage: Dict[str, Dict] = {}
+        self._usage_lock = threading.Lock()
+        self.stage_streams: Dict[str, Dict] = {}
+        self.prompt_budget = PromptBudget()
+        self.telemetry = CallTelemetry(self.output_dir / "telemetry.jsonl", video=backend.name)
+        self.checkpoints = CheckpointStore(
+            self.output_dir, PIPELINE_STAGE_DEPS, resume=resume, from_stage=from_stage
+        )
+
+    def process(
+        self,
+        frames: List[Dict] = None,
+        questions: List[str] = None,
+        qa_auto: bool = False,
+    ) -> Dict:
+        print("=" * 60)
+        print("🚀 Video to Interactive Documentation Converter")
+        print(f"   {self.backend.title}")
+        print("=" * 60)
+
+        # Summary, code samples and question generation only need the workflow
+        # analysis, so they run concurrently; docs and answers wait for code.
+        graph = StageGraph()
+        graph.add("frames", lambda r: frames if frames is not None else self.backend.frames(self))
+        graph.add(
+            "analysis",
+            lambda r: self._checkpoint(
+                "analysis",
+                [frames_manifest(r["frames"]), self.backend.fingerprint()],
+                lambda: self.backend.analyze(self, r["frames"]),
+                outputs=[self.backend.analysis_file] if self.backend.analysis_file else [],
+            ),
+            deps=PIPELINE_STAGE_DEPS["analysis"],
+        )
+        graph.add(
+            "code_samples",
+            lambda r: self._checkpoint(
+                "code_samples",
+                [
+                    r["analysis"],
+                    self.code_sample_mode,
+                    self.max_steps,
+                    Config.CODE_SAMPLE_TOKEN_BUDGET,
+                    Config.CODE_SAMPLE_COST_BUDGET,
+                ],
+                lambda: self._stage_code_samples(r["analysis"]),
+                outputs=["code_samples.json"],
+            ),
+            deps=PIPELINE_STAGE_DEPS["code_samples"],
+        )
+        graph.add(
+            "summary",
+            lambda r: self._checkpoint(
+                "summary",
+                [frames_manifest(r["frames"]), r["analysis"]],
+                lambda: self._stage_summary(r["frames"], r["analysis"]),
+                outputs=[self.backend.summary_file],
+            ),
+            deps=PIPELINE_STAGE_DEPS["summary"],
+        )
+        graph.add(
+            "documentation",
+            lambda r: self._checkpoint(
+                "documentation",
+                [r["analysis"], r["code_samples"]],
+                lambda: self._stage_documentation(r["analysis"], r["code_samples"]),
+                outputs=["interactive_tutorial.html", "interactive_tutorial_raw.txt"],
+            ),
+            deps=PIPELINE_STAGE_DEPS["documentation"],
+        )
+        if questions or qa_auto:
+            graph.add(
+                "questions",
+                lambda r: questions
+                or self._checkpoint(
+                    "questions",
+                    [frames_manifest(r["frames"]), r["analysis"], self.max_questions],
+                    lambda: self._stage_questions(r["frames"], r["analysis"]),
+                    outputs=["qa_questions.txt"],
+                ),
+                deps=PIPELINE_STAGE_DEPS["questions"],
+            )
+            graph.add(
+                "answers",
+                lambda r: self._checkpoint(
+                    "answers",
+                    [frames_manifest(r["frames"]), r["analysis"], r["code_samples"], r["questions"]],
+                    lambda: self._stage_answers(
+                        r["frames"], r["analysis"], r["code_samples"], r["questions"]
+                    ),
+                    outputs=["qa_answers.txt"],
+                ),
+                deps=PIPELINE_STAGE_DEPS["answers"],
+            )
+
+        results = graph.run(max_workers=Config.PIPELINE_MAX_WORKERS)
+        stages = self._stage_report(graph.timings)
+        stages_path = self.output_dir / "stage_timings.json"
+        stages_path.write_text(json.dumps(stages, indent=2), encoding="utf-8")
+
+        print("\n" + "=" * 60)
+        print("🎉 Conversion Complete!")
+        print("=" * 60)
+        print("\n⏱️ Stage Timeline:")
+        for stage in stages:
+            print(
+                f"   {stage['stage']:<14} {stage['start']:>7.1f}s → {stage['end']:>7.1f}s"
+                f"  ({stage['seconds']:.1f}s, {stage['input_tokens'] + stage['output_tokens']:,} tokens)"
+                + ("  [resumed]" if stage["resumed"] else "")
+            )
+        print("\n📊 Token Usage Summary:")
+        print(f"   Input tokens:  {self.cost_tracker['input_tokens']:,}")
+        print(f"   Output tokens: {self.cost_tracker['output_tokens']:,}")
+        print(f"   Cached input:  {self.cost_tracker['cached_tokens']:,}")
+        print(
+            f"   Total tokens:  {self.cost_tracker['input_tokens'] + self.cost_tracker['output_tokens']:,}"
+        )
+        print(f"   Est. cost:     ${self.cost_tracker['estimated_cost']:.4f}")
+        governor = self.governor_stats()
+        if governor:
+            limits, spent = governor["limits"], governor["spent"]
+            ceilings = ", ".join(
+                f"{scope} ${spent[scope]:.4f}/${limits[scope]:.4g}" for scope in ("video", "batch", "daily") if limits[scope]
+            )
+            print(
+                f"   Cost limits:   {ceilings}; {governor['downgraded']} calls downgraded, "
+                f"{governor['refused']} refused"
+            )
+        cache_stats = self.cache_stats()
+        if cache_stats:
+            print(f"   Cache:         {cache_stats['hits']} hits / {cache_stats['misses']} misses")
+        retries = self.retry_stats()
+        if retries.get("retries") or retries.get("throttle_seconds"):
+            print(
+                f"   Retries:       {retries['retries']} (429: {retries['rate_limited']}, "
+                f"5xx: {retries['server_errors']}, network: {retries['connection_errors']}, "
+                f"empty: {retries['empty_retries']}), waited {retries['backoff_seconds']:.1f}s backoff"
+                f" + {retries['throttle_seconds']:.1f}s rate limit"
+            )
+        budget = self.prompt_budget.summary()
+        if budget["calls"]:
+            print(
+                f"   Compaction:    ~{budget['original_tokens']:,} -> ~{budget['sent_tokens']:,} context tokens"
+                f" (saved ~{budget['saved_tokens']:,}, {budget['saved_ratio']:.0%}, mode={budget['mode']})"
+            )
+        telemetry = summarize(self.telemetry.records)
+        if telemetry:
+            print("\n📈 Call telemetry (slowest p95 first):")
+            print_summary(telemetry)
+        print("\n📁 Output files:")
+        for path in self._output_paths(results):
+            print(f"   • {path}")
+
+        return {
+            "frames": results["frames"],
+            "workflow": results["analysis"],
+            "code_samples": results["code_samples"],
+            "questions": results.get("questions", []),
+            "summary_path": str(self.output_dir / self.backend.summary_file),
+            "documentation_path": str(self.output_dir / "interactive_tutorial.html"),
+            "cost_tracker": self.cost_tracker,
+            "cache": self.cache_stats(),
+            "retries": retries,
+            "telemetry": telemetry,
+            "prompt_budget": budget,
+            "cost_governor": governor,
+            "stages": stages,
+        }
+
+    def governor_stats(self) -> Dict:
+        return self.governor.summary() if self.governor else {}
+
+    def cache_stats(self) -> Dict:
+        if not self.kimi.cache:
+            return {}
+        stats = self.kimi.cache.stats()
+        return {"hits": stats["hits"], "misses": stats["misses"]}
+
+    def retry_stats(self) -> Dict:
+        return self.kimi.scheduler.stats()
+
+    def _checkpoint(self, stage: str, inputs: List, func, outputs: List[str] = ()):
+        # Upstream results are part of the fingerprint, so a stage recomputes
+        # whenever anything it consumed changed, even on --resume. The client
+        # model covers runs that send the text stages somewhere else.
+        stage_fingerprint = fingerprint(stage, inputs, self.context, self._model_settings(), self.kimi.model)
+        return self.checkpoints.run(
+            stage,
+            stage_fingerprint,
+            func,
+            outputs=[str(self.output_dir / name) for name in outputs],
+        )
+
+    @staticmethod
+    def _model_settings() -> Dict:
+        return {
+            name: getattr(Config, name)
+            for name in (
+                "MODEL_INSTANT",
+                "MODEL_THINKING",
+                "ANALYSIS_TEMPERATURE",
+                "CODE_GENERATION_TEMPERATURE",
+                "DOCUMENTATION_TEMPERATURE",
+                "MAX_TOKENS",
+                "DOC_MAX_TOKENS",
+                "SUMMARY_MAX_TOKENS",
+                "QA_MAX_TOKENS",
+                "PROMPT_COMPACTION",
+                "PROMPT_CONTEXT_TOKEN_BUDGET",
+                "FRAME_OCR",
+                "OCR_MIN_WORDS",
+                "OCR_MIN_CONFIDENCE",
+                "OCR_MIN_TEXT_COVERAGE",
+                "OCR_THUMBNAIL_LONG_EDGE",
+            )
+        }
+
+    def _stage_code_samples(self, workflow_analysis: str) -> List[Dict]:
+        print(f"\n💻 Step 3: Generating code samples ({self.code_sample_mode})...")
+        steps = parse_steps(workflow_analysis)[: self.max_steps or None]
+        budget = CodeSampleBudget()
+
+        def generate_step(index: int, step: str, context: str) -> str:
+            if self.code_sample_mode == "parallel":
+                code_result = self.kimi.generate_code_from_skeleton(step, context, output_format="html")
+            else:
+                code_result = self.kimi.generate_code_from_description(
+                    step,
+                    previous_code=context,
+                    output_format="html",
+                )
+            self._track_result(code_result, stage="code_samples")
+            budget.record(billed_usage(code_result))
+            return extract_code(code_result["content"] or "")
+
+        def generate_skeleton() -> str:
+            skeleton_result = self.kimi.generate_project_skeleton(workflow_analysis, steps, output_format="html")
+            self._track_result(skeleton_result, stage="code_samples")
+            budget.record(billed_usage(skeleton_result))
+            return skeleton_result["content"] or ""
+
+        def reconcile(skeleton: str, drafts: List[Dict]) -> str:
+            reconcile_result = self.kimi.reconcile_code_samples(skeleton, drafts, output_format="html")
+            self._track_result(reconcile_result, stage="code_samples")
+            budget.record(billed_usage(reconcile_result))
+            return reconcile_result["content"] or ""
+
+        if self.code_sample_mode == "parallel":
+            code_samples, _ = generate_parallel(
+                steps,
+                generate_skeleton,
+                generate_step,
+                reconcile,
+                max_workers=Config.CODE_SAMPLE_WORKERS,
+                max_skeleton_chars=Config.CODE_SKELETON_MAX_CHARS,
+                budget=budget,
+            )
+        else:
+            code_samples = generate_chained(steps, generate_step, budget=budget)
+
+        report = budget.report(steps, len(code_samples))
+        (self.output_dir / "code_samples_budget.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print("✅ Code generation complete")
+        print(
+            f"   Coverage: {report['covered_steps']}/{report['steps']} steps ({report['coverage']:.0%}), "
+            f"{report['tokens']:,} tokens / ${report['cost']:.4f}"
+            f" (budget: {report['token_budget'] or 'unlimited'} tokens, "
+            f"{'$%.4f' % report['cost_budget'] if report['cost_budget'] else 'unlimited'})"
+        )
+        if report["covered_steps"] < report["steps"]:
+            print(
+                f"   All steps would need ~{report['full_coverage_tokens']:,} tokens "
+                f"/ ${report['full_coverage_cost']:.4f}"
+            )
+
+        code_path = self.output_dir / "code_samples.json"
+        with open(code_path, "w", encoding="utf-8") as file:
+            json.dump(code_samples, file, indent=2)
+        return code_samples
+
+    def _stage_summary(self, frames: List[Dict], workflow_analysis: str) -> str:
+        print("\n🧭 Step 3b: Creating timestamped summary...")
+        sections = self._shared_sections("summary", workflow_analysis)
+        summary_result = self.kimi.generate_timestamped_summary(
+            frames,
+            sections["workflow"],
+            context=self.context,
+        )
+        self._track_result(summary_result, stage="summary")
+        summary_path = self.output_dir / self.backend.summary_file
+        with open(summary_path, "w", encoding="utf-8") as file:
+            file.write(summary_result["content"] or "")
+        print("✅ Timestamped summary created")
+        return summary_result["content"] or ""
+
+    def _stage_documentation(self, workflow_analysis: str, code_samples: List[Dict]) -> str:
+        print("\n📚 Step 4: Creating interactive documentation...")
+        doc_path = self.output_dir / "interactive_tutorial.html"
+        raw_doc_path = self.output_dir / "interactive_tutorial_raw.txt"
+        if Config.DOC_STREAMING:
+            print(f"   Streaming to {raw_doc_path}")
+
+        # Deltas are flushed as they arrive, so the raw file can be tailed and
+        # survives a dropped connection or a killed process.
+        sections = self._shared_sections("documentation", workflow_analysis, code_samples)
+        # The HTML is located while the deltas arrive, so finishing the stage
+        # does not rescan the whole page.
+        extractor = HtmlStreamExtractor()
+        with open(raw_doc_path, "w", encoding="utf-8") as raw_file:
+
+            def write_delta(text: str) -> None:
+                raw_file.write(text)
+                raw_file.flush()
+                extractor.feed(text)
+
+            doc_result = self.kimi.create_interactive_documentation(
+                sections["workflow"],
+                sections["code"],
+                stream=Config.DOC_STREAMING,
+                on_delta=write_delta,
+                context=self.context,
+            )
+        self._track_result(doc_result, stage="documentation")
+
+        stream_stats = doc_result.get("stream")
+        if stream_stats:
+            self.stage_streams["documentation"] = stream_stats
+            ttft = stream_stats["ttft_seconds"]
+            print(
+                f"   Time to first token: {ttft:.1f}s, "
+                f"{stream_stats['tokens_per_second']:.1f} tokens/s"
+                if ttft is not None
+                else "   No tokens received"
+            )
+        if doc_result.get("interrupted"):
+            print(f"⚠️ Stream interrupted ({doc_result['error']}); keeping partial output.")
+            self.checkpoints.mark_incomplete("documentation")
+
+        raw_content = doc_result["content"] or ""
+        if not Config.DOC_STREAMING:
+            extractor.feed(raw_content)
+        if raw_content.strip():
+            html_content = extractor.result()
+        else:
+            html_content = (
+                "<!doctype html>\n"
+                "<html><body><pre>"
+                "Documentation generation returned an empty response. "
+                f"See {raw_doc_path} for details."
+                "</pre></body></html>"
+            )
+        with open(doc_path, "w", encoding="utf-8") as file:
+            file.write(html_content)
+        if not Config.DOC_STREAMING:
+            raw_doc_path.write_text(raw_content, encoding="utf-8")
+
+        if raw_content.strip():
+            print("✅ Documentation created")
+        else:
+            print("⚠️ Documentation response was empty; wrote a placeholder HTML.")
+        return html_content
+
+    def _stage_questions(self, frames: List[Dict], workflow_analysis: str) -> List[str]:
+        print("\n❓ Step 5: Auto-generating questions...")
+        sections = self._shared_sections("questions", workflow_analysis)
+        gen_result = self.kimi.generate_questions_from_workflow(
+            frames,
+            sections["workflow"],
+            context=self.context,
+            max_questions=self.max_questions,
+        )
+        self._track_result(gen_result, stage="questions")
+        questions = [
+            line.strip()
+            for line in (gen_result["content"] or "").splitlines()
+            if line.strip()
+        ]
+        gen_out_path = self.output_dir / "qa_questions.txt"
+        gen_out_path.write_text("\n".join(questions), encoding="utf-8")
+        print("✅ Questions generated")
+        return questions
+
+    def _stage_answers(
+        self,
+        frames: List[Dict],
+        workflow_analysis: str,
+        code_samples: List[Dict],
+        questions: List[str],
+    ) -> str:
+        if not questions:
+            return ""
+        print("\n❓ Step 6: Answering workflow questions...")
+        sections = self._shared_sections("answers", workflow_analysis, code_samples)
+        qa_result = self.kimi.answer_workflow_questions(
+            frames,
+            sections["workflow"],
+            sections["code"],
+            questions,
+            context=self.context,
+        )
+        self._track_result(qa_result, stage="answers")
+        qa_out_path = self.output_dir / "qa_answers.txt"
+        qa_raw_path = self.output_dir / "qa_answers_raw.txt"
+        qa_raw_path.write_text(qa_result["content"] or "", encoding="utf-8")
+        # Empty completions were already retried by the scheduler.
+        qa_out_path.write_text(qa_result["content"] or "", encoding="utf-8")
+        if qa_result["content"]:
+            print("✅ Q&A answers created")
+        else:
+            print("❌ Q&A response was empty; see qa_answers_raw.txt")
+        return qa_result["content"] or ""
+
+    def _shared_sections(self, stage: str, workflow_analysis: str, code_samples: List[Dict] = None) -> Dict[str, str]:
+        # Each section is fitted once per run and reused by every stage, so
+        # the cacheable system block is the same in all of them.
+        sections = {"workflow": self._workflow_section(workflow_analysis)}
+        if code_samples is not None:
+            sections["code"] = self._code_section(code_samples)
+        return self.prompt_budget.fit(stage, sections)
+
+    def _workflow_section(self, workflow_analysis: str) -> List:
+        return section(
+            ("original", workflow_analysis),
+            ("lossless", normalize_whitespace(workflow_analysis)),
+            ("steps", step_list(parse_steps(workflow_analysis))),
+        )
+
+    def _code_section(self, code_samples: List[Dict]) -> List:
+        # The docs page embeds the code, so it is never sent lossy.
+        return section(
+            ("original", json.dumps(code_samples, indent=2)),
+            ("lossless", minify_code_samples(code_samples)),
+        )
+
+    def _output_paths(self, results: Dict) -> List[Path]:
+        paths = [self.output_dir / self.backend.analysis_file] if self.backend.analysis_file else []
+        paths += [
+            self.output_dir / "code_samples.json",
+            self.output_dir / self.backend.summary_file,
+            self.output_dir / "interactive_tutorial.html",
+            self.output_dir / "stage_timings.json",
+            self.output_dir / "telemetry.jsonl",
+        ]
+        if "questions" in results:
+            paths.append(self.output_dir / "qa_questions.txt")
+        if results.get("answers"):
+            paths.extend([self.output_dir / "qa_answers.txt", self.output_dir / "qa_answers_raw.txt"])
+        return [p for p in paths if p.exists()]
+
+    def _stage_report(self, timings: List[Dict]) -> List[Dict]:
+        savings = self.prompt_budget.stage_savings()
+        report = []
+        for timing in sorted(timings, key=lambda t: t["start"]):
+            usage = self.stage_usage.get(timing["stage"], {})
+            report.append(
+                {
+                    **timing,
+                    "calls": usage.get("calls", 0),
+                    "input_tokens": usage.get("input_tokens", 0),
+                    "output_tokens": usage.get("output_tokens", 0),
+                    "cached_tokens": usage.get("cached_tokens", 0),
+                    "resumed": timing["stage"] in self.checkpoints.resumed,
+                }
+            )
+            report[-1].update(savings.get(timing["stage"], {}))
+            if timing["stage"] in self.stage_streams:
+                report[-1]["stream"] = self.stage_streams[timing["stage"]]
+        return report
+
+    def _track_result(self, result: Dict, stage: str) -> None:
+        self._track_usage(billed_usage(result), stage=stage)
+        self.telemetry.record(stage, result)
+
+    def _track_usage(self, usage: Dict, stage: str = "") -> None:
+        prompt_tokens = int(usage.get("prompt_tokens", 0) or 0)
+        completion_tokens = int(usage.get("completion_tokens", 0) or 0)
+        # Cached tokens are a subset of prompt_tokens billed at the cache rate.
+        cached_tokens = min(int(usage.get("cached_tokens", 0) or 0), prompt_tokens)
+        # Stages run on worker threads, so updates must not interleave.
+        with self._usage_lock:
+            self.cost_tracker["input_tokens"] += prompt_tokens
+            self.cost_tracker["output_tokens"] += completion_tokens
+            self.cost_tracker["cached_tokens"] += cached_tokens
+            self.cost_tracker["estimated_cost"] += usage_cost(prompt_tokens, completion_tokens, cached_tokens)
+            if stage:
+                stage_usage = self.stage_usage.setdefault(
+                    stage, {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cached_tokens": 0}
+                )
+                stage_usage["calls"] += 1
+                stage_usage["input_tokens"] += prompt_tokens
+                stage_usage["output_tokens"] += completion_tokens
+                stage_usage["cached_tokens"] += cached_tokens
@@ -0,0 +1,134 @@
+import json
+import math
+import re
+import threading
+from typing import Dict, List, Tuple
+
+from config import Config
+
+COMPACTION_MODES = ("off", "lossless", "budget")
+
+# Variant labels that carry the full information of the original section.
+LOSSLESS_LABELS = ("original", "lossless")
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / Config.CHARS_PER_TOKEN)
+
+
+def normalize_whitespace(text: str) -> str:
+    lines = [line.rstrip() for line in (text or "").strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+def step_list(steps: List[str], max_chars_per_step: int = 300) -> str:
+    # A numbered list of the parsed steps, each trimmed to one short paragraph.
+    trimmed = []
+    for i, step in enumerate(steps, 1):
+        text = " ".join(step.split())
+        if len(text) > max_chars_per_step:
+            text = text[: max_chars_per_step - 3].rstrip() + "..."
+        trimmed.append(f"{i}. {text}")
+    return "\n".join(trimmed)
+
+
+def minify_code_samples(code_samples: List[Dict]) -> str:
+    return json.dumps(code_samples, separators=(",", ":"), ensure_ascii=False)
+
+
+def section(*variants: Tuple[str, str]) -> List[Tuple[str, str]]:
+    # Keep the original, then only variants that are actually smaller.
+    kept = [variants[0]]
+    for label, text in variants[1:]:
+        if len(text) < len(kept[-1][1]):
+            kept.append((label, text))
+    return kept
+
+
+class PromptBudget:
+    """
+    Chooses how much of each shared context section a call resends.
+
+    A section is a list of ``(label, text)`` variants from most to least
+    detailed, starting with ``original`` (what the pipeline used to send).
+    ``off`` always sends the original, ``lossless`` the smallest variant that
+    loses nothing, and ``budget`` starts there and then takes more compact
+    variants until the section fits ``max_tokens``. A section's variant is
+    chosen the first time it is fitted and reused for the rest of the run, so
+    every stage sends identical shared text and the provider's prefix cache
+    can serve it. Every call is recorded so savings can be reported.
+    """
+
+    def __init__(self, mode: str = None, max_tokens: int = None):
+        self.mode = mode or Config.PROMPT_COMPACTION
+        if self.mode not in COMPACTION_MODES:
+            raise ValueError(
+                f"Unknown prompt compaction mode '{self.mode}'. Choose from: {', '.join(COMPACTION_MODES)}"
+            )
+        self.max_tokens = max_tokens if max_tokens is not None else Config.PROMPT_CONTEXT_TOKEN_BUDGET
+        self.records: List[Dict] = []
+        self.chosen: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def fit(self, stage: str, sections: Dict[str, List[Tuple[str, str]]]) -> Dict[str, str]:
+        with self._lock:
+            for name, variants in sections.items():
+                if name not in self.chosen:
+                    self.chosen[name] = self._choose(variants)
+            choice = {name: self.chosen[name] for name in sections}
+
+        def tokens(name: str) -> int:
+            return estimate_tokens(sections[name][choice[name]][1])
+
+        original = sum(estimate_tokens(variants[0][1]) for variants in sections.values())
+        sent = sum(tokens(name) for name in sections)
+        record = {
+            "stage": stage,
+            "original_tokens": original,
+            "sent_tokens": sent,
+            "variants": {name: sections[name][choice[name]][0] for name in sections},
+            "over_budget": self.mode == "budget" and sent > self.max_tokens,
+        }
+        with self._lock:
+            self.records.append(record)
+        if record["over_budget"]:
+            print(f"⚠️ {stage}: context still ~{sent:,} tokens after compaction (budget {self.max_tokens:,})")
+        return {name: sections[name][choice[name]][1] for name in sections}
+
+    def _choose(self, variants: List[Tuple[str, str]]) -> int:
+        # Depends only on the section itself, so the choice does not change
+        # with the order stages run in or which of them resumed.
+        if self.mode == "off":
+            return 0
+        lossless = [i for i, (label, _) in enumerate(variants) if label in LOSSLESS_LABELS]
+        index = lossless[-1]
+        if self.mode == "budget":
+            while index < len(variants) - 1 and estimate_tokens(variants[index][1]) > self.max_tokens:
+                index += 1
+        return index
+
+    def stage_savings(self) -> Dict[str, Dict]:
+        with self._lock:
+            records = list(self.records)
+        savings: Dict[str, Dict] = {}
+        for record in records:
+            entry = savings.setdefault(record["stage"], {"context_tokens": 0, "context_tokens_saved": 0})
+            entry["context_tokens"] += record["sent_tokens"]
+            entry["context_tokens_saved"] += record["original_tokens"] - record["sent_tokens"]
+        return savings
+
+    def summary(self) -> Dict:
+        with self._lock:
+            records = list(self.records)
+        original = sum(r["original_tokens"] for r in records)
+        sent = sum(r["sent_tokens"] for r in records)
+        return {
+            "mode": self.mode,
+            "budget": self.max_tokens,
+            "calls": len(records),
+            "original_tokens": original,
+            "sent_tokens": sent,
+            "saved_tokens": original - sent,
+            "saved_ratio": (original - sent) / original if original else 0.0,
+            "records": records,
+        }
@@ -0,0 +1,294 @@
+import asyncio
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+from openai import APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+
+from config import Config
+from prompt_budget import estimate_tokens
+
+
+class TokenBucket:
+    """
+    Classic token bucket: ``rate`` tokens per second, bursts up to ``capacity``.
+
+    ``reserve`` takes the tokens immediately (the balance may go negative) and
+    returns how long the caller must wait, so reservations queue fairly across
+    threads without holding the lock while sleeping.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # A single request larger than the bucket only waits for a full bucket.
+            self._tokens -= min(amount, self.capacity)
+            return max(0.0, -self._tokens / self.rate)
+
+
+_RETRY_LABELS = {
+    "rate_limited": "Rate limited",
+    "server_errors": "Server error",
+    "connection_errors": "Connection error",
+}
+
+# Buckets are per model and shared by every client in the process, so batch
+# workers draw from one limit instead of each assuming it has the whole quota.
+_BUCKETS: Dict[tuple, TokenBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def _model_limits(model: str) -> Dict[str, float]:
+    limits = {"rpm": Config.RATE_LIMIT_RPM, "tpm": Config.RATE_LIMIT_TPM}
+    if Config.RATE_LIMITS_JSON:
+        limits.update(json.loads(Config.RATE_LIMITS_JSON).get(model, {}))
+    return limits
+
+
+def _bucket(model: str, kind: str) -> Optional[TokenBucket]:
+    per_minute = _model_limits(model)[kind]
+    if not per_minute:
+        return None
+    with _BUCKETS_LOCK:
+        key = (model, kind, per_minute)
+        if key not in _BUCKETS:
+            _BUCKETS[key] = TokenBucket(rate=per_minute / 60.0, capacity=per_minute)
+        return _BUCKETS[key]
+
+
+def estimate_request_tokens(request: Dict) -> int:
+    # Prompt text, a flat allowance per image, plus the completion budget.
+    total = request.get("max_tokens") or 0
+    for message in request.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            total += estimate_tokens(content)
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                total += estimate_tokens(part["text"])
+            elif part.get("type") == "image_url":
+                total += Config.RATE_LIMIT_IMAGE_TOKENS
+    return total
+
+
+def _empty_usage() -> Dict[str, int]:
+    return {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0}
+
+
+def _add_usage(total: Dict[str, int], usage: Optional[Dict]) -> None:
+    for name in total:
+        total[name] += int((usage or {}).get(name, 0) or 0)
+
+
+def retry_after_seconds(exc: Exception) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    if headers.get("retry-after-ms"):
+        try:
+            return float(headers["retry-after-ms"]) / 1000.0
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """
+    Rate limiting and retries around one client's API calls.
+
+    Before each attempt the caller waits for the model's request and token
+    buckets (``RATE_LIMIT_RPM`` / ``RATE_LIMIT_TPM``). 429s, 5xx, timeouts and
+    connection errors are retried with exponential backoff and full jitter,
+    or after ``Retry-After`` when the server sends one. Empty completions are
+    retried too, but only ``EMPTY_RETRY_BUDGET`` times per call so a model
+    that keeps returning nothing cannot multiply the bill. The returned result
+    gets a ``call`` entry (added to any ``send`` already set) with that call's
+    retry count, total wait and the ``discarded_usage`` of the empty
+    completions it retried, which were billed all the same.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = None,
+        base_delay: float = None,
+        max_delay: float = None,
+        empty_retry_budget: int = None,
+    ):
+        self.max_retries = Config.MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = Config.RETRY_BASE_DELAY_SECONDS if base_delay is None else base_delay
+        self.max_delay = Config.RETRY_MAX_DELAY_SECONDS if max_delay is None else max_delay
+        self.empty_retry_budget = (
+            Config.EMPTY_RETRY_BUDGET if empty_retry_budget is None else empty_retry_budget
+        )
+        self._stats = {
+            "attempts": 0,
+            "retries": 0,
+            "rate_limited": 0,
+            "server_errors": 0,
+            "connection_errors": 0,
+            "empty_retries": 0,
+            "backoff_seconds": 0.0,
+            "throttle_seconds": 0.0,
+        }
+        self._lock = threading.Lock()
+
+    def call(self, request: Dict, send: Callable[[], Dict], retry_empty: bool = True) -> Dict:
+        attempt = 0
+        waited = 0.0
+        empty = 0
+        discarded = _empty_usage()
+        while True:
+            waited += self._throttle_wait(request)
+            try:
+                result = send()
+            except Exception as exc:
+                delay = self._retry_delay(exc, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                waited += delay
+                self._record_wait("backoff_seconds", delay)
+                time.sleep(delay)
+                continue
+            if retry_empty and self._retry_empty(result, attempt, empty):
+                _add_usage(discarded, result.get("usage"))
+                empty += 1
+                attempt += 1
+                continue
+            result.setdefault("call", {}).update(
+                {"retries": attempt, "retry_wait_seconds": waited, "discarded_usage": discarded}
+            )
+            return result
+
+    async def call_async(
+        self,
+        request: Dict,
+        send: Callable[[], Awaitable[Dict]],
+        retry_empty: bool = True,
+    ) -> Dict:
+        attempt = 0
+        waited = 0.0
+        empty = 0
+        discarded = _empty_usage()
+        while True:
+            waited += await self._throttle_wait_async(request)
+            try:
+                result = await send()
+            except Exception as exc:
+                delay = self._retry_delay(exc, attempt)
+                if delay is None:
+                    raise
+                attempt += 1
+                waited += delay
+                self._record_wait("backoff_seconds", delay)
+                await asyncio.sleep(delay)
+                continue
+            if retry_empty and self._retry_empty(result, attempt, empty):
+                _add_usage(discarded, result.get("usage"))
+                empty += 1
+                attempt += 1
+                continue
+            result.setdefault("call", {}).update(
+                {"retries": attempt, "retry_wait_seconds": waited, "discarded_usage": discarded}
+            )
+            return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _throttle_delay(self, request: Dict) -> float:
+        with self._lock:
+            self._stats["attempts"] += 1
+        model = request.get("model", "")
+        delay = 0.0
+        requests_bucket = _bucket(model, "rpm")
+        if requests_bucket:
+            delay = max(delay, requests_bucket.reserve(1))
+        tokens_bucket = _bucket(model, "tpm")
+        if tokens_bucket:
+            delay = max(delay, tokens_bucket.reserve(estimate_request_tokens(request)))
+        if delay:
+            self._record_wait("throttle_seconds", delay)
+        return delay
+
+    def _throttle_wait(self, request: Dict) -> float:
+        delay = self._throttle_delay(request)
+        if delay:
+            time.sleep(delay)
+        return delay
+
+    async def _throttle_wait_async(self, request: Dict) -> float:
+        delay = self._throttle_delay(request)
+        if delay:
+            await asyncio.sleep(delay)
+        return delay
+
+    def _retry_delay(self, exc: Exception, attempt: int) -> Optional[float]:
+        if isinstance(exc, RateLimitError):
+            kind = "rate_limited"
+        elif isinstance(exc, APIStatusError) and exc.status_code >= 500:
+            kind = "server_errors"
+        elif isinstance(exc, (APIConnectionError, APITimeoutError, httpx.TransportError)):
+            kind = "connection_errors"
+        elif isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code == 429:
+            # Raw httpx calls, e.g. the streamed Moonshot video upload.
+            kind = "rate_limited"
+        elif isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code >= 500:
+            kind = "server_errors"
+        else:
+            return None
+        if attempt >= self.max_retries:
+            return None
+
+        retry_after = retry_after_seconds(exc)
+        if retry_after is not None:
+            delay = min(retry_after, self.max_delay)
+        else:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        with self._lock:
+            self._stats[kind] += 1
+            self._stats["retries"] += 1
+        print(f"⏳ {_RETRY_LABELS[kind]} ({exc.__class__.__name__}); retry {attempt + 1} in {delay:.1f}s")
+        return delay
+
+    def _retry_empty(self, result: Dict, attempt: int, empty: int) -> bool:
+        # ``empty`` counts this call's empty retries; the shared stats are only reported.
+        if (result.get("content") or "").strip() or attempt >= self.max_retries:
+            return False
+        if empty >= self.empty_retry_budget:
+            return False
+        with self._lock:
+            self._stats["empty_retries"] += 1
+            self._stats["retries"] += 1
+        print("⏳ Empty completion; retrying")
+        return True
+
+    def _record_wait(self, kind: str, seconds: float) -> None:
+        with self._lock:
+            self._stats[kind] += seconds
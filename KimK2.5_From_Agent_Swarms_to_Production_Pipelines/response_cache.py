@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+from config import Config
+
+
+# Request fields that change the model's output. Headers (referer, title) do not.
+CACHE_KEY_FIELDS = ("model", "messages", "temperature", "max_tokens", "extra_body")
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed cache of chat completion results.
+
+    Entries are JSON files named by the SHA-256 of the request fields that affect
+    the output (images are part of ``messages`` as base64 data URLs, so identical
+    frames hash identically). A file's mtime is its last access time: hits touch
+    it, and the least recently used entries are evicted once the cache exceeds
+    ``max_bytes``. Entries older than ``ttl_seconds`` are treated as misses.
+    """
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None, ttl_seconds: float = None):
+        self.cache_dir = Path(cache_dir or Config.RESPONSE_CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes if max_bytes is not None else Config.RESPONSE_CACHE_MAX_MB * 1024 * 1024
+        self.ttl_seconds = (
+            ttl_seconds if ttl_seconds is not None else Config.RESPONSE_CACHE_TTL_HOURS * 3600
+        )
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._size = sum(p.stat().st_size for p in self.cache_dir.glob("*/*.json"))
+
+    def key(self, request: Dict) -> str:
+        payload = {field: request.get(field) for field in CACHE_KEY_FIELDS}
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        if self.ttl_seconds and time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Evicted by a concurrent put; the entry was already read.
+            pass
+        with self._lock:
+            self.hits += 1
+        return entry["result"]
+
+    def put(self, key: str, result: Dict) -> None:
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        data = json.dumps({"created_at": time.time(), "result": result}, ensure_ascii=False)
+        # Write then rename so concurrent readers never see a partial entry.
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(data, encoding="utf-8")
+        previous = path.stat().st_size if path.exists() else 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._size += path.stat().st_size - previous
+            over_budget = self.max_bytes and self._size > self.max_bytes
+        if over_budget:
+            self._evict()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes": self._size,
+            }
+
+    def _remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._size -= size
+
+    def _evict(self) -> None:
+        # Other processes may share the directory, so rescan instead of trusting
+        # the running total, then drop least recently used entries.
+        entries = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._size = total
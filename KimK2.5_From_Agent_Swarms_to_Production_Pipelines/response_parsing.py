@@ -0,0 +1,128 @@
+import re
+from typing import List, Optional
+
+_NUMBERED_STEP = re.compile(r"^(?:step\s*)?(\d+)[\).\:\-]\s+(.*)$", re.IGNORECASE)
+# Opening fences only: the block ends at the next "```", which str.find
+# locates far faster than a lazy DOTALL group.
+_CODE_FENCE_OPEN = re.compile(r"```(?:\w+)?\n")
+_HTML_FENCE_OPEN = re.compile(r"```(?:html)?\n", re.IGNORECASE)
+_HTML_TAG = re.compile(r"<html", re.IGNORECASE)
+_LEADING_FENCE = re.compile(r"```(?:html)?\n?", re.IGNORECASE)
+
+EMPTY_HTML = "<!doctype html>\n<html><body><pre></pre></body></html>"
+
+
+def parse_steps(workflow_text: str) -> List[str]:
+    # Numbered lines ("1.", "Step 2:", "3)") first, then paragraphs, then lines.
+    lines = [line.strip() for line in workflow_text.splitlines() if line.strip()]
+    steps = [match.group(2).strip() for match in map(_NUMBERED_STEP.match, lines) if match]
+    if steps:
+        return steps
+
+    paragraphs = [p.strip() for p in workflow_text.split("\n\n") if p.strip()]
+    if paragraphs:
+        return paragraphs
+
+    return lines
+
+
+def _first_block(opening_pattern: re.Pattern, text: str) -> Optional[str]:
+    # Same match as "```...\n(.*?)```": if the first opening fence is never
+    # closed there is no later "```" either, so the search stops there.
+    opening = opening_pattern.search(text)
+    if not opening:
+        return None
+    closing = text.find("```", opening.end())
+    if closing == -1:
+        return None
+    return text[opening.end() : closing]
+
+
+def extract_code(content: str) -> str:
+    block = _first_block(_CODE_FENCE_OPEN, content)
+    if block is not None:
+        return block.strip()
+    return content.strip()
+
+
+def extract_html(content: str) -> str:
+    text = content.strip()
+    if not text:
+        return EMPTY_HTML
+    block = _first_block(_HTML_FENCE_OPEN, text)
+    if block is not None:
+        return block.strip()
+    return _unfenced_html(text)
+
+
+def _unfenced_html(text: str, has_tag: bool = None) -> str:
+    # Drop a stray opening/closing fence with anchored checks instead of
+    # substitutions that scan the whole response.
+    leading = _LEADING_FENCE.match(text)
+    if leading:
+        text = text[leading.end():].strip()
+    if text.endswith("```"):
+        text = text[:-3]
+        if text.endswith("\n"):
+            text = text[:-1]
+    text = text.strip()
+    if has_tag is None:
+        has_tag = _HTML_TAG.search(text) is not None
+    if has_tag:
+        return text
+    return f"<!doctype html>\n<html><body><pre>{text}</pre></body></html>"
+
+
+class HtmlStreamExtractor:
+    """
+    ``extract_html`` for a response that arrives as stream deltas.
+
+    Each delta is scanned once, with a few characters of overlap for fences
+    and tags split across deltas. Scanning stops once the first fenced block
+    is closed, so ``result()`` only slices it out (or, for unfenced replies,
+    does the anchored cleanup). ``result()`` always equals ``extract_html``
+    of the concatenated deltas.
+    """
+
+    # Longest prefix of an opening fence that can straddle two deltas.
+    _OVERLAP = len("```html\n") - 1
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._length = 0
+        self._tail = ""
+        self._has_tag = False
+        self._content_start: Optional[int] = None
+        self._block: Optional[str] = None
+
+    def feed(self, delta: str) -> None:
+        if not delta:
+            return
+        self._chunks.append(delta)
+        if self._block is not None:
+            self._length += len(delta)
+            return
+
+        window = self._tail + delta
+        offset = self._length - len(self._tail)
+        self._length += len(delta)
+        self._tail = window[-self._OVERLAP:]
+        if not self._has_tag and _HTML_TAG.search(window):
+            self._has_tag = True
+
+        if self._content_start is None:
+            opening = _HTML_FENCE_OPEN.search(window)
+            if not opening:
+                return
+            self._content_start = offset + opening.end()
+        closing = window.find("```", max(0, self._content_start - offset))
+        if closing != -1:
+            self._block = "".join(self._chunks)[self._content_start : offset + closing]
+
+    def result(self) -> str:
+        if self._block is not None:
+            return self._block.strip()
+        text = "".join(self._chunks).strip()
+        if not text:
+            return EMPTY_HTML
+        return _unfenced_html(text, self._has_tag)
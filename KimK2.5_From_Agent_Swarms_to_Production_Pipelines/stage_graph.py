@@ -0,0 +1,79 @@
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Set
+
+
+def downstream(dependencies: Dict[str, Iterable[str]], stage: str) -> Set[str]:
+    # ``stage`` plus every stage that depends on it, directly or transitively.
+    found = {stage}
+    while True:
+        more = {name for name, deps in dependencies.items() if found.intersection(deps)} - found
+        if not more:
+            return found
+        found |= more
+
+
+class StageGraph:
+    """
+    A small DAG of pipeline stages run on a thread pool.
+
+    Each stage is ``func(results)`` where ``results`` maps already finished stage
+    names to their return values. A stage starts as soon as all of its
+    dependencies have finished, so independent stages overlap and the total
+    latency approaches the critical path.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, Dict] = {}
+        self.timings: List[Dict] = []
+
+    def add(self, name: str, func: Callable[[Dict[str, Any]], Any], deps: Iterable[str] = ()) -> None:
+        if name in self._stages:
+            raise ValueError(f"Stage '{name}' is already defined.")
+        deps = list(deps)
+        for dep in deps:
+            if dep not in self._stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dep}'.")
+        self._stages[name] = {"func": func, "deps": deps}
+
+    def run(self, max_workers: int = 4) -> Dict[str, Any]:
+        results: Dict[str, Any] = {}
+        pending = dict(self._stages)
+        running = {}
+        started_at = time.perf_counter()
+        self.timings = []
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            while pending or running:
+                ready = [
+                    name
+                    for name, stage in pending.items()
+                    if all(dep in results for dep in stage["deps"])
+                ]
+                for name in ready:
+                    stage = pending.pop(name)
+                    # Stages only see results of finished stages; pass a snapshot.
+                    running[pool.submit(self._run_stage, name, stage["func"], dict(results), started_at)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    value, timing = future.result()
+                    results[name] = value
+                    self.timings.append(timing)
+
+        return results
+
+    def _run_stage(self, name: str, func: Callable, results: Dict[str, Any], started_at: float):
+        start = time.perf_counter()
+        try:
+            value = func(results)
+        except Exception as exc:
+            raise RuntimeError(f"Stage '{name}' failed: {exc}") from exc
+        end = time.perf_counter()
+        return value, {
+            "stage": name,
+            "start": start - started_at,
+            "end": end - started_at,
+            "seconds": end - start,
+        }
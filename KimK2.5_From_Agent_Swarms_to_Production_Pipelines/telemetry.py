@@ -0,0 +1,140 @@
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from config import Config
+
+
+def request_bytes(request: Dict) -> int:
+    # Bytes of message content sent: prompt text plus image data URLs.
+    total = 0
+    for message in request.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            total += len(content.encode("utf-8"))
+            continue
+        for part in content or []:
+            if part.get("type") == "text":
+                total += len(part["text"].encode("utf-8"))
+            elif part.get("type") == "image_url":
+                total += len(part["image_url"]["url"])
+    return total
+
+
+def usage_cost(prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    # Cached tokens are a subset of prompt_tokens billed at the cache rate.
+    cached_tokens = min(cached_tokens, prompt_tokens)
+    return (
+        ((prompt_tokens - cached_tokens) / 1_000_000) * Config.COST_PER_M_INPUT
+        + (cached_tokens / 1_000_000) * Config.COST_PER_M_CACHED_INPUT
+        + (completion_tokens / 1_000_000) * Config.COST_PER_M_OUTPUT
+    )
+
+
+def billed_usage(result: Dict) -> Dict:
+    # The reply's usage plus that of empty completions the scheduler retried.
+    usage = dict(result.get("usage") or {})
+    for name, tokens in result.get("call", {}).get("discarded_usage", {}).items():
+        usage[name] = int(usage.get(name, 0) or 0) + tokens
+    return usage
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    # Linear interpolation between closest ranks (numpy's default).
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class CallTelemetry:
+    """
+    One JSON record per API call, appended to ``path`` as it happens.
+
+    The file is truncated when the first record of a run is written, so it
+    always describes the latest run in that output directory.
+    """
+
+    def __init__(self, path: str = None, **common):
+        self.path = Path(path) if path else None
+        self.common = common
+        self.records: List[Dict] = []
+        self._lock = threading.Lock()
+        self._started = False
+
+    def record(self, stage: str, result: Dict) -> Dict:
+        call = result.get("call", {})
+        usage = billed_usage(result)
+        stream = result.get("stream") or {}
+        record = {
+            **self.common,
+            "stage": stage,
+            "model": result.get("model") or call.get("model", ""),
+            "started_at": call.get("started_at", time.time()),
+            "latency_seconds": call.get("latency_seconds", 0.0),
+            "ttft_seconds": stream.get("ttft_seconds"),
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "cached_tokens": usage.get("cached_tokens", 0),
+            "retries": call.get("retries", 0),
+            "retry_wait_seconds": call.get("retry_wait_seconds", 0.0),
+            "bytes_uploaded": call.get("bytes_uploaded", 0),
+            "cache_hit": bool(result.get("cache_hit")),
+            "status": "interrupted" if result.get("interrupted") else "ok",
+        }
+        with self._lock:
+            self.records.append(record)
+            if self.path:
+                mode = "a" if self._started else "w"
+                self._started = True
+                with open(self.path, mode, encoding="utf-8") as file:
+                    file.write(json.dumps(record) + "\n")
+        return record
+
+
+def summarize(records: List[Dict]) -> Dict[str, Dict]:
+    # Per-stage p50/p95 latency and TTFT plus totals; cache hits are excluded
+    # from latency percentiles since they never reached the API.
+    by_stage: Dict[str, List[Dict]] = {}
+    for record in records:
+        by_stage.setdefault(record["stage"], []).append(record)
+
+    summary = {}
+    for stage, items in by_stage.items():
+        latencies = [r["latency_seconds"] for r in items if not r["cache_hit"]]
+        ttfts = [r["ttft_seconds"] for r in items if r.get("ttft_seconds") is not None]
+        summary[stage] = {
+            "calls": len(items),
+            "cache_hits": sum(1 for r in items if r["cache_hit"]),
+            "latency_p50": percentile(latencies, 0.5),
+            "latency_p95": percentile(latencies, 0.95),
+            "ttft_p50": percentile(ttfts, 0.5),
+            "ttft_p95": percentile(ttfts, 0.95),
+            "prompt_tokens": sum(r["prompt_tokens"] for r in items),
+            "completion_tokens": sum(r["completion_tokens"] for r in items),
+            "cached_tokens": sum(r["cached_tokens"] for r in items),
+            "retries": sum(r["retries"] for r in items),
+            "bytes_uploaded": sum(r["bytes_uploaded"] for r in items),
+        }
+    return summary
+
+
+def print_summary(summary: Dict[str, Dict]) -> None:
+    def seconds(value: Optional[float]) -> str:
+        return "-" if value is None else f"{value:.1f}s"
+
+    print(
+        f"   {'stage':<14}{'calls':>6}{'p50':>8}{'p95':>8}{'ttft p50':>10}"
+        f"{'in tok':>10}{'out tok':>9}{'retries':>9}{'upload MB':>11}"
+    )
+    for stage, s in sorted(summary.items(), key=lambda item: -(item[1]["latency_p95"] or 0)):
+        print(
+            f"   {stage:<14}{s['calls']:>6}{seconds(s['latency_p50']):>8}{seconds(s['latency_p95']):>8}"
+            f"{seconds(s['ttft_p50']):>10}{s['prompt_tokens']:>10,}{s['completion_tokens']:>9,}"
+            f"{s['retries']:>9}{s['bytes_uploaded'] / 1_000_000:>11.2f}"
+        )
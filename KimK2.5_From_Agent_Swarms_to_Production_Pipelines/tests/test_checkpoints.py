@@ -0,0 +1,75 @@
+import pytest
+
+from checkpoints import CheckpointStore, fingerprint
+from stage_graph import downstream
+
+
+STAGES = {
+    "frames": [],
+    "analysis": ["frames"],
+    "ocr": ["frames"],
+    "docs": ["analysis"],
+    "qa": ["analysis", "ocr"],
+}
+
+
+def _run_all(store, counts, changed=""):
+    for stage in STAGES:
+        def func(stage=stage):
+            counts[stage] = counts.get(stage, 0) + 1
+            return f"{stage} result"
+        store.run(stage, fingerprint(stage, changed if stage == "docs" else ""), func)
+
+
+def test_downstream_follows_transitive_dependents():
+    assert downstream(STAGES, "frames") == set(STAGES)
+    assert downstream(STAGES, "ocr") == {"ocr", "qa"}
+    assert downstream(STAGES, "docs") == {"docs"}
+
+
+def test_resume_skips_unchanged_stages(tmp_path):
+    counts = {}
+    _run_all(CheckpointStore(str(tmp_path), STAGES), counts)
+    store = CheckpointStore(str(tmp_path), STAGES, resume=True)
+    _run_all(store, counts, changed="new prompt")
+
+    assert counts == {"frames": 1, "analysis": 1, "ocr": 1, "docs": 2, "qa": 1}
+    assert sorted(store.resumed) == ["analysis", "frames", "ocr", "qa"]
+
+
+def test_without_resume_everything_recomputes(tmp_path):
+    counts = {}
+    _run_all(CheckpointStore(str(tmp_path), STAGES), counts)
+    _run_all(CheckpointStore(str(tmp_path), STAGES), counts)
+    assert set(counts.values()) == {2}
+
+
+def test_from_stage_forces_only_downstream(tmp_path):
+    counts = {}
+    _run_all(CheckpointStore(str(tmp_path), STAGES), counts)
+    store = CheckpointStore(str(tmp_path), STAGES, from_stage="ocr")
+    _run_all(store, counts)
+
+    assert counts == {"frames": 1, "analysis": 1, "ocr": 2, "docs": 1, "qa": 2}
+    with pytest.raises(ValueError):
+        CheckpointStore(str(tmp_path), STAGES, from_stage="nope")
+
+
+def test_missing_outputs_and_incomplete_stages_recompute(tmp_path):
+    output = tmp_path / "frames.json"
+    output.write_text("[]")
+    store = CheckpointStore(str(tmp_path), STAGES)
+    store.run("frames", "fp", lambda: 1, outputs=[str(output)])
+
+    def partial():
+        store.mark_incomplete("analysis")
+        return "partial"
+
+    store.run("analysis", "fp", partial)
+    output.unlink()
+
+    calls = []
+    store = CheckpointStore(str(tmp_path), STAGES, resume=True)
+    store.run("frames", "fp", lambda: calls.append("frames"))
+    store.run("analysis", "fp", lambda: calls.append("analysis"))
+    assert calls == ["frames", "analysis"]
@@ -0,0 +1,85 @@
+import pytest
+
+from config import Config
+from cost_governor import CostGovernor, CostLimitExceeded, estimate_video_tokens
+from telemetry import usage_cost
+
+
+@pytest.fixture(autouse=True)
+def prices(monkeypatch):
+    # $1 per 1M tokens in and out keeps the arithmetic readable.
+    monkeypatch.setattr(Config, "COST_PER_M_INPUT", 1.0)
+    monkeypatch.setattr(Config, "COST_PER_M_OUTPUT", 1.0)
+    monkeypatch.setattr(Config, "COST_PER_M_CACHED_INPUT", 0.25)
+    monkeypatch.setattr(Config, "COST_MIN_MAX_TOKENS", 100)
+
+
+def _governor(tmp_path, **limits):
+    return CostGovernor(video="v.mp4", run_id="run", ledger_path=str(tmp_path / "ledger.sqlite3"), **limits)
+
+
+def _request(max_tokens=1000):
+    return {"model": "m", "messages": [{"role": "user", "content": "x" * 400}], "max_tokens": max_tokens}
+
+
+def test_estimate_video_tokens_prefers_duration(monkeypatch):
+    monkeypatch.setattr(Config, "COST_VIDEO_TOKENS_PER_SECOND", 10)
+    monkeypatch.setattr(Config, "COST_VIDEO_TOKENS_PER_MB", 100)
+    assert estimate_video_tokens(60, 5 * 1024 * 1024) == 600
+    assert estimate_video_tokens(0, 5 * 1024 * 1024) == 500
+
+
+def test_media_tokens_are_part_of_the_prediction(tmp_path):
+    governor = _governor(tmp_path, per_video=1.0)
+    plain = governor.predict(_request())
+    with_video = governor.predict(_request(), media_tokens=5000)
+    assert with_video["prompt_tokens"] == plain["prompt_tokens"] + 5000
+
+
+def test_admit_then_settle_to_billed_usage(tmp_path):
+    governor = _governor(tmp_path, per_video=1.0)
+    request, reservation = governor.admit(_request())
+    assert request["max_tokens"] == 1000
+    governor.settle(reservation, {"prompt_tokens": 300, "completion_tokens": 200})
+    summary = governor.summary()
+    assert summary["spent"]["video"] == pytest.approx(usage_cost(300, 200))
+    assert summary["admitted"] == 1
+
+
+def test_admit_lowers_max_tokens_to_the_headroom(tmp_path):
+    governor = _governor(tmp_path, per_video=0.0006)
+    prompt_tokens = governor.predict(_request())["prompt_tokens"]
+    request, _ = governor.admit(_request())
+    assert request["max_tokens"] == pytest.approx(600 - prompt_tokens, abs=1)
+    assert governor.summary()["downgraded"] == 1
+
+
+def test_admit_refuses_below_the_minimum_max_tokens(tmp_path):
+    governor = _governor(tmp_path, per_video=0.0001)
+    with pytest.raises(CostLimitExceeded):
+        governor.admit(_request())
+    assert governor.summary()["refused"] == 1
+
+
+def test_in_flight_reservations_count_until_settled(tmp_path):
+    governor = _governor(tmp_path, per_video=0.0023)
+    governor.admit(_request())
+    _, second = governor.admit(_request())
+    # The third call no longer fits next to two reserved ones...
+    with pytest.raises(CostLimitExceeded):
+        governor.admit(_request())
+    # ...until a failed call gives its reservation back.
+    governor.settle(second, None)
+    request, _ = governor.admit(_request())
+    assert request["max_tokens"] == 1000
+
+
+def test_batch_ceiling_is_shared_through_the_ledger(tmp_path):
+    first = _governor(tmp_path, per_batch=0.0015)
+    other = CostGovernor(
+        video="w.mp4", run_id="run", ledger_path=str(tmp_path / "ledger.sqlite3"), per_batch=0.0015
+    )
+    _, reservation = first.admit(_request())
+    first.settle(reservation, {"prompt_tokens": 100, "completion_tokens": 1400})
+    with pytest.raises(CostLimitExceeded):
+        other.admit(_request())
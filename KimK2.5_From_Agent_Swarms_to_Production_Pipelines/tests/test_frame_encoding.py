@@ -0,0 +1,20 @@
+import numpy as np
+
+from frame_encoding import encode_frame, estimate_image_tokens, resize_long_edge
+
+
+def test_default_encoding_keeps_native_resolution():
+    frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    _, width, height = encode_frame(frame, text_legible=False)
+    assert (width, height) == (1920, 1080)
+
+
+def test_opt_in_downscale_keeps_aspect_ratio():
+    frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+    assert resize_long_edge(frame, 960).shape[:2] == (540, 960)
+    _, width, height = encode_frame(frame, max_long_edge=1568, quality=85, text_legible=False)
+    assert (width, height) == (1568, 882)
+
+
+def test_image_tokens_use_28px_tiles():
+    assert estimate_image_tokens(1568, 882) == 56 * 32
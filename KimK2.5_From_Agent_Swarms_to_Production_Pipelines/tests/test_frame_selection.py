@@ -0,0 +1,44 @@
+import cv2
+import numpy as np
+
+from frame_selection import dedupe_frames, scene_change_scores, select_change_points
+
+
+def _frame(index, image):
+    ok, buffer = cv2.imencode(".png", image)
+    assert ok
+    return {"index": index, "timestamp": f"00:0{index}", "jpeg": buffer.tobytes()}
+
+
+def _gradient(flip=False):
+    image = np.tile(np.arange(0, 256, 2, dtype=np.uint8), (96, 1))
+    return image[:, ::-1].copy() if flip else image
+
+
+def test_dedupe_collapses_runs_and_keeps_spans():
+    a, b = _gradient(), _gradient(flip=True)
+    frames = [_frame(0, a), _frame(1, a), _frame(2, b), _frame(3, b), _frame(4, a)]
+
+    kept = dedupe_frames(frames, max_distance=4)
+
+    assert [f["index"] for f in kept] == [0, 2, 4]
+    assert (kept[0]["span_start"], kept[0]["span_end"], kept[0]["duplicates"]) == ("00:00", "00:01", 1)
+    assert (kept[1]["span_start"], kept[1]["span_end"], kept[1]["duplicates"]) == ("00:02", "00:03", 1)
+    assert kept[2]["duplicates"] == 0
+
+
+def test_dedupe_with_zero_distance_keeps_distinct_frames():
+    frames = [_frame(0, _gradient()), _frame(1, _gradient(flip=True))]
+    assert len(dedupe_frames(frames, max_distance=0)) == 2
+    assert dedupe_frames([], max_distance=4) == []
+
+
+def test_change_points_keep_first_frame_and_respect_gap():
+    scores = np.array([1.0, 0.9, 0.8, 0.05, 0.7], dtype=np.float32)
+    assert select_change_points(scores, budget=3, threshold=0.5, min_gap=2) == [0, 2, 4]
+    assert select_change_points(scores, budget=0, threshold=0.5) == []
+
+
+def test_identical_thumbnails_score_zero():
+    thumbs = np.zeros((3, 36, 64), dtype=np.uint8)
+    assert scene_change_scores(thumbs).tolist() == [1.0, 0.0, 0.0]
@@ -0,0 +1,69 @@
+import httpx
+
+import openrouter_client
+from openrouter_client import KimiK25MoonshotClient
+from moonshot_video import preflight_video
+from response_cache import ResponseCache
+
+
+class FakeOpenAI:
+    def with_options(self, **kwargs):
+        return self
+
+
+def _client(monkeypatch, tmp_path):
+    monkeypatch.setattr(openrouter_client, "moonshot_client", lambda: FakeOpenAI())
+    kimi = KimiK25MoonshotClient(cache=ResponseCache(str(tmp_path / "cache")), use_cache=True)
+    kimi.scheduler.base_delay = 0
+    return kimi
+
+
+def _server_error() -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.moonshot.ai/v1/chat/completions")
+    return httpx.HTTPStatusError("503", request=request, response=httpx.Response(503, request=request))
+
+
+def test_analyze_video_retries_and_caches(monkeypatch, tmp_path):
+    kimi = _client(monkeypatch, tmp_path)
+    sent, opened = [], []
+
+    def video_completion(client, video_path, prompt, mode=None, **params):
+        sent.append(params)
+        if len(sent) == 1:
+            raise _server_error()
+        return {
+            "content": "1. Step",
+            "usage": {"prompt_tokens": 10, "completion_tokens": 2},
+            "call": {"bytes_uploaded": 5},
+        }
+
+    monkeypatch.setattr(openrouter_client, "video_completion", video_completion)
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"video")
+
+    def open_video():
+        opened.append(video)
+        return video
+
+    source = {"path": str(video), "size": 5}
+    first = kimi.analyze_video("Describe", source, open_video)
+    assert first["content"] == "1. Step"
+    assert first["call"]["retries"] == 1
+    assert first["call"]["bytes_uploaded"] == 5
+    assert sent[-1]["model"] == "kimi-k2.5" and sent[-1]["temperature"] == 1
+
+    second = kimi.analyze_video("Describe", source, open_video)
+    assert second["cache_hit"] and second["content"] == "1. Step"
+    assert second["usage"]["prompt_tokens"] == 0
+    # The video is neither opened (preflighted, cut) nor sent again.
+    assert len(opened) == 1 and len(sent) == 2
+
+    kimi.analyze_video("Describe", {**source, "start": 60.0, "end": 120.0}, open_video)
+    assert len(opened) == 2
+
+
+def test_preflight_sends_original_when_disabled_or_under_limit(tmp_path):
+    video = tmp_path / "big.mp4"
+    video.write_bytes(b"\0" * (2 * 1024 * 1024))
+    assert preflight_video(video, tmp_path / "work", max_mb=0) == video
+    assert preflight_video(video, tmp_path / "work", max_mb=5) == video
@@ -0,0 +1,56 @@
+import pytest
+
+from openrouter_client import _KimiK25RequestBuilder
+from prompt_budget import PromptBudget, section, step_list
+
+
+WORKFLOW = "Step one:   open the editor.\n\n\n\nStep two: run it.   " * 40
+
+
+def _workflow_section(text=WORKFLOW):
+    return section(
+        ("original", text),
+        ("lossless", " ".join(text.split())),
+        ("steps", step_list(["Open the editor.", "Run it."])),
+    )
+
+
+def test_section_drops_variants_that_are_not_smaller():
+    variants = section(("original", "abc"), ("lossless", "abcd"), ("steps", "a"))
+    assert [label for label, _ in variants] == ["original", "steps"]
+
+
+def test_modes_pick_expected_variant():
+    assert PromptBudget("off").fit("summary", {"workflow": _workflow_section()})["workflow"] == WORKFLOW
+    lossless = PromptBudget("lossless").fit("summary", {"workflow": _workflow_section()})
+    assert lossless["workflow"] == " ".join(WORKFLOW.split())
+    budget = PromptBudget("budget", max_tokens=50).fit("summary", {"workflow": _workflow_section()})
+    assert budget["workflow"].startswith("1. Open the editor.")
+    with pytest.raises(ValueError):
+        PromptBudget("aggressive")
+
+
+def test_variant_is_chosen_once_per_run():
+    budget = PromptBudget("budget", max_tokens=50)
+    first = budget.fit("summary", {"workflow": _workflow_section()})
+    # A later stage with a different section list still sends the same text.
+    later = budget.fit(
+        "answers",
+        {"workflow": _workflow_section(), "code": section(("original", "[]"))},
+    )
+    assert later["workflow"] == first["workflow"]
+    summary = budget.summary()
+    assert summary["calls"] == 2
+    assert summary["saved_tokens"] > 0
+    assert set(budget.stage_savings()) == {"summary", "answers"}
+
+
+def test_shared_context_prefix_is_identical_across_calls():
+    builder = _KimiK25RequestBuilder(use_cache=False)
+    builder.cache_hints = True
+    summary = builder._shared_context_messages("Summarize.", "ctx", "steps")
+    answers = builder._shared_context_messages("Answer.", "ctx", "steps", "[code]")
+
+    assert summary[0]["content"][0] == answers[0]["content"][0]
+    assert answers[0]["content"][1]["text"] == "Code samples:\n[code]"
+    assert summary[-1]["content"] != answers[-1]["content"]
@@ -0,0 +1,122 @@
+import asyncio
+
+import httpx
+import pytest
+
+from request_scheduler import RequestScheduler, TokenBucket, retry_after_seconds
+
+
+REQUEST = {"model": "test-model", "messages": [{"role": "user", "content": "hi"}], "max_tokens": 10}
+
+
+def _status_error(code: int, headers: dict = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://example.test/v1/chat/completions")
+    response = httpx.Response(code, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def _scheduler(**kwargs) -> RequestScheduler:
+    kwargs.setdefault("max_retries", 4)
+    kwargs.setdefault("base_delay", 0)
+    kwargs.setdefault("empty_retry_budget", 2)
+    return RequestScheduler(**kwargs)
+
+
+def _sender(outcomes):
+    outcomes = list(outcomes)
+    calls = []
+
+    def send():
+        calls.append(1)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return dict(outcome)
+
+    return send, calls
+
+
+def test_retries_server_errors_then_succeeds():
+    scheduler = _scheduler()
+    send, calls = _sender([_status_error(503), _status_error(429), {"content": "ok"}])
+
+    result = scheduler.call(REQUEST, send)
+
+    assert result["content"] == "ok"
+    assert result["call"]["retries"] == 2
+    assert len(calls) == 3
+    stats = scheduler.stats()
+    assert (stats["server_errors"], stats["rate_limited"], stats["retries"]) == (1, 1, 2)
+
+
+def test_client_errors_and_exhausted_retries_raise():
+    send, calls = _sender([_status_error(400)])
+    with pytest.raises(httpx.HTTPStatusError):
+        _scheduler().call(REQUEST, send)
+    assert len(calls) == 1
+
+    send, calls = _sender([_status_error(500)] * 3)
+    with pytest.raises(httpx.HTTPStatusError):
+        _scheduler(max_retries=2).call(REQUEST, send)
+    assert len(calls) == 3
+
+
+def test_retry_after_headers():
+    assert retry_after_seconds(_status_error(429, {"retry-after": "7"})) == 7.0
+    assert retry_after_seconds(_status_error(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after_seconds(_status_error(429, {"retry-after": "soon"})) is None
+    assert retry_after_seconds(_status_error(429)) is None
+    assert retry_after_seconds(ValueError("no response")) is None
+
+
+def test_empty_retries_record_discarded_usage():
+    usage = {"prompt_tokens": 100, "completion_tokens": 0, "cached_tokens": 0}
+    send, _ = _sender([{"content": "", "usage": usage}, {"content": "done", "usage": usage}])
+
+    result = _scheduler().call(REQUEST, send)
+
+    assert result["content"] == "done"
+    assert result["call"]["retries"] == 1
+    assert result["call"]["discarded_usage"]["prompt_tokens"] == 100
+
+
+def test_empty_retry_budget_is_per_call():
+    scheduler = _scheduler(empty_retry_budget=1)
+    for _ in range(3):
+        send, calls = _sender([{"content": ""}, {"content": "ok"}])
+        assert scheduler.call(REQUEST, send)["content"] == "ok"
+        assert len(calls) == 2
+    assert scheduler.stats()["empty_retries"] == 3
+
+    send, calls = _sender([{"content": ""}, {"content": ""}, {"content": "late"}])
+    assert scheduler.call(REQUEST, send)["content"] == ""
+    assert len(calls) == 2
+
+
+def test_empty_retries_can_be_disabled():
+    send, calls = _sender([{"content": ""}])
+    assert _scheduler().call(REQUEST, send, retry_empty=False)["content"] == ""
+    assert len(calls) == 1
+
+
+def test_async_call_retries():
+    outcomes = [_status_error(502), {"content": ""}, {"content": "ok"}]
+
+    async def send():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return dict(outcome)
+
+    result = asyncio.run(_scheduler().call_async(REQUEST, send))
+    assert result["content"] == "ok"
+    assert result["call"]["retries"] == 2
+
+
+def test_token_bucket_waits_once_burst_is_spent():
+    bucket = TokenBucket(rate=1.0, capacity=2)
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == 0
+    assert bucket.reserve(1) == pytest.approx(1.0, abs=0.05)
+    # Oversized requests only wait for a full bucket.
+    assert TokenBucket(rate=10.0, capacity=5).reserve(100) == 0
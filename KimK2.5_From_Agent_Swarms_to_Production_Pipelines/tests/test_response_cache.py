@@ -0,0 +1,79 @@
+import json
+import os
+import time
+
+from response_cache import ResponseCache
+
+
+REQUEST = {
+    "model": "moonshotai/kimi-k2.5",
+    "messages": [{"role": "user", "content": "Summarize the video."}],
+    "temperature": 0.6,
+    "max_tokens": 100,
+}
+
+
+def _cache(tmp_path, **kwargs) -> ResponseCache:
+    kwargs.setdefault("max_bytes", 0)
+    kwargs.setdefault("ttl_seconds", 0)
+    return ResponseCache(str(tmp_path / "cache"), **kwargs)
+
+
+def test_put_then_get_round_trips(tmp_path):
+    cache = _cache(tmp_path)
+    key = cache.key(REQUEST)
+    assert cache.get(key) is None
+
+    cache.put(key, {"content": "summary"})
+
+    assert cache.get(key) == {"content": "summary"}
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert ResponseCache(str(tmp_path / "cache")).get(key) == {"content": "summary"}
+
+
+def test_key_ignores_headers_but_not_output_fields(tmp_path):
+    cache = _cache(tmp_path)
+    key = cache.key(REQUEST)
+    assert cache.key({**REQUEST, "extra_headers": {"X-Title": "other"}}) == key
+    assert cache.key({**REQUEST, "max_tokens": 200}) != key
+    assert cache.key({**REQUEST, "model": "other"}) != key
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = _cache(tmp_path, ttl_seconds=60)
+    key = cache.key(REQUEST)
+    cache.put(key, {"content": "old"})
+    path = cache._path(key)
+    path.write_text(json.dumps({"created_at": time.time() - 120, "result": {"content": "old"}}))
+
+    assert cache.get(key) is None
+    assert not path.exists()
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    cache = _cache(tmp_path, max_bytes=10_000)
+    keys = [cache.key({**REQUEST, "max_tokens": n}) for n in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, {"content": "x" * 3000})
+        stamp = time.time() - 100 + age
+        os.utime(cache._path(key), (stamp, stamp))
+    cache.get(keys[0])
+
+    cache.put(cache.key({**REQUEST, "max_tokens": 99}), {"content": "x" * 3000})
+
+    assert cache.get(keys[0]) is not None
+    assert not cache._path(keys[1]).exists()
+    assert cache.stats()["bytes"] <= 10_000
+
+
+def test_get_survives_entry_removed_after_read(tmp_path, monkeypatch):
+    cache = _cache(tmp_path)
+    key = cache.key(REQUEST)
+    cache.put(key, {"content": "summary"})
+
+    def evicted(path, *args, **kwargs):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(os, "utime", evicted)
+    assert cache.get(key) == {"content": "summary"}
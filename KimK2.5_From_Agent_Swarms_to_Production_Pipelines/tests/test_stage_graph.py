@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+
+from stage_graph import StageGraph
+
+
+def test_stages_receive_dependency_results():
+    graph = StageGraph()
+    graph.add("a", lambda r: 1)
+    graph.add("b", lambda r: r["a"] + 1, deps=["a"])
+    graph.add("c", lambda r: r["a"] + r["b"], deps=["a", "b"])
+
+    assert graph.run() == {"a": 1, "b": 2, "c": 3}
+    assert {t["stage"] for t in graph.timings} == {"a", "b", "c"}
+
+
+def test_independent_stages_overlap():
+    barrier = threading.Barrier(2, timeout=5)
+    graph = StageGraph()
+    graph.add("left", lambda r: barrier.wait())
+    graph.add("right", lambda r: barrier.wait())
+
+    # Each stage blocks until the other has started, so this only finishes
+    # when both run at the same time.
+    assert set(graph.run(max_workers=2)) == {"left", "right"}
+
+
+def test_definition_errors():
+    graph = StageGraph()
+    graph.add("a", lambda r: None)
+    with pytest.raises(ValueError):
+        graph.add("a", lambda r: None)
+    with pytest.raises(ValueError):
+        graph.add("b", lambda r: None, deps=["missing"])
+
+
+def test_failures_name_the_stage():
+    graph = StageGraph()
+    graph.add("broken", lambda r: 1 / 0)
+    with pytest.raises(RuntimeError, match="Stage 'broken' failed"):
+        graph.run()
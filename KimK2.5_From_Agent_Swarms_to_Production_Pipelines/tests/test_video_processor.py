@@ -0,0 +1,35 @@
+import cv2
+import numpy as np
+
+from video_processor import VideoFrameExtractor
+
+
+def _write_video(path, fps=10, scenes=((0, 30), (255, 30), (128, 20))):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (64, 48))
+    assert writer.isOpened()
+    for level, count in scenes:
+        for _ in range(count):
+            writer.write(np.full((48, 64, 3), level, dtype=np.uint8))
+    writer.release()
+
+
+def test_scene_selection_keeps_one_frame_per_scene(tmp_path):
+    video = tmp_path / "scenes.mp4"
+    _write_video(video)
+    extractor = VideoFrameExtractor(str(video), str(tmp_path / "frames"), frame_storage="memory", shards=1)
+
+    frames = extractor.extract_key_frames(max_frames=10, sampling_mode="seek", selection="scene")
+
+    assert [f["timestamp"] for f in frames] == [0.0, 3.0, 6.0]
+    assert all("scene_score" in f for f in frames)
+
+
+def test_scene_selection_respects_frame_budget(tmp_path):
+    video = tmp_path / "scenes.mp4"
+    _write_video(video)
+    extractor = VideoFrameExtractor(str(video), str(tmp_path / "frames"), frame_storage="memory", shards=1)
+
+    frames = extractor.extract_key_frames(max_frames=2, sampling_mode="seek", selection="scene")
+
+    assert len(frames) == 2
+    assert frames[0]["timestamp"] == 0.0
@@ -0,0 +1,96 @@
+import pytest
+
+import video_segments
+from video_segments import plan_segments, shift_timestamps, stitch_segments
+
+
+def test_plan_segments_short_video_is_one_segment():
+    assert plan_segments(90, 120, 10) == [{"index": 1, "start": 0.0, "end": 90}]
+
+
+def test_plan_segments_overlap_and_tail():
+    segments = plan_segments(300, 120, 10)
+    assert [(s["start"], s["end"]) for s in segments] == [(0, 120), (110, 230), (220, 300)]
+
+
+def test_plan_segments_folds_short_tail_into_last_segment():
+    segments = plan_segments(235, 120, 10)
+    assert segments[-1]["end"] == 235
+    assert len(segments) == 2
+
+
+def test_plan_segments_unknown_duration_raises():
+    with pytest.raises(ValueError):
+        plan_segments(0.0, 120, 10)
+
+
+def test_shift_timestamps():
+    assert shift_timestamps("1. [00:05] Open the editor", 110) == "1. [01:55] Open the editor"
+    assert shift_timestamps("at 59:30", 60) == "at 1:00:30"
+
+
+def test_stitch_segments_drops_steps_owned_by_the_other_side():
+    segments = [
+        {"start": 0, "end": 120, "analysis": "1. [00:10] A\n2. [01:52] B"},
+        {"start": 110, "end": 230, "analysis": "1. [01:53] B again\n2. [02:30] C"},
+    ]
+    assert stitch_segments(segments) == "1. [00:10] A\n2. [01:52] B\n3. [02:30] C"
+
+
+class FakeKimi:
+    def __init__(self):
+        self.paths, self.prompts, self.sources = [], [], []
+
+    def analyze_video(self, prompt, source, open_video, mode=None):
+        self.prompts.append(prompt)
+        self.sources.append(source)
+        self.paths.append(open_video())
+        return {"content": "1. [00:01] Step", "usage": {}}
+
+    def merge_workflow_analyses(self, windows, overlap_seconds=0.0):
+        return {"content": "1. [00:01] Merged", "usage": {}}
+
+
+def _fake_video(monkeypatch, tmp_path, duration):
+    transcoded = []
+
+    def transcode(src, dst, **kwargs):
+        transcoded.append((kwargs["start"], kwargs["end"]))
+        return dst
+
+    monkeypatch.setattr(video_segments, "video_duration", lambda path: duration)
+    monkeypatch.setattr(video_segments, "transcode_video", transcode)
+    monkeypatch.setattr(video_segments, "preflight_video", lambda path, work_dir: path)
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"")
+    return video, transcoded
+
+
+def test_analyze_segmented_unknown_duration_sends_whole_video(monkeypatch, tmp_path):
+    video, transcoded = _fake_video(monkeypatch, tmp_path, 0.0)
+    kimi = FakeKimi()
+    merged, results = video_segments.analyze_segmented(kimi, video, "Describe", tmp_path, segment_seconds=60)
+    assert transcoded == []
+    assert kimi.paths == [video]
+    assert kimi.prompts == ["Describe"]
+    assert merged == "1. [00:01] Step"
+
+
+def test_analyze_segmented_single_segment_is_not_reencoded(monkeypatch, tmp_path):
+    video, transcoded = _fake_video(monkeypatch, tmp_path, 30.0)
+    kimi = FakeKimi()
+    video_segments.analyze_segmented(kimi, video, "Describe", tmp_path, segment_seconds=60)
+    assert transcoded == []
+    assert kimi.paths == [video]
+
+
+def test_analyze_segmented_cuts_and_merges(monkeypatch, tmp_path):
+    video, transcoded = _fake_video(monkeypatch, tmp_path, 150.0)
+    kimi = FakeKimi()
+    merged, results = video_segments.analyze_segmented(
+        kimi, video, "Describe", tmp_path, segment_seconds=60, overlap_seconds=10
+    )
+    assert sorted(transcoded) == [(s["start"], s["end"]) for s in results]
+    # Segments are cached by source file and range.
+    assert sorted((s["start"], s["end"]) for s in kimi.sources) == sorted(transcoded)
+    assert merged == "1. [00:01] Merged"
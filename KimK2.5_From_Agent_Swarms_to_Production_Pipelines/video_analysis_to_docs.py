@@ -1,23 +1,9 @@
 import argparse
-import json
-import re
 from pathlib import Path
-from openrouter_client import KimiK25OpenRouterClient
 
-
-def _extract_html(content: str) -> str:
-    text = content.strip()
-    if not text:
-        return "<!doctype html>\n<html><body><pre></pre></body></html>"
-    fenced = re.findall(r"```(?:html)?\n(.*?)```", text, re.DOTALL | re.IGNORECASE)
-    if fenced:
-        return fenced[0].strip()
-    if text.startswith("```html") or text.startswith("```"):
-        text = re.sub(r"^```(?:html)?\n?", "", text, flags=re.IGNORECASE).strip()
-    text = re.sub(r"\n?```$", "", text).strip()
-    if "<html" in text.lower():
-        return text
-    return f"<!doctype html>\n<html><body><pre>{text}</pre></body></html>"
+from code_samples import CODE_SAMPLE_MODES
+from config import Config
+from pipeline import PIPELINE_STAGES, AnalysisFile, DocsPipeline
 
 
 def _build_arg_parser() -> argparse.ArgumentParser:
@@ -39,6 +25,37 @@ def _build_arg_parser() -> argparse.ArgumentParser:
         default="",
         help="Optional context about the tutorial.",
     )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=Config.CODE_SAMPLE_MAX_STEPS,
+        help="Max number of steps to generate code samples for (0 = all; default CODE_SAMPLE_MAX_STEPS).",
+    )
+    parser.add_argument(
+        "--code-samples",
+        choices=CODE_SAMPLE_MODES,
+        default=None,
+        help=(
+            "chained: each step builds on the previous step's code (serial). "
+            "parallel: all steps from a shared skeleton, then one reconciliation pass."
+        ),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk response cache (RESPONSE_CACHE_DIR) for this run.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse checkpointed stages from a previous run whose inputs are unchanged.",
+    )
+    parser.add_argument(
+        "--from-stage",
+        choices=PIPELINE_STAGES,
+        default=None,
+        help="Recompute this stage and every stage downstream of it; the rest resume. Implies --resume.",
+    )
     return parser
 
 
@@ -48,84 +65,17 @@ def main() -> None:
     if not analysis_path.exists():
         raise FileNotFoundError(f"Analysis file not found: {analysis_path}")
 
-    output_dir = Path(args.output_dir)
-    output_dir.mkdir(exist_ok=True)
-
-    analysis_text = analysis_path.read_text(encoding="utf-8")
-    client = KimiK25OpenRouterClient()
-
-    summary_result = client.generate_timestamped_summary(
-        frames=[],
-        workflow_steps=analysis_text,
-        context=args.context,
-    )
-    summary_path = output_dir / "summary.txt"
-    summary_path.write_text(summary_result["content"] or "", encoding="utf-8")
-
-    q_result = client.generate_questions_from_workflow(
-        frames=[],
-        workflow_steps=analysis_text,
-        context=args.context,
-    )
-    questions = [
-        line.strip()
-        for line in (q_result["content"] or "").splitlines()
-        if line.strip()
-    ]
-    questions_path = output_dir / "qa_questions.txt"
-    questions_path.write_text("\n".join(questions), encoding="utf-8")
-
-    a_result = client.answer_workflow_questions(
-        frames=[],
-        workflow_steps=analysis_text,
-        code_samples="",
-        questions=questions,
+    pipeline = DocsPipeline(
+        AnalysisFile(str(analysis_path)),
         context=args.context,
+        output_dir=args.output_dir,
+        use_cache=False if args.no_cache else None,
+        resume=args.resume,
+        from_stage=args.from_stage,
+        code_sample_mode=args.code_samples,
+        max_steps=args.max_steps,
     )
-    answers_path = output_dir / "qa_answers.txt"
-    answers_path.write_text(a_result["content"] or "", encoding="utf-8")
-
-    steps = [
-        line.strip()
-        for line in analysis_text.splitlines()
-        if line.strip().lower().startswith("step ")
-    ]
-    code_samples = []
-    for i, step in enumerate(steps[:5], 1):
-        code_result = client.generate_code_from_description(
-            step,
-            previous_code=code_samples[-1]["code"] if code_samples else "",
-            output_format="html",
-        )
-        code_samples.append(
-            {
-                "step": i,
-                "description": step,
-                "code": code_result["content"] or "",
-            }
-        )
-    code_samples_path = output_dir / "code_samples.json"
-    code_samples_path.write_text(
-        json.dumps(code_samples, indent=2), encoding="utf-8"
-    )
-
-    doc_result = client.create_interactive_documentation(
-        analysis_text,
-        json.dumps(code_samples, indent=2),
-    )
-    html = _extract_html(doc_result["content"] or "")
-    html_path = output_dir / "interactive_tutorial.html"
-    html_path.write_text(html, encoding="utf-8")
-    raw_path = output_dir / "interactive_tutorial_raw.txt"
-    raw_path.write_text(doc_result["content"] or "", encoding="utf-8")
-
-    print("✅ Generated docs from video analysis")
-    print(f"   • {summary_path}")
-    print(f"   • {questions_path}")
-    print(f"   • {answers_path}")
-    print(f"   • {code_samples_path}")
-    print(f"   • {html_path}")
-    print(f"   • {raw_path}")
+    pipeline.process(qa_auto=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,359 @@
+import importlib.util
+import json
+import shutil
+import subprocess
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import Config
+
+DECODE_BACKENDS = ("opencv", "pyav", "ffmpeg")
+
+# OpenCV reports FourCC tags; backend rules use ffprobe-style codec names.
+_FOURCC_CODECS = {
+    "avc1": "h264",
+    "avc3": "h264",
+    "h264": "h264",
+    "x264": "h264",
+    "hev1": "hevc",
+    "hvc1": "hevc",
+    "hevc": "hevc",
+    "h265": "hevc",
+    "vp09": "vp9",
+    "vp90": "vp9",
+    "vp08": "vp8",
+    "vp80": "vp8",
+    "av01": "av1",
+    "fmp4": "mpeg4",
+    "mp4v": "mpeg4",
+    "mjpg": "mjpeg",
+}
+
+
+class VideoDecoder(ABC):
+    """
+    Frame source for ``VideoFrameExtractor``.
+
+    ``position`` is the index of the next frame ``grab``/``read`` returns;
+    ``seek`` moves it to an exact frame. ``grab`` may skip the BGR conversion
+    for frames that are thrown away.
+    """
+
+    name = ""
+    fps = 0.0
+    frame_count = 0
+    position = 0
+
+    def seek(self, frame_number: int) -> bool:
+        return False
+
+    @abstractmethod
+    def grab(self) -> bool:
+        ...
+
+    @abstractmethod
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        ...
+
+    def release(self) -> None:
+        pass
+
+
+class OpenCVDecoder(VideoDecoder):
+    name = "opencv"
+
+    def __init__(self, video_path: str, threads: int = 0, hw_acceleration: bool = False):
+        params = []
+        if threads:
+            params += [cv2.CAP_PROP_N_THREADS, threads]
+        if hw_acceleration:
+            params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        if params:
+            self.cap = cv2.VideoCapture(str(video_path), cv2.CAP_FFMPEG, params)
+        else:
+            self.cap = cv2.VideoCapture(str(video_path))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.position = 0
+
+    def seek(self, frame_number: int) -> bool:
+        # OpenCV's FFmpeg backend seeks to the nearest preceding keyframe and
+        # decodes forward to the exact frame, so only one GOP is decoded.
+        if not self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number):
+            return False
+        self.position = frame_number
+        return True
+
+    def grab(self) -> bool:
+        # grab() demuxes and decodes without converting to BGR.
+        if not self.cap.grab():
+            return False
+        self.position += 1
+        return True
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        ret, frame = self.cap.read()
+        if ret:
+            self.position += 1
+        return ret, frame
+
+    def release(self) -> None:
+        self.cap.release()
+
+
+class PyAVDecoder(VideoDecoder):
+    name = "pyav"
+
+    def __init__(self, video_path: str, threads: int = 0):
+        try:
+            import av
+        except ImportError:
+            raise ImportError("The pyav decode backend needs PyAV: pip install av") from None
+
+        self.container = av.open(str(video_path))
+        self.stream = self.container.streams.video[0]
+        # Frame and slice threading; FFmpeg picks the thread count unless set.
+        self.stream.codec_context.thread_type = "AUTO"
+        if threads:
+            self.stream.codec_context.thread_count = threads
+        rate = self.stream.average_rate or self.stream.guessed_rate
+        self.fps = float(rate) if rate else 0.0
+        self.frame_count = self.stream.frames
+        if not self.frame_count and self.stream.duration:
+            self.frame_count = int(float(self.stream.duration * self.stream.time_base) * self.fps)
+        self._start = self.stream.start_time or 0
+        self._frames = self.container.decode(self.stream)
+        self._pending = None
+        self.position = 0
+
+    def _next_frame(self):
+        if self._pending is not None:
+            frame, self._pending = self._pending, None
+            return frame
+        return next(self._frames, None)
+
+    def _frame_number(self, frame) -> int:
+        return int(round(float((frame.pts - self._start) * self.stream.time_base) * self.fps))
+
+    def seek(self, frame_number: int) -> bool:
+        if self.fps <= 0:
+            return False
+        # Seek to the keyframe before the target, then decode forward to it.
+        pts = self._start + int(frame_number / self.fps / self.stream.time_base)
+        self.container.seek(pts, stream=self.stream)
+        self._frames = self.container.decode(self.stream)
+        self._pending = None
+        while True:
+            frame = next(self._frames, None)
+            if frame is None:
+                return False
+            if frame.pts is None or self._frame_number(frame) >= frame_number:
+                self._pending = frame
+                self.position = frame_number
+                return True
+
+    def grab(self) -> bool:
+        if self._next_frame() is None:
+            return False
+        self.position += 1
+        return True
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        frame = self._next_frame()
+        if frame is None:
+            return False, None
+        self.position += 1
+        return True, frame.to_ndarray(format="bgr24")
+
+    def release(self) -> None:
+        self.container.close()
+
+
+class FFmpegPipeDecoder(VideoDecoder):
+    """Raw BGR frames piped from an ``ffmpeg`` process; seeking restarts it."""
+
+    name = "ffmpeg"
+
+    def __init__(self, video_path: str, threads: int = 0, hw_acceleration: bool = False):
+        if not shutil.which("ffmpeg") or not shutil.which("ffprobe"):
+            raise RuntimeError("The ffmpeg decode backend needs ffmpeg and ffprobe on PATH.")
+        self.video_path = str(video_path)
+        self.threads = threads
+        self.hw_acceleration = hw_acceleration
+        info = ffprobe_video(video_path)
+        self.fps = info["fps"]
+        self.frame_count = info["frame_count"]
+        self.width, self.height = info["width"], info["height"]
+        self._frame_bytes = self.width * self.height * 3
+        self._scratch = bytearray(self._frame_bytes)
+        self._process = None
+        self._start(0)
+
+    def _start(self, frame_number: int) -> None:
+        self.release()
+        command = ["ffmpeg", "-loglevel", "error", "-nostdin", "-noautorotate"]
+        if self.hw_acceleration:
+            command += ["-hwaccel", "auto"]
+        if self.threads:
+            command += ["-threads", str(self.threads)]
+        if frame_number and self.fps > 0:
+            # Input seeking is exact; half a frame early so rounding keeps the target.
+            command += ["-ss", f"{(frame_number - 0.5) / self.fps:.6f}"]
+        command += ["-i", self.video_path, "-map", "0:v:0", "-an", "-f", "rawvideo", "-pix_fmt", "bgr24", "-"]
+        self._process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=self._frame_bytes
+        )
+        self.position = frame_number
+
+    def _read_into(self, buffer: bytearray) -> bool:
+        view = memoryview(buffer)
+        filled = 0
+        while filled < len(buffer):
+            count = self._process.stdout.readinto(view[filled:])
+            if not count:
+                return False
+            filled += count
+        return True
+
+    def seek(self, frame_number: int) -> bool:
+        if self.fps <= 0:
+            return False
+        self._start(frame_number)
+        return True
+
+    def grab(self) -> bool:
+        if not self._frame_bytes or not self._read_into(self._scratch):
+            return False
+        self.position += 1
+        return True
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        buffer = bytearray(self._frame_bytes)
+        if not self._frame_bytes or not self._read_into(buffer):
+            return False, None
+        self.position += 1
+        return True, np.frombuffer(buffer, dtype=np.uint8).reshape(self.height, self.width, 3)
+
+    def release(self) -> None:
+        if self._process is not None:
+            self._process.stdout.close()
+            self._process.kill()
+            self._process.wait()
+            self._process = None
+
+
+def ffprobe_video(video_path: str) -> Dict:
+    output = subprocess.run(
+        [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=codec_name,width,height,avg_frame_rate,nb_frames,duration:format=duration",
+            "-of", "json", str(video_path),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    data = json.loads(output)
+    stream = data["streams"][0]
+    num, _, den = (stream.get("avg_frame_rate") or "0/1").partition("/")
+    fps = float(num) / float(den) if float(den or 0) else 0.0
+    duration = float(stream.get("duration") or data.get("format", {}).get("duration") or 0)
+    return {
+        "codec": stream.get("codec_name", ""),
+        "width": int(stream.get("width") or 0),
+        "height": int(stream.get("height") or 0),
+        "fps": fps,
+        "frame_count": int(stream.get("nb_frames") or round(duration * fps)),
+    }
+
+
+def probe_video(video_path: str) -> Dict:
+    # Codec and container for backend selection: ffprobe when installed,
+    # otherwise the FourCC OpenCV reports.
+    container = Path(video_path).suffix.lstrip(".").lower()
+    codec = ""
+    if shutil.which("ffprobe"):
+        try:
+            codec = ffprobe_video(video_path)["codec"]
+        except (subprocess.CalledProcessError, IndexError, KeyError, ValueError):
+            codec = ""
+    if not codec:
+        cap = cv2.VideoCapture(str(video_path))
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        cap.release()
+        tag = fourcc.to_bytes(4, "little").decode("latin-1").strip("\x00 ").lower()
+        codec = _FOURCC_CODECS.get(tag, tag)
+    return {"codec": codec, "container": container}
+
+
+def available_backends() -> List[str]:
+    available = ["opencv"]
+    if importlib.util.find_spec("av") is not None:
+        available.append("pyav")
+    if shutil.which("ffmpeg") and shutil.which("ffprobe"):
+        available.append("ffmpeg")
+    return available
+
+
+def parse_backend_rules(spec: str) -> Dict[str, List[str]]:
+    # "hevc=pyav|ffmpeg,webm=pyav": codec or container -> backends in order of preference.
+    rules = {}
+    for item in (spec or "").split(","):
+        key, _, backends = item.partition("=")
+        candidates = [b.strip() for b in backends.split("|") if b.strip()]
+        for backend in candidates:
+            if backend not in DECODE_BACKENDS:
+                raise ValueError(
+                    f"Unknown decode backend '{backend}' in DECODE_BACKEND_RULES. "
+                    f"Choose from: {', '.join(DECODE_BACKENDS)}"
+                )
+        if key.strip() and candidates:
+            rules[key.strip().lower()] = candidates
+    return rules
+
+
+def select_backend(video_path: str, backend: str = None) -> str:
+    """
+    Decode backend for a video.
+
+    An explicit backend is used as is. ``auto`` looks the video's codec, then
+    its container, up in ``DECODE_BACKEND_RULES`` and takes the first listed
+    backend that is installed; anything unmatched decodes with OpenCV.
+    """
+    backend = backend or Config.DECODE_BACKEND
+    if backend not in DECODE_BACKENDS + ("auto",):
+        raise ValueError(
+            f"Unknown decode backend '{backend}'. Choose from: auto, {', '.join(DECODE_BACKENDS)}"
+        )
+    if backend != "auto":
+        return backend
+    rules = parse_backend_rules(Config.DECODE_BACKEND_RULES)
+    if not rules:
+        return "opencv"
+    info = probe_video(video_path)
+    available = available_backends()
+    for key in (info["codec"], info["container"]):
+        for candidate in rules.get(key, []):
+            if candidate in available:
+                return candidate
+    return "opencv"
+
+
+def open_decoder(
+    video_path: str,
+    backend: str = None,
+    threads: int = None,
+    hw_acceleration: bool = None,
+) -> VideoDecoder:
+    threads = Config.DECODE_THREADS if threads is None else threads
+    hw_acceleration = Config.DECODE_HW_ACCELERATION if hw_acceleration is None else hw_acceleration
+    backend = select_backend(video_path, backend)
+    if backend == "pyav":
+        return PyAVDecoder(video_path, threads)
+    if backend == "ffmpeg":
+        return FFmpegPipeDecoder(video_path, threads, hw_acceleration)
+    return OpenCVDecoder(video_path, threads, hw_acceleration)
@@ -1,48 +1,10 @@
 import argparse
-import json
-import re
 from pathlib import Path
 
-from openrouter_client import KimiK25OpenRouterClient
-from video_processor_kimi_video import analyze_video
-
-
-def _parse_steps(workflow_text: str) -> list:
-    steps = []
-    lines = [line.strip() for line in workflow_text.splitlines() if line.strip()]
-    numbered_pattern = re.compile(r"^(?:step\s*)?(\d+)[\).\:\-]\s+(.*)$", re.IGNORECASE)
-    for line in lines:
-        match = numbered_pattern.match(line)
-        if match:
-            steps.append(match.group(2).strip())
-    if steps:
-        return steps
-    paragraphs = [p.strip() for p in workflow_text.split("\n\n") if p.strip()]
-    if paragraphs:
-        return paragraphs
-    return lines
-
-
-def _extract_code(content: str) -> str:
-    fenced = re.findall(r"```(?:\w+)?\n(.*?)```", content, re.DOTALL)
-    if fenced:
-        return fenced[0].strip()
-    return content.strip()
-
-
-def _extract_html(content: str) -> str:
-    text = content.strip()
-    if not text:
-        return "<!doctype html>\n<html><body><pre></pre></body></html>"
-    fenced = re.findall(r"```(?:html)?\n(.*?)```", text, re.DOTALL | re.IGNORECASE)
-    if fenced:
-        return fenced[0].strip()
-    if text.startswith("```html") or text.startswith("```"):
-        text = re.sub(r"^```(?:html)?\n?", "", text, flags=re.IGNORECASE).strip()
-    text = re.sub(r"\n?```$", "", text).strip()
-    if "<html" in text.lower():
-        return text
-    return f"<!doctype html>\n<html><body><pre>{text}</pre></body></html>"
+from code_samples import CODE_SAMPLE_MODES
+from config import Config
+from moonshot_video import VIDEO_INPUT_MODES
+from pipeline import PIPELINE_STAGES, DocsPipeline, MoonshotVideoAnalysis
 
 
 def _build_arg_parser() -> argparse.ArgumentParser:
@@ -68,104 +30,86 @@ def _build_arg_parser() -> argparse.ArgumentParser:
     parser.add_argument(
         "--max-steps",
         type=int,
-        default=5,
-        help="Max number of steps to generate code samples for.",
+        default=Config.CODE_SAMPLE_MAX_STEPS,
+        help="Max number of steps to generate code samples for (0 = all; default CODE_SAMPLE_MAX_STEPS).",
+    )
+    parser.add_argument(
+        "--code-samples",
+        choices=CODE_SAMPLE_MODES,
+        default=None,
+        help=(
+            "chained: each step builds on the previous step's code (serial). "
+            "parallel: all steps from a shared skeleton, then one reconciliation pass."
+        ),
+    )
+    parser.add_argument(
+        "--video-input",
+        choices=VIDEO_INPUT_MODES,
+        default=Config.MOONSHOT_VIDEO_INPUT,
+        help="How the video is sent: stream (chunked base64), upload (Files API) or inline.",
+    )
+    parser.add_argument(
+        "--segment-seconds",
+        type=float,
+        default=Config.VIDEO_SEGMENT_SECONDS,
+        help="Analyze the video in overlapping segments of this length and merge them (0 = whole video).",
+    )
+    parser.add_argument(
+        "--segment-overlap",
+        type=float,
+        default=Config.VIDEO_SEGMENT_OVERLAP_SECONDS,
+        help="Seconds of overlap between consecutive segments.",
+    )
+    parser.add_argument(
+        "--segment-workers",
+        type=int,
+        default=Config.VIDEO_SEGMENT_WORKERS,
+        help="Segments analyzed concurrently.",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Bypass the on-disk response cache (RESPONSE_CACHE_DIR) for this run.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse checkpointed stages from a previous run whose inputs are unchanged.",
+    )
+    parser.add_argument(
+        "--from-stage",
+        choices=PIPELINE_STAGES,
+        default=None,
+        help="Recompute this stage and every stage downstream of it; the rest resume. Implies --resume.",
     )
     return parser
 
 
 def main() -> None:
     args = _build_arg_parser().parse_args()
-    output_dir = Path(args.output_dir)
-    output_dir.mkdir(exist_ok=True)
-
     video_path = Path(args.video)
     if not video_path.exists():
         raise FileNotFoundError(f"Video file not found: {video_path}")
 
-    print("🎬 Step 1: Moonshot video analysis...")
-    analysis_path = Path(
-        analyze_video(video_path, output_dir, args.prompt)
-    )
-    analysis_text = analysis_path.read_text(encoding="utf-8")
-
-    client = KimiK25OpenRouterClient()
-
-    print("🧭 Step 2: Timestamp-free summary...")
-    summary_result = client.generate_timestamped_summary(
-        frames=[],
-        workflow_steps=analysis_text,
-        context=args.context,
-    )
-    (output_dir / "summary.txt").write_text(
-        summary_result["content"] or "", encoding="utf-8"
-    )
-
-    print("❓ Step 3: Auto Q&A...")
-    q_result = client.generate_questions_from_workflow(
-        frames=[],
-        workflow_steps=analysis_text,
-        context=args.context,
-    )
-    questions = [
-        line.strip()
-        for line in (q_result["content"] or "").splitlines()
-        if line.strip()
-    ]
-    (output_dir / "qa_questions.txt").write_text(
-        "\n".join(questions), encoding="utf-8"
+    backend = MoonshotVideoAnalysis(
+        str(video_path),
+        args.prompt,
+        video_input=args.video_input,
+        segment_seconds=args.segment_seconds,
+        overlap_seconds=args.segment_overlap,
+        segment_workers=args.segment_workers,
     )
-
-    a_result = client.answer_workflow_questions(
-        frames=[],
-        workflow_steps=analysis_text,
-        code_samples="",
-        questions=questions,
+    pipeline = DocsPipeline(
+        backend,
         context=args.context,
+        output_dir=args.output_dir,
+        use_cache=False if args.no_cache else None,
+        resume=args.resume,
+        from_stage=args.from_stage,
+        code_sample_mode=args.code_samples,
+        max_steps=args.max_steps,
     )
-    (output_dir / "qa_answers.txt").write_text(
-        a_result["content"] or "", encoding="utf-8"
-    )
-
-    print("💻 Step 4: Code samples...")
-    steps = _parse_steps(analysis_text)
-    code_samples = []
-    for i, step in enumerate(steps[: args.max_steps], 1):
-        prev_code = code_samples[-1]["code"] if code_samples else ""
-        code_result = client.generate_code_from_description(
-            step,
-            previous_code=prev_code,
-            output_format="html",
-        )
-        code_samples.append(
-            {
-                "step": i,
-                "description": step,
-                "code": _extract_code(code_result["content"] or ""),
-            }
-        )
-    (output_dir / "code_samples.json").write_text(
-        json.dumps(code_samples, indent=2), encoding="utf-8"
-    )
-
-    print("📚 Step 5: Interactive documentation...")
-    doc_result = client.create_interactive_documentation(
-        analysis_text,
-        json.dumps(code_samples, indent=2),
-    )
-    html = _extract_html(doc_result["content"] or "")
-    (output_dir / "interactive_tutorial.html").write_text(html, encoding="utf-8")
-    (output_dir / "interactive_tutorial_raw.txt").write_text(
-        doc_result["content"] or "", encoding="utf-8"
-    )
-
-    print("✅ Done")
-    print(f"   • {analysis_path}")
-    print(f"   • {output_dir / 'summary.txt'}")
-    print(f"   • {output_dir / 'qa_questions.txt'}")
-    print(f"   • {output_dir / 'qa_answers.txt'}")
-    print(f"   • {output_dir / 'code_samples.json'}")
-    print(f"   • {output_dir / 'interactive_tutorial.html'}")
+    pipeline.process(qa_auto=True)
 
 
 if __name__ == "__main__":
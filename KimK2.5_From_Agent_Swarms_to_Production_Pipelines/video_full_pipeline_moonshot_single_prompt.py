@@ -1,21 +1,12 @@
 import argparse
-import base64
-import os
 from pathlib import Path
-from openai import OpenAI
 
-
-def _client() -> OpenAI:
-    api_key = os.environ.get("MOONSHOT_API_KEY")
-    if not api_key:
-        raise ValueError("MOONSHOT_API_KEY is not set in the environment.")
-    return OpenAI(api_key=api_key, base_url="https://api.moonshot.ai/v1")
-
-
-def _video_to_data_url(video_path: Path) -> str:
-    video_data = video_path.read_bytes()
-    ext = video_path.suffix.lstrip(".") or "mp4"
-    return f"data:video/{ext};base64,{base64.b64encode(video_data).decode('utf-8')}"
+from checkpoints import file_fingerprint
+from config import Config
+from cost_governor import CostGovernor, cost_limits_configured
+from moonshot_video import VIDEO_INPUT_MODES, preflight_video
+from openrouter_client import KimiK25MoonshotClient
+from video_segments import analyze_segmented
 
 
 def _build_context_probe(repeats: int, marker: str) -> str:
@@ -55,6 +46,30 @@ def _build_arg_parser() -> argparse.ArgumentParser:
         default="PROBE_OK_12345",
         help="Marker to verify the model saw the end of the prompt.",
     )
+    parser.add_argument(
+        "--video-input",
+        choices=VIDEO_INPUT_MODES,
+        default=Config.MOONSHOT_VIDEO_INPUT,
+        help="How the video is sent: stream (chunked base64), upload (Files API) or inline.",
+    )
+    parser.add_argument(
+        "--segment-seconds",
+        type=float,
+        default=Config.VIDEO_SEGMENT_SECONDS,
+        help="Analyze the video in overlapping segments of this length and merge them (0 = whole video).",
+    )
+    parser.add_argument(
+        "--segment-overlap",
+        type=float,
+        default=Config.VIDEO_SEGMENT_OVERLAP_SECONDS,
+        help="Seconds of overlap between consecutive segments.",
+    )
+    parser.add_argument(
+        "--segment-workers",
+        type=int,
+        default=Config.VIDEO_SEGMENT_WORKERS,
+        help="Segments analyzed concurrently.",
+    )
     return parser
 
 
@@ -67,8 +82,28 @@ def main() -> None:
     if not video_path.exists():
         raise FileNotFoundError(f"Video file not found: {video_path}")
 
+    # Long videos: segments are analyzed first and the single prompt then
+    # works from the merged, timestamped workflow instead of the video.
+    # Spend ceilings apply here as in the other entry points when any COST_LIMIT_* is set.
+    governor = CostGovernor(video=video_path.name) if cost_limits_configured() else None
+    kimi = KimiK25MoonshotClient(governor=governor)
+    workflow = ""
+    if args.segment_seconds:
+        workflow, _ = analyze_segmented(
+            kimi,
+            video_path,
+            "Please describe the content of the video with a step-by-step workflow and key UI changes.",
+            output_dir,
+            video_input=args.video_input,
+            segment_seconds=args.segment_seconds,
+            overlap_seconds=args.segment_overlap,
+            max_workers=args.segment_workers,
+        )
+        (output_dir / "video_analysis.txt").write_text(workflow, encoding="utf-8")
+
+    source = "the timestamped workflow of a tutorial video" if workflow else "a tutorial video"
     prompt = (
-        "You are given a tutorial video. Perform ALL tasks in one response.\n\n"
+        f"You are given {source}. Perform ALL tasks in one response.\n\n"
         f"Context: {args.context}\n\n"
         "Tasks:\n"
         "1) Provide a step-by-step workflow (10-15 steps).\n"
@@ -82,28 +117,30 @@ def main() -> None:
         "- Do not use markdown code fences.\n"
     )
 
+    if workflow:
+        prompt += f"\nWorkflow:\n{workflow}\n"
     prompt += _build_context_probe(args.context_probe_repeats, args.context_probe_marker)
 
-    client = _client()
-    completion = client.chat.completions.create(
-        model="kimi-k2.5",
-        messages=[
-            {"role": "system", "content": "You are Kimi."},
-            {
-                "role": "user",
-                "content": [
-                    {"type": "video_url", "video_url": {"url": _video_to_data_url(video_path)}},
-                    {"type": "text", "text": prompt},
-                ],
-            },
-        ],
-        temperature=0.3,
-        max_tokens=8000,
-    )
+    if workflow:
+        content = kimi.complete_text(prompt, max_tokens=8000, system="You are Kimi.")["content"] or ""
+    else:
+        content = kimi.analyze_video(
+            prompt,
+            file_fingerprint(video_path),
+            lambda: preflight_video(video_path, output_dir),
+            args.video_input,
+            max_tokens=8000,
+        )["content"]
 
     output_path = output_dir / "single_prompt_response.txt"
-    output_path.write_text(completion.choices[0].message.content or "", encoding="utf-8")
+    output_path.write_text(content, encoding="utf-8")
     print(f"✅ Response saved to: {output_path}")
+    if governor:
+        stats = governor.summary()
+        print(
+            f"💰 Spent ${stats['spent']['video']:.4f} on this video; "
+            f"{stats['downgraded']} calls downgraded, {stats['refused']} refused"
+        )
 
 
 if __name__ == "__main__":
@@ -1,58 +1,299 @@
-import cv2
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, Iterator, List, Tuple
 from config import Config
+from frame_encoding import encode_frame
+from frame_selection import make_thumbnail, scene_change_scores, select_change_points
+from video_decoders import VideoDecoder, open_decoder
+
+
+SAMPLING_MODES = ("sequential", "grab", "seek")
+SELECTION_MODES = ("interval", "scene")
+# "disk" writes JPEGs to output_dir, "memory" keeps the encoded bytes on the frame
+# dict under "jpeg", "both" does both.
+FRAME_STORAGE_MODES = ("disk", "memory", "both")
+
+
+def split_shards(items: List, shards: int) -> List[List]:
+    # Contiguous runs of near-equal length, so each shard is one time range.
+    size, extra = divmod(len(items), shards)
+    runs, start = [], 0
+    for i in range(shards):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            runs.append(items[start:end])
+        start = end
+    return runs
 
 
 class VideoFrameExtractor:
-    def __init__(self, video_path: str, output_dir: str = "frames"):
+    def __init__(
+        self,
+        video_path: str,
+        output_dir: str = "frames",
+        frame_storage: str = None,
+        decode_backend: str = None,
+        shards: int = None,
+    ):
         self.video_path = video_path
         self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(exist_ok=True)
+        self.decode_backend = decode_backend
+        # Worker processes that each decode one time range of the video
+        # (FRAME_EXTRACT_SHARDS; 0 = one per CPU core).
+        self.shards = Config.FRAME_EXTRACT_SHARDS if shards is None else shards
+        self.frame_storage = frame_storage or Config.FRAME_STORAGE
+        if self.frame_storage not in FRAME_STORAGE_MODES:
+            raise ValueError(
+                f"Unknown frame storage '{self.frame_storage}'. "
+                f"Choose from: {', '.join(FRAME_STORAGE_MODES)}"
+            )
+        if self.frame_storage != "memory":
+            self.output_dir.mkdir(parents=True, exist_ok=True)
 
     def extract_key_frames(
         self,
         interval_seconds: int = None,
         max_frames: int = None,
+        sampling_mode: str = None,
+        selection: str = None,
     ) -> List[Dict]:
         interval_seconds = interval_seconds or Config.FRAME_INTERVAL_SECONDS
         max_frames = max_frames or Config.MAX_FRAMES
+        sampling_mode = sampling_mode or Config.FRAME_SAMPLING_MODE
+        selection = selection or Config.FRAME_SELECTION
+        if sampling_mode not in SAMPLING_MODES:
+            raise ValueError(
+                f"Unknown sampling mode '{sampling_mode}'. Choose from: {', '.join(SAMPLING_MODES)}"
+            )
+        if selection not in SELECTION_MODES:
+            raise ValueError(
+                f"Unknown frame selection '{selection}'. Choose from: {', '.join(SELECTION_MODES)}"
+            )
 
-        cap = cv2.VideoCapture(str(self.video_path))
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        decoder = open_decoder(self.video_path, self.decode_backend)
+        fps = decoder.fps
+        total_frames = decoder.frame_count
         duration = total_frames / fps if fps > 0 else 0
 
+        print(f"🎬 Video info: {duration:.1f}s, {total_frames} frames, {fps:.1f} FPS ({decoder.name} decoder)")
+        shards = self._shard_count(duration)
+        sharded = f", {shards} shards" if shards > 1 else ""
+
+        if selection == "scene" and fps > 0 and total_frames > 0:
+            frames = self._extract_scene_changes(decoder, fps, total_frames, max_frames, sampling_mode, shards)
+            decoder.release()
+            print(f"✅ Extracted {len(frames)} frames (scene-change selection{sharded})")
+            return frames
+
         frame_interval = int(fps * interval_seconds) if fps > 0 else 0
+        sampling_mode = self._resolve_sampling_mode(sampling_mode, frame_interval, total_frames)
+
+        if sampling_mode == "sequential" and (shards == 1 or frame_interval == 0):
+            frames = self._extract_sequential(decoder, fps, frame_interval, max_frames)
+            sharded = ""
+        else:
+            # Sharded sequential sampling grabs through each shard's range.
+            targets = list(range(0, total_frames, frame_interval))[:max_frames]
+            frames = self._decode_targets(
+                decoder, list(enumerate(targets)), sampling_mode == "seek", len(targets), fps, shards
+            )
+
+        decoder.release()
+        print(f"✅ Extracted {len(frames)} frames ({sampling_mode} sampling{sharded})")
+        return frames
+
+    def _shard_count(self, duration: float) -> int:
+        shards = self.shards or os.cpu_count() or 1
+        if shards <= 1 or duration < Config.FRAME_SHARD_MIN_SECONDS:
+            return 1
+        return shards
+
+    def _decode_targets(
+        self,
+        decoder: VideoDecoder,
+        indexed_targets: List[Tuple[int, int]],
+        seek: bool,
+        total: int,
+        fps: float,
+        shards: int = 1,
+    ) -> List[Dict]:
+        """
+        Decode and save ``(index, frame_number)`` targets.
+
+        With several shards the targets are split into contiguous time ranges,
+        each decoded by its own decoder in a worker process. ``pool.map`` keeps
+        shard order, so frames come back in timestamp order, and ``index`` is
+        assigned before splitting, so it matches an unsharded run.
+        """
+        runs = split_shards(indexed_targets, shards) if shards > 1 else []
+        if len(runs) > 1:
+            with ProcessPoolExecutor(max_workers=len(runs)) as pool:
+                shard_frames = pool.map(partial(self._decode_shard, seek=seek, total=total, fps=fps), runs)
+                return [frame for frames in shard_frames for frame in frames]
+
+        targets = [target for _, target in indexed_targets]
+        return [
+            self._save_frame(frame, total, index, target, fps)
+            for (index, _), (target, frame) in zip(indexed_targets, self._iter_targets(decoder, targets, seek))
+        ]
+
+    def _decode_shard(self, indexed_targets: List[Tuple[int, int]], seek: bool, total: int, fps: float) -> List[Dict]:
+        # Runs in a worker process with its own decoder, which first jumps to
+        # the start of this shard's range.
+        decoder = open_decoder(self.video_path, self.decode_backend)
+        decoder.seek(indexed_targets[0][1])
+        frames = self._decode_targets(decoder, indexed_targets, seek, total, fps)
+        decoder.release()
+        return frames
+
+    def _probe_targets(
+        self,
+        decoder: VideoDecoder,
+        targets: List[int],
+        seek: bool,
+        shards: int = 1,
+    ) -> Tuple[List[int], List[np.ndarray]]:
+        runs = split_shards(targets, shards) if shards > 1 else []
+        if len(runs) > 1:
+            with ProcessPoolExecutor(max_workers=len(runs)) as pool:
+                probed = list(pool.map(partial(self._probe_shard, seek=seek), runs))
+            return (
+                [target for positions, _ in probed for target in positions],
+                [thumbnail for _, thumbnails in probed for thumbnail in thumbnails],
+            )
+
+        positions = []
+        thumbnails = []
+        for target, frame in self._iter_targets(decoder, targets, seek):
+            positions.append(target)
+            thumbnails.append(make_thumbnail(frame))
+        return positions, thumbnails
 
+    def _probe_shard(self, targets: List[int], seek: bool) -> Tuple[List[int], List[np.ndarray]]:
+        decoder = open_decoder(self.video_path, self.decode_backend)
+        decoder.seek(targets[0])
+        probed = self._probe_targets(decoder, targets, seek)
+        decoder.release()
+        return probed
+
+    def _resolve_sampling_mode(self, sampling_mode: str, frame_interval: int, total_frames: int) -> str:
+        # Without a usable FPS or frame count we cannot compute target positions,
+        # so fall back to reading every frame.
+        if frame_interval == 0 or total_frames <= 0:
+            return "sequential"
+        # Seeking restarts decoding at the previous keyframe; for short gaps it is
+        # cheaper to grab() through the skipped frames instead.
+        if sampling_mode == "seek" and frame_interval <= Config.SEEK_MIN_GAP_FRAMES:
+            return "grab"
+        return sampling_mode
+
+    def _extract_sequential(
+        self,
+        decoder: VideoDecoder,
+        fps: float,
+        frame_interval: int,
+        max_frames: int,
+    ) -> List[Dict]:
         frames = []
         frame_count = 0
-        extracted_count = 0
-
-        print(f"🎬 Video info: {duration:.1f}s, {total_frames} frames, {fps:.1f} FPS")
 
-        while cap.isOpened() and extracted_count < max_frames:
-            ret, frame = cap.read()
+        while len(frames) < max_frames:
+            ret, frame = decoder.read()
             if not ret:
                 break
 
             should_capture = frame_interval == 0 or frame_count % frame_interval == 0
             if should_capture:
-                timestamp = frame_count / fps if fps > 0 else 0
-                frame_path = self.output_dir / f"frame_{extracted_count:04d}_{timestamp:.1f}s.jpg"
-                cv2.imwrite(str(frame_path), frame)
-                frames.append(
-                    {
-                        "path": str(frame_path),
-                        "timestamp": timestamp,
-                        "index": extracted_count,
-                    }
-                )
-                extracted_count += 1
-                print(f"  📸 Extracted frame {extracted_count}/{max_frames} at {timestamp:.1f}s")
+                frames.append(self._save_frame(frame, max_frames, len(frames), frame_count, fps))
 
             frame_count += 1
 
-        cap.release()
-        print(f"✅ Extracted {len(frames)} frames")
         return frames
+
+    def _extract_scene_changes(
+        self,
+        decoder: VideoDecoder,
+        fps: float,
+        total_frames: int,
+        max_frames: int,
+        sampling_mode: str,
+        shards: int = 1,
+    ) -> List[Dict]:
+        probe_interval = max(1, int(fps * Config.SCENE_PROBE_SECONDS))
+        probe_mode = self._resolve_sampling_mode(sampling_mode, probe_interval, total_frames)
+        probe_targets = list(range(0, total_frames, probe_interval))
+
+        positions, thumbnails = self._probe_targets(decoder, probe_targets, probe_mode == "seek", shards)
+        if not thumbnails:
+            return []
+
+        scores = scene_change_scores(np.stack(thumbnails))
+        min_gap = max(1, int(round(Config.SCENE_MIN_GAP_SECONDS / Config.SCENE_PROBE_SECONDS)))
+        picked = select_change_points(scores, max_frames, Config.SCENE_CHANGE_THRESHOLD, min_gap)
+        print(
+            f"  🔎 Scored {len(thumbnails)} probes, {len(picked)} change points "
+            f"(threshold {Config.SCENE_CHANGE_THRESHOLD})"
+        )
+
+        # Only thumbnails were kept during probing, so decode the chosen frames
+        # again at full resolution.
+        targets = [positions[i] for i in picked]
+        score_by_target = {positions[i]: float(scores[i]) for i in picked}
+        frames = self._decode_targets(decoder, list(enumerate(targets)), True, len(targets), fps, shards)
+        for frame_info in frames:
+            frame_info["scene_score"] = score_by_target[targets[frame_info["index"]]]
+        return frames
+
+    def _iter_targets(
+        self,
+        decoder: VideoDecoder,
+        targets: List[int],
+        seek: bool,
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        for target in targets:
+            # Decoders seek to the preceding keyframe and decode forward to the
+            # exact frame, so only one GOP is decoded.
+            if seek and target != decoder.position:
+                decoder.seek(target)
+
+            # grab() skips the BGR conversion, the most expensive part of
+            # read() for frames we throw away.
+            while decoder.position < target:
+                if not decoder.grab():
+                    return
+
+            ret, frame = decoder.read()
+            if not ret:
+                return
+            yield target, frame
+
+    def _save_frame(
+        self,
+        frame: np.ndarray,
+        max_frames: int,
+        index: int,
+        frame_number: int,
+        fps: float,
+    ) -> Dict:
+        timestamp = frame_number / fps if fps > 0 else 0
+        jpeg, width, height = encode_frame(frame)
+
+        frame_info = {
+            "timestamp": timestamp,
+            "index": index,
+            "width": width,
+            "height": height,
+            "bytes": len(jpeg),
+        }
+        if self.frame_storage != "memory":
+            frame_path = self.output_dir / f"frame_{index:04d}_{timestamp:.1f}s.jpg"
+            frame_path.write_bytes(jpeg)
+            frame_info["path"] = str(frame_path)
+        if self.frame_storage != "disk":
+            frame_info["jpeg"] = jpeg
+
+        print(f"  📸 Extracted frame {index + 1}/{max_frames} at {timestamp:.1f}s")
+        return frame_info
@@ -1,51 +1,24 @@
 import argparse
-import base64
-import os
 from pathlib import Path
-from openai import OpenAI
+from checkpoints import file_fingerprint
 from config import Config
+from moonshot_video import VIDEO_INPUT_MODES, preflight_video
+from openrouter_client import KimiK25MoonshotClient
 
 
-def analyze_video(video_path: Path, output_dir: Path, prompt: str) -> str:
-    api_key = os.environ.get("MOONSHOT_API_KEY")
-    if not api_key:
-        raise ValueError("MOONSHOT_API_KEY is not set in the environment.")
-
-    client = OpenAI(
-        api_key=api_key,
-        base_url="https://api.moonshot.ai/v1",
-    )
-
-    video_data = video_path.read_bytes()
-    ext = video_path.suffix.lstrip(".") or "mp4"
-    video_url = (
-        f"data:video/{ext};base64,"
-        f"{base64.b64encode(video_data).decode('utf-8')}"
-    )
-
-    completion = client.chat.completions.create(
-        model="kimi-k2.5",
-        messages=[
-            {"role": "system", "content": "You are Kimi."},
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "video_url",
-                        "video_url": {"url": video_url},
-                    },
-                    {
-                        "type": "text",
-                        "text": prompt,
-                    },
-                ],
-            },
-        ],
-    )
+def analyze_video(video_path: Path, output_dir: Path, prompt: str, video_input: str = None) -> str:
+    kimi = KimiK25MoonshotClient()
 
     output_dir.mkdir(exist_ok=True)
+    content = kimi.analyze_video(
+        prompt,
+        file_fingerprint(video_path),
+        lambda: preflight_video(video_path, output_dir),
+        video_input,
+    )["content"]
+
     output_path = output_dir / "video_analysis.txt"
-    output_path.write_text(completion.choices[0].message.content or "", encoding="utf-8")
+    output_path.write_text(content, encoding="utf-8")
     return str(output_path)
 
 
@@ -62,6 +35,12 @@ def _build_arg_parser() -> argparse.ArgumentParser:
         default="output_video_openrouter",
         help="Output directory for the analysis.",
     )
+    parser.add_argument(
+        "--video-input",
+        choices=VIDEO_INPUT_MODES,
+        default=Config.MOONSHOT_VIDEO_INPUT,
+        help="How the video is sent: stream (chunked base64), upload (Files API) or inline.",
+    )
     return parser
 
 
@@ -74,7 +53,7 @@ def main() -> None:
         raise FileNotFoundError(f"Video file not found: {video_path}")
 
     output_dir = Path(args.output_dir)
-    output_path = analyze_video(video_path, output_dir, args.prompt)
+    output_path = analyze_video(video_path, output_dir, args.prompt, args.video_input)
     print(f"✅ Video analysis written to: {output_path}")
 
 
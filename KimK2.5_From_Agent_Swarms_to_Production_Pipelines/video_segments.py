@@ -0,0 +1,218 @@
+import json
+import math
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from checkpoints import file_fingerprint
+from config import Config
+from moonshot_video import preflight_video, transcode_video, video_duration
+
+_TIMESTAMP = re.compile(r"(?<![\d:])(\d{1,2}):([0-5]\d)(?::([0-5]\d))?(?![\d:])")
+_NUMBERED_STEP = re.compile(r"^(?:step\s*)?\d+[\).\:\-]\s+(.*)$", re.IGNORECASE)
+
+
+def format_timestamp(seconds: float) -> str:
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    if hours:
+        return f"{hours}:{rest // 60:02d}:{rest % 60:02d}"
+    return f"{rest // 60:02d}:{rest % 60:02d}"
+
+
+def plan_segments(duration: float, segment_seconds: float, overlap_seconds: float) -> List[Dict]:
+    # Fixed-length windows that each start ``overlap_seconds`` before the
+    # previous one ends; a short tail is folded into the last window.
+    if duration <= 0:
+        raise ValueError("Video duration is unknown; cannot plan segments.")
+    if duration <= segment_seconds:
+        return [{"index": 1, "start": 0.0, "end": duration}]
+    overlap_seconds = min(overlap_seconds, segment_seconds / 2)
+    stride = segment_seconds - overlap_seconds
+    count = max(1, math.ceil((duration - overlap_seconds) / stride))
+    if count > 1 and duration - (count - 1) * stride < segment_seconds / 4:
+        count -= 1
+    segments = []
+    for i in range(count):
+        start = i * stride
+        end = duration if i == count - 1 else min(duration, start + segment_seconds)
+        segments.append({"index": i + 1, "start": start, "end": end})
+    return segments
+
+
+def shift_timestamps(text: str, offset: float) -> str:
+    # Clip-relative [MM:SS] / [H:MM:SS] timestamps -> full-video timestamps.
+    def shift(match: re.Match) -> str:
+        a, b, c = match.groups()
+        seconds = int(a) * 3600 + int(b) * 60 + int(c) if c else int(a) * 60 + int(b)
+        return format_timestamp(seconds + offset)
+
+    return _TIMESTAMP.sub(shift, text or "")
+
+
+def _first_timestamp(text: str) -> Optional[float]:
+    match = _TIMESTAMP.search(text)
+    if not match:
+        return None
+    a, b, c = match.groups()
+    return int(a) * 3600 + int(b) * 60 + int(c) if c else int(a) * 60 + int(b)
+
+
+def numbered_steps(text: str) -> List[str]:
+    lines = [line.strip() for line in (text or "").splitlines() if line.strip()]
+    return [match.group(1).strip() for match in map(_NUMBERED_STEP.match, lines) if match]
+
+
+def segment_prompt(prompt: str, segment: Dict, total: int) -> str:
+    return (
+        f"{prompt}\n\n"
+        f"This clip is part {segment['index']} of {total} of a longer video and starts at "
+        f"{format_timestamp(segment['start'])} in the full video.\n"
+        "- Return a numbered step-by-step workflow of what happens in this clip only\n"
+        "- Start each step with its timestamp as [MM:SS], measured from the start of this clip\n"
+    )
+
+
+def merge_prompt(segments: List[Dict], overlap_seconds: float) -> str:
+    blocks = "\n\n".join(
+        f"Segment {s['index']} ({format_timestamp(s['start'])}-{format_timestamp(s['end'])}):\n{s['analysis']}"
+        for s in segments
+    )
+    return (
+        "These are step-by-step workflows of consecutive segments of one tutorial video. "
+        "Timestamps are already relative to the start of the full video. Segments overlap by "
+        f"{overlap_seconds:g} seconds, so steps near a boundary may appear in two segments.\n\n"
+        f"{blocks}\n\n"
+        "Requirements:\n"
+        "- Merge them into ONE numbered step list in chronological order\n"
+        "- Remove steps duplicated by the overlaps\n"
+        "- Keep terminology, file names and identifiers consistent across the list\n"
+        "- Start each step with its [MM:SS] timestamp and keep key UI changes\n\n"
+        "Return only the numbered steps."
+    )
+
+
+def stitch_segments(segments: List[Dict]) -> str:
+    # Deterministic merge: each overlap is split at its midpoint and steps from
+    # the side that does not own their timestamp are dropped.
+    merged = []
+    for i, segment in enumerate(segments):
+        low = (segment["start"] + segments[i - 1]["end"]) / 2 if i else None
+        high = (segments[i + 1]["start"] + segment["end"]) / 2 if i + 1 < len(segments) else None
+        steps = numbered_steps(segment["analysis"]) or [segment["analysis"].strip()]
+        for step in steps:
+            at = _first_timestamp(step)
+            if at is not None and ((low is not None and at < low) or (high is not None and at >= high)):
+                continue
+            merged.append(step)
+    return "\n".join(f"{i}. {step}" for i, step in enumerate(merged, 1))
+
+
+def analyze_segmented(
+    kimi,
+    video_path: Path,
+    prompt: str,
+    output_dir: Path,
+    video_input: str = None,
+    segment_seconds: float = None,
+    overlap_seconds: float = None,
+    max_workers: int = None,
+    on_result: Callable[[Dict], None] = None,
+) -> Tuple[str, List[Dict]]:
+    """
+    Map-reduce analysis of a long video.
+
+    The video is cut into overlapping segments that are analyzed concurrently
+    (each worker cuts its own clip, so cutting overlaps with API calls). Clip
+    timestamps are shifted to full-video time, and one text-only call merges
+    the segment workflows into a single step list; if that reply has no
+    numbered steps the deterministic ``stitch_segments`` merge is used.
+    Calls go through ``kimi``, a ``KimiK25MoonshotClient``, so segments are
+    cached by source file and range, retried and governed; a cached segment
+    is not cut at all. Per-segment analyses go to ``output_dir/segments/``;
+    ``on_result`` is called with every API result (segments and merge) for
+    usage tracking.
+    """
+    segment_seconds = segment_seconds or Config.VIDEO_SEGMENT_SECONDS
+    overlap_seconds = Config.VIDEO_SEGMENT_OVERLAP_SECONDS if overlap_seconds is None else overlap_seconds
+    max_workers = max_workers or Config.VIDEO_SEGMENT_WORKERS
+    video_path = Path(video_path)
+    duration = video_duration(video_path)
+    segments_dir = Path(output_dir) / "segments"
+    segments_dir.mkdir(parents=True, exist_ok=True)
+    if duration > 0:
+        segments = plan_segments(duration, segment_seconds, overlap_seconds)
+        print(
+            f"✂️ {format_timestamp(duration)} video -> {len(segments)} segments of ~{segment_seconds:g}s "
+            f"({overlap_seconds:g}s overlap, {max_workers} concurrent)"
+        )
+    else:
+        # Cutting needs the duration; without it the whole video is one request.
+        print("⚠️ Could not read the video duration; analyzing it unsegmented.")
+        segments = [{"index": 1, "start": 0.0, "end": None}]
+
+    source = file_fingerprint(video_path)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        def cut(segment: Dict) -> Path:
+            clip = transcode_video(
+                video_path,
+                Path(tmp) / f"segment_{segment['index']:02d}.mp4",
+                start=segment["start"],
+                end=segment["end"],
+                crf=23,
+            )
+            return preflight_video(clip, tmp)
+
+        def analyze(segment: Dict) -> Dict:
+            started = time.perf_counter()
+            if len(segments) == 1:
+                # One segment is the whole video: send the original file, not a re-encode.
+                result = kimi.analyze_video(prompt, source, lambda: preflight_video(video_path, tmp), video_input)
+            else:
+                result = kimi.analyze_video(
+                    segment_prompt(prompt, segment, len(segments)),
+                    {**source, "start": segment["start"], "end": segment["end"]},
+                    lambda: cut(segment),
+                    video_input,
+                )
+            if on_result:
+                on_result(result)
+            analysis = shift_timestamps(result["content"], segment["start"])
+            (segments_dir / f"segment_{segment['index']:02d}.txt").write_text(analysis, encoding="utf-8")
+            seconds = time.perf_counter() - started
+            print(f"   🎬 Segment {segment['index']}/{len(segments)} analyzed in {seconds:.1f}s")
+            return {**segment, "seconds": seconds, "analysis": analysis}
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            results = list(pool.map(analyze, segments))
+        map_seconds = time.perf_counter() - started
+
+    if len(results) == 1:
+        merged, merge_method = results[0]["analysis"], "single"
+    else:
+        print("🔗 Merging segment workflows...")
+        result = kimi.merge_workflow_analyses(results, overlap_seconds)
+        if on_result:
+            on_result(result)
+        merged = result["content"]
+        merge_method = "model"
+        if not numbered_steps(merged):
+            print("⚠️ Merge reply had no numbered steps; stitching segments at overlap midpoints.")
+            merged, merge_method = stitch_segments(results), "stitch"
+
+    report = {
+        "duration_seconds": duration,
+        "segment_seconds": segment_seconds,
+        "overlap_seconds": overlap_seconds,
+        "workers": max_workers,
+        "map_seconds": map_seconds,
+        "merge": merge_method,
+        "segments": [{k: v for k, v in r.items() if k != "analysis"} for r in results],
+    }
+    (segments_dir / "segments.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+    return merged, results